@@ -8,13 +8,16 @@ from mautrix.util.program import Program
 from .config import Config
 from .db import init as init_db
 from .db import upgrade_table
+from .durable_timers import DurableTimers
 from .email_client import EmailClient
-from .events import NatsPublisher
+from .events import EventCodec, EventFileSink, EventPipeline, EventPolicy, NatsPublisher
 from .flow import Flow
 from .flow_utils import FlowUtils
+from .http_pool import HTTPPool
 from .menu import MenuClient
 from .repository.middlewares import EmailServer
 from .server import MenuFlowServer
+from .utils import TimerService
 from .version import version
 from .web.management_api import ManagementAPI
 
@@ -52,7 +55,13 @@ class MenuFlow(Program):
         super().prepare()
         self.prepare_db()
         MenuClient.init_cls(self)
+        HTTPPool.init_cls(self.config)
+        DurableTimers.init_cls(self.config)
         NatsPublisher.init_cls(self.config)
+        EventCodec.init_cls(self.config)
+        EventFileSink.init_cls(self.config)
+        EventPipeline.init_cls(self.config)
+        EventPolicy.init_cls(self.config)
         self.flow_utils = FlowUtils()
         self.management_api = ManagementAPI(
             config=self.config,
@@ -99,13 +108,20 @@ class MenuFlow(Program):
 
     async def start(self) -> None:
         await self.start_db()
+        EventPipeline.start()
+        EventPolicy.start()
         await asyncio.gather(*[menu.start() async for menu in MenuClient.all()])
+        DurableTimers.restore_in_background()
         await super().start()
         await self.server.start()
         if self.flow_utils:
             asyncio.create_task(self.start_email_connections())
 
     async def stop(self) -> None:
+        await TimerService.stop()
+        await EventPolicy.stop()
+        await EventPipeline.stop()
+        await EventFileSink.close()
         await NatsPublisher.close_connection()
         self.add_shutdown_actions(*(menu.stop() for menu in MenuClient.cache.values()))
         await super().stop()
@@ -114,6 +130,7 @@ class MenuFlow(Program):
             await asyncio.wait_for(self.server.stop(), 5)
         except asyncio.TimeoutError:
             self.log.warning("Stopping server timed out")
+        await HTTPPool.close()
         await self.db.stop()
 
 
@@ -20,6 +20,18 @@ class Config(BaseFileConfig):
         copy("menuflow.sync.room_event_filter")
         copy("menuflow.timeouts.http_request")
         copy("menuflow.timeouts.middlewares")
+        copy("menuflow.timers.restore_concurrency")
+        copy("menuflow.jwt_tokens.default_ttl")
+        copy("menuflow.jwt_tokens.refresh_margin")
+        copy("menuflow.templates.render_mode")
+        copy("menuflow.limits.http_response_size")
+        copy("menuflow.limits.render_time")
+        copy("menuflow.limits.render_size")
+        copy("menuflow.limits.render_threads")
+        copy("menuflow.limits.render_thread_timeout")
+        copy("menuflow.http_pools.matrix")
+        copy("menuflow.http_pools.nodes")
+        copy_dict("menuflow.http_pools.upstreams")
         copy("menuflow.typing_notification")
         copy("menuflow.send_events")
         copy("menuflow.load_flow_from")
@@ -29,8 +41,42 @@ class Config(BaseFileConfig):
         copy("server.port")
         copy("server.public_url")
         copy("server.base_path")
-        copy_dict("events")
-        copy_dict("nats")
+        copy("events.write_to_file")
+        copy("events.file.path")
+        copy("events.file.buffer_size")
+        copy("events.file.max_size")
+        copy("events.file.max_age")
+        copy("events.file.compress")
+        copy("events.file.backup_count")
+        copy("events.file.fsync")
+        copy("events.file.fsync_interval")
+        copy("events.send_events")
+        copy("events.sqlite_action")
+        copy("events.variables_format")
+        copy("events.snapshot_interval")
+        copy("events.policies")
+        copy("events.aggregate_interval")
+        copy("events.queue.max_size")
+        copy("events.queue.batch_size")
+        copy("events.queue.flush_interval")
+        copy("events.queue.full_policy")
+        copy("events.batch_publish")
+        copy("events.encoding.serializer")
+        copy("events.encoding.compression")
+        copy("events.encoding.compression_level")
+        copy("events.encoding.min_size")
+        copy("events.replay.page_size")
+        copy("events.replay.concurrency")
+        copy("events.replay.rate")
+        copy("nats.enabled")
+        copy("nats.address")
+        copy("nats.user")
+        copy("nats.password")
+        copy("nats.stream")
+        copy("nats.subject")
+        copy("nats.max_reconnect_attempts")
+        copy("nats.reconnect_time_wait")
+        copy("nats.max_pending_acks")
         copy_dict("logging")
         shared_secret = self["server.unshared_secret"]
         if shared_secret is None or shared_secret == "generate":
@@ -4,13 +4,14 @@ from .client import Client
 from .flow import Flow
 from .migrations import upgrade_table
 from .room import Room
+from .room_timer import RoomTimer
 from .route import Route
 from .user import User
 
 
 def init(db: Database) -> None:
-    for table in (Room, User, Client, Route, Flow):
+    for table in (Room, User, Client, Route, Flow, RoomTimer):
         table.db = db
 
 
-__all__ = ["upgrade_table", "Room", "User", "Client", "Route", "Flow"]
+__all__ = ["upgrade_table", "Room", "User", "Client", "Route", "Flow", "RoomTimer"]
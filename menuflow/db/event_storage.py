@@ -1,6 +1,9 @@
+import asyncio
 import logging
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from sqlite3 import Connection, Cursor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from mautrix.util.logging import TraceLogger
 
@@ -10,18 +13,29 @@ log: TraceLogger = logging.getLogger("report.storage")
 
 
 class EventStorage:
+    """Buffer of events stored in a sqlite database.
+
+    The queries run in a dedicated thread, so a slow disk does not block the event loop,
+    and the number of events pending to be acknowledged (backlog) is kept in memory.
+    """
+
     _conn: Connection = None
     _db: Cursor = None
+    # A single thread, sqlite connections can not be used by two threads at the same time
+    _executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="event_storage"
+    )
+    backlog: int = 0
 
     @classmethod
-    def init_sqlite_db(cls):
+    def init_sqlite_db(cls, path: str = "/data/events.db"):
         if cls._conn and cls._db:
             return
 
         log.info("Performing initial database setup...")
         try:
             # Initialize a connection to the database
-            cls._conn: Connection = sqlite3.connect("/data/events.db")
+            cls._conn: Connection = sqlite3.connect(path, check_same_thread=False)
             cls._conn.row_factory = sqlite3.Row
             cls._db: Cursor = cls._conn.cursor()
         except sqlite3.OperationalError as e:
@@ -35,9 +49,13 @@ class EventStorage:
     @classmethod
     def run_migrations(cls):
         try:
+            # WAL allows reading the buffer while events are being written
+            # and reduces the number of disk syncs by commit
+            cls._db.execute("PRAGMA journal_mode=WAL")
+            cls._db.execute("PRAGMA synchronous=NORMAL")
             cls._db.execute(
                 """
-                    CREATE TABLE event (
+                    CREATE TABLE IF NOT EXISTS event (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         event TEXT,
                         akn BOOLEAN,
@@ -45,29 +63,111 @@ class EventStorage:
                     )
                 """
             )
+            cls._db.execute("CREATE INDEX IF NOT EXISTS idx_event_akn ON event (akn, id)")
+            # The events saved before these columns existed are JSON text
+            cls._db.execute("PRAGMA table_info(event)")
+            columns = {row["name"] for row in cls._db.fetchall()}
+            for column in ("event_type", "content_type", "content_encoding"):
+                if column not in columns:
+                    cls._db.execute(f"ALTER TABLE event ADD COLUMN {column} TEXT")
+            cls._conn.commit()
+            cls._db.execute("SELECT COUNT(*) FROM event WHERE akn = ?", (False,))
+            cls.backlog = cls._db.fetchone()[0]
         except sqlite3.OperationalError as e:
             log.info(f"Failed to create table events: {e}")
 
     @classmethod
-    def insert_event(cls, event: str, akn: bool = False):
-        cls._db.execute("INSERT INTO event (event, akn) VALUES (?, ?)", (event, akn))
-        cls._conn.commit()
+    async def _run(cls, query: Callable[[], Any]) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(cls._executor, query)
+
+    @classmethod
+    async def insert_events(
+        cls, events: List[Tuple[str, bytes, Optional[str], Optional[str]]], akn: bool = False
+    ):
+        """It inserts several events with a single commit.
+
+        Parameters
+        ----------
+        events : List[Tuple[str, bytes, Optional[str], Optional[str]]]
+            The events, each one as a tuple with its event type, its encoded payload,
+            its content type and its content encoding.
+        akn : bool
+            If the events have been acknowledged by NATS.
+
+        """
+        if not events:
+            return
+
+        def query():
+            cls._db.executemany(
+                """
+                    INSERT INTO event (event_type, event, content_type, content_encoding, akn)
+                    VALUES (?, ?, ?, ?, ?)
+                """,
+                [(*event, akn) for event in events],
+            )
+            cls._conn.commit()
+
+        await cls._run(query)
+        if not akn:
+            cls.backlog += len(events)
 
     @classmethod
-    def update_event(cls, event_id: int, akn: bool):
-        cls._db.execute("UPDATE event SET akn = ? WHERE id = ?", (akn, str(event_id)))
-        cls._conn.commit()
+    async def update_events(cls, event_ids: List[int], akn: bool):
+        if not event_ids:
+            return
+
+        def query():
+            cls._db.executemany(
+                "UPDATE event SET akn = ? WHERE id = ?",
+                [(akn, event_id) for event_id in event_ids],
+            )
+            cls._conn.commit()
+
+        await cls._run(query)
+        if akn:
+            cls.backlog = max(cls.backlog - len(event_ids), 0)
 
     @classmethod
-    def get_events(cls):
-        cls._db.execute("SELECT * FROM event WHERE akn = ? ORDER BY id ASC", (False,))
-        rows = cls._db.fetchall()
+    async def get_events(cls, after_id: int = 0, limit: int = -1) -> List[Dict]:
+        """It gets the events that have not been acknowledged, ordered by id.
+
+        Parameters
+        ----------
+        after_id : int
+            Only the events with an id greater than this one are returned.
+        limit : int
+            Max number of events returned, -1 means no limit.
+
+        Returns
+        -------
+            A list of events.
+
+        """
+
+        def query():
+            cls._db.execute(
+                "SELECT * FROM event WHERE akn = ? AND id > ? ORDER BY id ASC LIMIT ?",
+                (False, after_id, limit),
+            )
+            return cls._db.fetchall()
+
+        rows = await cls._run(query)
         return [cls.to_dict(row) for row in rows] if rows else []
 
     @classmethod
-    def delete_event(cls, event_id: int):
-        cls._db.execute("DELETE FROM event WHERE id = ?", (str(event_id),))
-        cls._conn.commit()
+    async def delete_events(cls, event_ids: List[int]):
+        if not event_ids:
+            return
+
+        def query():
+            cls._db.executemany(
+                "DELETE FROM event WHERE id = ?", [(event_id,) for event_id in event_ids]
+            )
+            cls._conn.commit()
+
+        await cls._run(query)
+        cls.backlog = max(cls.backlog - len(event_ids), 0)
 
     @classmethod
     def to_dict(cls, row):
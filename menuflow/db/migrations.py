@@ -91,3 +91,22 @@ async def upgrade_v4(conn: Connection) -> None:
 @upgrade_table.register(description="Add enable column to client table")
 async def upgrade_v5(conn: Connection) -> None:
     await conn.execute("ALTER TABLE client ADD COLUMN enabled BOOLEAN NOT NULL DEFAULT TRUE")
+
+
+@upgrade_table.register(description="Add room_timer table")
+async def upgrade_v6(conn: Connection) -> None:
+    await conn.execute(
+        """CREATE TABLE room_timer (
+            id          SERIAL PRIMARY KEY,
+            room_id     TEXT NOT NULL,
+            client      TEXT NOT NULL,
+            kind        TEXT NOT NULL,
+            node_id     TEXT NOT NULL,
+            fire_at     DOUBLE PRECISION NOT NULL,
+            data        JSONB NOT NULL DEFAULT '{}'::jsonb
+        )"""
+    )
+    await conn.execute(
+        "ALTER TABLE room_timer ADD CONSTRAINT idx_unique_room_timer UNIQUE (room_id, client)"
+    )
+    await conn.execute("CREATE INDEX ind_room_timer_fire_at ON room_timer (fire_at)")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, ClassVar, Dict, List, Tuple
+
+from asyncpg import Record
+from attr import dataclass, ib
+from mautrix.types import RoomID, UserID
+from mautrix.util.async_db import Database
+
+fake_db = Database.create("") if TYPE_CHECKING else None
+
+
+@dataclass
+class RoomTimer:
+    """A timer of a room saved in the database, so it survives a restart.
+
+    There is at most one timer by room and client, `kind` is the type of timer
+    (inactivity, invite...) and `fire_at` its unix timestamp.
+    """
+
+    db: ClassVar[Database] = fake_db
+
+    id: int = ib(default=None)
+    room_id: RoomID = ib(factory=str)
+    client: UserID = ib(factory=str)
+    kind: str = ib(factory=str)
+    node_id: str = ib(factory=str)
+    fire_at: float = ib(factory=float)
+    data: str = ib(default="{}")
+
+    @classmethod
+    def _from_row(cls, row: Record) -> RoomTimer | None:
+        return cls(**row)
+
+    @property
+    def values(self) -> Tuple:
+        return (self.room_id, self.client, self.kind, self.node_id, self.fire_at, self.data)
+
+    _columns = "room_id, client, kind, node_id, fire_at, data"
+
+    @property
+    def _data(self) -> Dict:
+        return json.loads(self.data)
+
+    async def upsert(self) -> None:
+        q = f"""
+            INSERT INTO room_timer ({self._columns}) VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (room_id, client)
+            DO UPDATE SET kind = $3, node_id = $4, fire_at = $5, data = $6
+        """
+        await self.db.execute(q, *self.values)
+
+    @classmethod
+    async def delete_by_room(cls, room_id: RoomID, client: UserID) -> None:
+        q = "DELETE FROM room_timer WHERE room_id = $1 AND client = $2"
+        await cls.db.execute(q, room_id, client)
+
+    @classmethod
+    async def get_all(cls) -> List[RoomTimer]:
+        q = f"SELECT id, {cls._columns} FROM room_timer ORDER BY fire_at"
+        rows = await cls.db.fetch(q)
+        return [cls._from_row(row) for row in rows]
+
+    @classmethod
+    async def get_by_client(cls, client: UserID) -> List[RoomTimer]:
+        q = f"SELECT id, {cls._columns} FROM room_timer WHERE client = $1 ORDER BY fire_at"
+        rows = await cls.db.fetch(q, client)
+        return [cls._from_row(row) for row in rows]
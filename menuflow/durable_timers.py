@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from time import time
+from typing import Dict, Optional
+
+from mautrix.types import UserID
+from mautrix.util.logging import TraceLogger
+
+from .config import Config
+from .db.room_timer import RoomTimer
+from .menu import MenuClient
+from .room import Room
+from .utils import Util
+
+log: TraceLogger = logging.getLogger("menuflow.durable_timers")
+
+
+class DurableTimers:
+    """Resumes the timers of the rooms (inactivity, invitations, delays) saved in the database
+    when menuflow starts, so the rooms do not stay waiting forever after a restart.
+    The timers of a client are also resumed after its flow is reloaded, the reload cancels them.
+
+    The node where the room is waiting resumes its own timer (`resume_timer`), the timers
+    that expired while menuflow was stopped are fired at once, up to
+    `menuflow.timers.restore_concurrency` of them at the same time.
+    A timer whose room is not waiting in the node anymore is deleted.
+    """
+
+    config: Config = None
+    stats: Dict[str, int] = {"restored": 0, "fired": 0, "discarded": 0}
+
+    @classmethod
+    def init_cls(cls, config: Config) -> None:
+        cls.config = config
+
+    @classmethod
+    def restore_in_background(cls, client: Optional[UserID] = None) -> asyncio.Task:
+        """It restores the timers in a registered task, a new reload of the flow
+        of the client cancels it (see `Flow.load_flow`).
+        """
+        name = f"{client}/restore_timers" if client else "restore_timers"
+        return Util.create_task(cls.restore(client=client), name=name)
+
+    @classmethod
+    async def restore(cls, client: Optional[UserID] = None) -> None:
+        """It restores the saved timers of all the clients, or only the ones of a client.
+
+        Parameters
+        ----------
+        client : Optional[UserID]
+            The client whose timers are restored, e.g. after its flow is reloaded.
+
+        """
+        if client:
+            room_timers = await RoomTimer.get_by_client(client)
+        else:
+            room_timers = await RoomTimer.get_all()
+
+        if not room_timers:
+            return
+
+        log.info(f"Restoring {len(room_timers)} room timers" + (f" of {client}" if client else ""))
+        semaphore = asyncio.Semaphore(cls.config["menuflow.timers.restore_concurrency"])
+        await asyncio.gather(
+            *[cls.restore_timer(room_timer, semaphore) for room_timer in room_timers]
+        )
+        log.info(f"Room timers restored: {cls.stats}")
+
+    @classmethod
+    async def restore_timer(cls, room_timer: RoomTimer, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                await cls._restore_timer(room_timer)
+            except Exception as e:
+                log.exception(f"Error restoring the timer of {room_timer.room_id}: {e}")
+
+    @classmethod
+    async def _restore_timer(cls, room_timer: RoomTimer) -> None:
+        menu: MenuClient = MenuClient.cache.get(room_timer.client)
+        if not menu or not getattr(menu, "matrix_handler", None):
+            # The client is disabled, its timers are kept until it is enabled again
+            log.warning(f"Client {room_timer.client} is not running, timer not restored")
+            return
+
+        room = await Room.get_by_room_id(
+            room_id=room_timer.room_id, bot_mxid=room_timer.client, create=False
+        )
+        node = None
+        if room:
+            room.config = cls.config
+            room.matrix_client = menu.matrix_handler
+            node = menu.matrix_handler.flow.node(room=room)
+
+        delay = room_timer.fire_at - time()
+        if (
+            not node
+            or node.id != room_timer.node_id
+            or not hasattr(node, "resume_timer")
+            or not await node.resume_timer(room_timer._data, delay)
+        ):
+            log.debug(f"Discarding the {room_timer.kind} timer of {room_timer.room_id}")
+            cls.stats["discarded"] += 1
+            await RoomTimer.delete_by_room(room_id=room_timer.room_id, client=room_timer.client)
+            return
+
+        cls.stats["fired" if delay <= 0 else "restored"] += 1
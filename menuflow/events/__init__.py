@@ -1,5 +1,10 @@
 from .base_event import BaseEvent
+from .event_codec import EventCodec
+from .event_file_sink import EventFileSink
 from .event_generator import send_node_event
+from .event_pipeline import EventPipeline
+from .event_policy import EventPolicy
 from .event_types import MenuflowEventTypes, MenuflowNodeEvents
 from .nats_publisher import NatsPublisher
-from .node_events import NodeEntry, NodeInputData, NodeInputTimeout
+from .node_events import NodeAggregate, NodeEntry, NodeInputData, NodeInputTimeout
+from .variables_delta import VariablesDelta, apply_variables_delta
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from mautrix.util.logging import TraceLogger
+
+from ..config import Config
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+log: TraceLogger = logging.getLogger("report.codec")
+
+CONTENT_TYPES = {"json": "application/json", "msgpack": "application/msgpack"}
+
+
+class EventCodec:
+    """Encodes the events published to NATS and saved in the sqlite buffer.
+
+    The format is sent in the `Content-Type` and `Content-Encoding` headers of the NATS
+    messages, a message without them is a JSON event, so the consumers that only know
+    the JSON format keep working while `events.encoding` has the default values.
+
+    msgpack and zstd are optional, install them with `pip install menuflow[events]`.
+    """
+
+    config: Config = None
+    serializer: str = "json"
+    compression: str = "none"
+    compression_level: int = 3
+    min_size: int = 0
+    _zstd_compressor = None
+    _zstd_decompressor = None
+
+    @classmethod
+    def init_cls(cls, config: Config) -> None:
+        cls.config = config
+        cls.serializer = config["events.encoding.serializer"]
+        cls.compression = config["events.encoding.compression"]
+        cls.compression_level = config["events.encoding.compression_level"]
+        cls.min_size = config["events.encoding.min_size"]
+
+        if cls.serializer == "msgpack" and not msgpack:
+            log.warning("msgpack is not installed, the events will be serialized as JSON")
+            cls.serializer = "json"
+
+        if cls.compression == "zstd" and not zstandard:
+            log.warning("zstandard is not installed, the events will be compressed with gzip")
+            cls.compression = "gzip"
+
+        if cls.compression == "zstd":
+            cls._zstd_compressor = zstandard.ZstdCompressor(level=cls.compression_level)
+
+    @classmethod
+    def dumps(cls, data: Dict) -> bytes:
+        if cls.serializer == "msgpack":
+            return msgpack.packb(data, use_bin_type=True)
+
+        return json.dumps(data).encode()
+
+    @classmethod
+    def loads(cls, payload: bytes | str, content_type: Optional[str] = None) -> Dict:
+        if content_type == CONTENT_TYPES["msgpack"]:
+            return msgpack.unpackb(payload, raw=False)
+
+        return json.loads(payload)
+
+    @classmethod
+    def join(cls, payloads: List[bytes]) -> bytes:
+        """It joins several serialized events in a single payload.
+
+        JSON events are separated by a new line, msgpack events are concatenated
+        and can be read with `msgpack.Unpacker`.
+        """
+        return b"".join(payloads) if cls.serializer == "msgpack" else b"\n".join(payloads)
+
+    @classmethod
+    def compress(cls, payload: bytes) -> Tuple[bytes, Optional[str]]:
+        """It compresses a payload if it is not smaller than `events.encoding.min_size`.
+
+        Returns
+        -------
+            A tuple with the payload and the name of the compression, None if
+            the payload was not compressed.
+
+        """
+        if cls.compression == "none" or len(payload) < cls.min_size:
+            return payload, None
+
+        if cls.compression == "zstd":
+            return cls._zstd_compressor.compress(payload), "zstd"
+
+        return gzip.compress(payload, compresslevel=cls.compression_level), "gzip"
+
+    @classmethod
+    def decompress(cls, payload: bytes, content_encoding: Optional[str] = None) -> bytes:
+        if content_encoding == "zstd":
+            if not cls._zstd_decompressor:
+                cls._zstd_decompressor = zstandard.ZstdDecompressor()
+            return cls._zstd_decompressor.decompress(payload)
+
+        if content_encoding == "gzip":
+            return gzip.decompress(payload)
+
+        return payload
+
+    @classmethod
+    def headers(
+        cls, content_type: Optional[str] = None, content_encoding: Optional[str] = None
+    ) -> Dict[str, str]:
+        """It builds the headers of a NATS message, the default format (JSON without
+        compression) does not need headers.
+        """
+        headers = {}
+        if content_type and content_type != CONTENT_TYPES["json"]:
+            headers["Content-Type"] = content_type
+
+        if content_encoding:
+            headers["Content-Encoding"] = content_encoding
+
+        return headers
+
+    @classmethod
+    def content_type(cls) -> str:
+        return CONTENT_TYPES[cls.serializer]
+
+    @classmethod
+    def decode(
+        cls,
+        payload: bytes | str,
+        content_type: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+    ) -> Dict:
+        """It decodes a single event, for the consumers of the events.
+
+        Parameters
+        ----------
+        payload : bytes | str
+            The payload of the message.
+        content_type : Optional[str]
+            The `Content-Type` header of the message.
+        content_encoding : Optional[str]
+            The `Content-Encoding` header of the message.
+
+        Returns
+        -------
+            The event.
+
+        """
+        return cls.loads(cls.decompress(payload, content_encoding), content_type)
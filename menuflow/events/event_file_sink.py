@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+from io import BufferedWriter
+from typing import List
+
+from mautrix.util.logging import TraceLogger
+
+from ..config import Config
+
+log: TraceLogger = logging.getLogger("report.file")
+
+
+class EventFileSink:
+    """Writes the events to a file when `events.write_to_file` is enabled.
+
+    The file is kept open and the writes run in a dedicated thread, so the event loop
+    does not wait for the disk. The file is rotated by size and by age, the rotated files
+    can be compressed with gzip and only the last `backup_count` of them are kept.
+
+    `fsync` controls when the data is forced to the disk:
+    - never: the operating system decides.
+    - interval: at most once every `fsync_interval` seconds.
+    - always: after every batch of events.
+    """
+
+    config: Config = None
+    _file: BufferedWriter = None
+    _opened_at: float = 0
+    _size: int = 0
+    _last_fsync: float = 0
+    # A single thread, so the writes and the rotations never run at the same time
+    _executor: ThreadPoolExecutor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="event_file_sink"
+    )
+
+    @classmethod
+    def init_cls(cls, config: Config) -> None:
+        cls.config = config
+
+    @classmethod
+    def _open(cls) -> None:
+        path = cls.config["events.file.path"]
+        cls._file = open(path, "ab", buffering=cls.config["events.file.buffer_size"])
+        cls._size = cls._file.tell()
+        cls._opened_at = time.monotonic()
+
+    @classmethod
+    def _should_rotate(cls) -> bool:
+        max_size = cls.config["events.file.max_size"]
+        max_age = cls.config["events.file.max_age"]
+        if max_size and cls._size >= max_size:
+            return True
+
+        return bool(max_age and cls._size and time.monotonic() - cls._opened_at >= max_age)
+
+    @classmethod
+    def _rotate(cls) -> None:
+        path = cls.config["events.file.path"]
+        cls._close()
+
+        rotated_path = f"{path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        suffix = 1
+        while glob(f"{rotated_path}*"):
+            rotated_path = f"{path}.{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+
+        os.replace(path, rotated_path)
+        log.info(f"Events file rotated to {rotated_path}")
+
+        if cls.config["events.file.compress"]:
+            with open(rotated_path, "rb") as source, gzip.open(f"{rotated_path}.gz", "wb") as dest:
+                shutil.copyfileobj(source, dest)
+            os.remove(rotated_path)
+
+        backup_count = cls.config["events.file.backup_count"]
+        if backup_count:
+            for old_path in sorted(glob(f"{path}.*"), key=os.path.getmtime)[:-backup_count]:
+                os.remove(old_path)
+
+        cls._open()
+
+    @classmethod
+    def _fsync(cls, force: bool = False) -> None:
+        policy = cls.config["events.file.fsync"]
+        now = time.monotonic()
+        if (
+            force
+            or policy == "always"
+            or (
+                policy == "interval"
+                and now - cls._last_fsync >= cls.config["events.file.fsync_interval"]
+            )
+        ):
+            cls._file.flush()
+            os.fsync(cls._file.fileno())
+            cls._last_fsync = now
+
+    @classmethod
+    def _write(cls, events: List[str]) -> None:
+        if not cls._file:
+            cls._open()
+        elif cls._should_rotate():
+            cls._rotate()
+
+        data = "".join(f"{event}\n\n" for event in events).encode()
+        cls._file.write(data)
+        cls._size += len(data)
+
+        if cls.config["events.file.fsync"] != "never":
+            cls._fsync()
+
+    @classmethod
+    def _close(cls) -> None:
+        if not cls._file:
+            return
+
+        if cls.config["events.file.fsync"] != "never":
+            cls._fsync(force=True)
+
+        cls._file.close()
+        cls._file = None
+
+    @classmethod
+    async def write(cls, events: List[str]) -> None:
+        """It writes a batch of events to the file.
+
+        Parameters
+        ----------
+        events : List[str]
+            The events as JSON text.
+
+        """
+        await asyncio.get_running_loop().run_in_executor(cls._executor, cls._write, events)
+
+    @classmethod
+    async def close(cls) -> None:
+        await asyncio.get_running_loop().run_in_executor(cls._executor, cls._close)
@@ -5,8 +5,10 @@ from logging import getLogger
 from typing import Optional
 
 from ..config import Config
+from .event_policy import EventPolicy
 from .event_types import MenuflowEventTypes, MenuflowNodeEvents
 from .node_events import NodeEntry, NodeInputData, NodeInputTimeout
+from .variables_delta import VariablesDelta
 
 log = getLogger()
 
@@ -19,6 +21,24 @@ async def send_node_event(
     if not send_node_event:
         return
 
+    send, sample_rate = EventPolicy.evaluate(
+        event=event_type,
+        room_id=kwargs.get("room_id"),
+        node_type=kwargs.get("node_type"),
+        node_id=kwargs.get("node_id"),
+        o_connection=kwargs.get("o_connection"),
+    )
+    if not send:
+        return
+
+    variables_fields = {"variables": kwargs.get("variables")}
+    if config["events.variables_format"] == "delta":
+        variables_fields = VariablesDelta.build(
+            room_id=kwargs.get("room_id"),
+            variables=kwargs.get("variables") or {},
+            snapshot_interval=config["events.snapshot_interval"],
+        )
+
     if event_type == MenuflowNodeEvents.NodeEntry:
         event = NodeEntry(
             event_type=MenuflowEventTypes.NODE,
@@ -29,7 +49,8 @@ async def send_node_event(
             node_type=kwargs.get("node_type"),
             node_id=kwargs.get("node_id"),
             o_connection=kwargs.get("o_connection"),
-            variables=kwargs.get("variables"),
+            **variables_fields,
+            sample_rate=sample_rate,
         )
     elif event_type == MenuflowNodeEvents.NodeInputData:
         event = NodeInputData(
@@ -40,7 +61,8 @@ async def send_node_event(
             sender=kwargs.get("sender"),
             node_id=kwargs.get("node_id"),
             o_connection=kwargs.get("o_connection"),
-            variables=kwargs.get("variables"),
+            **variables_fields,
+            sample_rate=sample_rate,
         )
     elif event_type == MenuflowNodeEvents.NodeInputTimeout:
         event = NodeInputTimeout(
@@ -51,7 +73,8 @@ async def send_node_event(
             sender=kwargs.get("sender"),
             node_id=kwargs.get("node_id"),
             o_connection=kwargs.get("o_connection"),
-            variables=kwargs.get("variables"),
+            **variables_fields,
+            sample_rate=sample_rate,
         )
 
     await event.send(config=config)
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from contextlib import suppress
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from mautrix.util.logging import TraceLogger
+from nats.js.client import JetStreamContext
+
+from ..config import Config
+from ..db.event_storage import sqlite_db
+from ..utils.util import Util
+from .event_codec import EventCodec
+from .event_file_sink import EventFileSink
+from .nats_publisher import NatsPublisher
+
+if TYPE_CHECKING:
+    from .base_event import BaseEvent
+
+log: TraceLogger = logging.getLogger("report.pipeline")
+
+
+class EventPipeline:
+    """In-process queue of events.
+
+    The nodes only put their events in the queue, a background task takes them
+    by batches and publishes them, so the execution of a node does not wait for
+    the event bus.
+    """
+
+    config: Config = None
+    queue: asyncio.Queue = None
+    _task: asyncio.Task = None
+    # The events taken from the queue by the background task that are not being published yet
+    _batch: List[Tuple[BaseEvent, bytes]] = []
+    # The batch that is being published, it is not interrupted when the pipeline stops
+    _flush_task: asyncio.Task = None
+    stats: Dict[str, int] = {
+        "published": 0,
+        "dropped": 0,
+        "spilled": 0,
+        "batches": 0,
+    }
+    replay_stats: Dict[str, int | bool] = {
+        "running": False,
+        "pages": 0,
+        "replayed": 0,
+        "failed": 0,
+        "last_id": 0,
+    }
+
+    @classmethod
+    def init_cls(cls, config: Config) -> None:
+        cls.config = config
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._task:
+            return
+
+        log.info("Starting event pipeline")
+        cls.queue = asyncio.Queue(maxsize=cls.config["events.queue.max_size"])
+        cls._task = asyncio.create_task(cls._run(), name="event_pipeline")
+
+    @classmethod
+    async def stop(cls) -> None:
+        """It stops the background task and publishes the events that are still in the queue,
+        after the batch that was being published.
+        """
+        if not cls._task:
+            return
+
+        log.info("Stopping event pipeline")
+        task, cls._task = cls._task, None
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+        if cls._flush_task:
+            await cls._flush_task
+            cls._flush_task = None
+
+        batch, cls._batch = cls._batch, []
+        while not cls.queue.empty():
+            batch.append(cls.queue.get_nowait())
+
+        if batch:
+            await cls.flush(batch)
+
+    @classmethod
+    def get_stats(cls) -> Dict:
+        return {
+            **cls.stats,
+            "queued": cls.queue.qsize() if cls.queue else 0,
+            "backlog": sqlite_db.backlog if sqlite_db else 0,
+            "replay": dict(cls.replay_stats),
+        }
+
+    @classmethod
+    async def put(cls, event: BaseEvent) -> None:
+        """It adds an event to the queue, if the pipeline is not running
+        the event is published immediately.
+
+        Parameters
+        ----------
+        event : BaseEvent
+            The event to publish.
+
+        """
+        # The event is serialized now, because the variables of the room
+        # can change before the event is published
+        serialized_event = EventCodec.dumps(event.serialize())
+
+        if not cls._task:
+            await cls.flush([(event, serialized_event)])
+            return
+
+        try:
+            cls.queue.put_nowait((event, serialized_event))
+        except asyncio.QueueFull:
+            if cls.config["events.queue.full_policy"] == "spill":
+                cls.stats["spilled"] += 1
+                await sqlite_db.insert_events(cls.to_stored_events([event], [serialized_event]))
+            else:
+                cls.stats["dropped"] += 1
+                log.warning(f"Event queue is full, event {event.event} has been dropped")
+
+    @classmethod
+    async def _run(cls) -> None:
+        loop = asyncio.get_running_loop()
+        batch_size: int = cls.config["events.queue.batch_size"]
+        flush_interval: float = cls.config["events.queue.flush_interval"]
+
+        while True:
+            batch = cls._batch = [await cls.queue.get()]
+            deadline = loop.time() + flush_interval
+
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(cls.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            cls._batch = []
+            cls._flush_task = asyncio.create_task(cls._flush_batch(batch))
+            await asyncio.shield(cls._flush_task)
+            cls._flush_task = None
+
+    @classmethod
+    async def _flush_batch(cls, batch: List[Tuple[BaseEvent, bytes]]) -> None:
+        try:
+            await cls.flush(batch)
+        except Exception as e:
+            log.exception(f"Error publishing a batch of {len(batch)} events: {e}")
+
+    @classmethod
+    async def flush(cls, batch: List[Tuple[BaseEvent, bytes]]) -> None:
+        """It sends a batch of events to the configured destinations.
+
+        Parameters
+        ----------
+        batch : List[Tuple[BaseEvent, bytes]]
+            The events to send with their serialized form.
+
+        """
+        events = [event for event, _ in batch]
+        serialized_events = [serialized_event for _, serialized_event in batch]
+        cls.stats["batches"] += 1
+
+        if cls.config["nats.enabled"]:
+            await cls.send_to_nats(events, serialized_events)
+
+        if cls.config["events.write_to_file"]:
+            await cls.write_to_file(serialized_events)
+
+    @classmethod
+    async def write_to_file(cls, serialized_events: List[bytes]) -> None:
+        # The file is always written as JSON text
+        if EventCodec.serializer == "json":
+            events = [serialized_event.decode() for serialized_event in serialized_events]
+        else:
+            events = [
+                json.dumps(EventCodec.loads(serialized_event, EventCodec.content_type()))
+                for serialized_event in serialized_events
+            ]
+
+        await EventFileSink.write(events)
+
+    @classmethod
+    def to_stored_events(
+        cls, events: List[BaseEvent], serialized_events: List[bytes]
+    ) -> List[Tuple[str, bytes, str, Optional[str]]]:
+        stored_events = []
+        for event, serialized_event in zip(events, serialized_events):
+            payload, content_encoding = EventCodec.compress(serialized_event)
+            stored_events.append(
+                (str(event.event_type), payload, EventCodec.content_type(), content_encoding)
+            )
+
+        return stored_events
+
+    @classmethod
+    async def publish(
+        cls, jetstream: JetStreamContext, events: List[BaseEvent], serialized_events: List[bytes]
+    ) -> List[int]:
+        """It publishes the events to NATS, if `events.batch_publish` is enabled the events
+        with the same subject are published in a single message (see `EventCodec.join`)
+        that is compressed as a whole.
+
+        The messages are published concurrently, up to `nats.max_pending_acks`
+        of them waiting for the acknowledgement of JetStream at the same time.
+
+        Returns
+        -------
+            The positions of the events that could not be published.
+
+        """
+        subject = cls.config["nats.subject"]
+        content_type = EventCodec.content_type()
+        # Each message with the positions of its events
+        messages: List[Tuple[str, bytes, Dict[str, str], List[int]]] = []
+
+        if not cls.config["events.batch_publish"]:
+            for position, (event, serialized_event) in enumerate(zip(events, serialized_events)):
+                payload, content_encoding = EventCodec.compress(serialized_event)
+                messages.append(
+                    (
+                        f"{subject}.{event.event_type}",
+                        payload,
+                        EventCodec.headers(content_type, content_encoding),
+                        [position],
+                    )
+                )
+        else:
+            positions_by_subject: Dict[str, List[int]] = {}
+            for position, event in enumerate(events):
+                positions_by_subject.setdefault(f"{subject}.{event.event_type}", []).append(
+                    position
+                )
+
+            for event_subject, positions in positions_by_subject.items():
+                payload, content_encoding = EventCodec.compress(
+                    EventCodec.join([serialized_events[position] for position in positions])
+                )
+                headers = {
+                    **EventCodec.headers(content_type, content_encoding),
+                    "Menuflow-Batch-Size": str(len(positions)),
+                }
+                messages.append((event_subject, payload, headers, positions))
+
+        semaphore = asyncio.Semaphore(cls.config["nats.max_pending_acks"])
+
+        async def publish_message(message_subject: str, payload: bytes, headers: Dict) -> None:
+            async with semaphore:
+                await jetstream.publish(
+                    subject=message_subject, payload=payload, headers=headers or None
+                )
+
+        results = await asyncio.gather(
+            *[
+                publish_message(message_subject, payload, headers)
+                for message_subject, payload, headers, _ in messages
+            ],
+            return_exceptions=True,
+        )
+
+        failed_positions = []
+        for (message_subject, _, _, positions), result in zip(messages, results):
+            if isinstance(result, Exception):
+                log.error(
+                    f"Error publishing {len(positions)} events to {message_subject}: {result}"
+                )
+                failed_positions.extend(positions)
+
+        return sorted(failed_positions)
+
+    @classmethod
+    async def _publish_stored_event(
+        cls, jetstream: JetStreamContext, semaphore: asyncio.Semaphore, event: Dict
+    ) -> bool:
+        async with semaphore:
+            try:
+                payload = event.get("event")
+                if isinstance(payload, str):
+                    payload = payload.encode()
+
+                # The events saved before the event_type column existed are JSON text
+                event_type = event.get("event_type") or json.loads(payload).get("event_type")
+                await jetstream.publish(
+                    subject=f"{cls.config['nats.subject']}.{event_type}",
+                    payload=payload,
+                    headers=EventCodec.headers(
+                        event.get("content_type"), event.get("content_encoding")
+                    )
+                    or None,
+                )
+            except Exception as e:
+                log.error(f"Error publishing event {event.get('id')} to NATS: {e}")
+                return False
+
+        return True
+
+    @classmethod
+    async def publish_from_storage(cls, jetstream: JetStreamContext) -> None:
+        """It publishes the events saved in the sqlite database by pages.
+
+        The events of a page are published concurrently (up to `events.replay.concurrency`
+        waiting for the acknowledgement) and marked or deleted with a single commit.
+        The replay stops at the first page with a failed event, the remaining events are
+        published again the next time.
+        """
+        page_size: int = cls.config["events.replay.page_size"]
+        rate: float = cls.config["events.replay.rate"]
+        semaphore = asyncio.Semaphore(cls.config["events.replay.concurrency"])
+        loop = asyncio.get_running_loop()
+
+        cls.replay_stats["running"] = True
+        started_at = loop.time()
+        replayed = 0
+        after_id = 0
+
+        try:
+            while True:
+                events = await sqlite_db.get_events(after_id=after_id, limit=page_size)
+                if not events:
+                    break
+
+                results = await asyncio.gather(
+                    *[cls._publish_stored_event(jetstream, semaphore, event) for event in events]
+                )
+                published_ids = [
+                    event.get("id") for event, published in zip(events, results) if published
+                ]
+
+                if cls.config["events.sqlite_action"] == "all":
+                    await sqlite_db.update_events(published_ids, True)
+                else:
+                    await sqlite_db.delete_events(published_ids)
+
+                after_id = events[-1].get("id")
+                replayed += len(published_ids)
+                cls.replay_stats["pages"] += 1
+                cls.replay_stats["replayed"] += len(published_ids)
+                cls.replay_stats["failed"] += len(events) - len(published_ids)
+                cls.replay_stats["last_id"] = after_id
+
+                if len(published_ids) < len(events):
+                    break
+
+                # Keeps the replay under the configured number of events per second
+                if rate:
+                    delay = replayed / rate - (loop.time() - started_at)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        finally:
+            cls.replay_stats["running"] = False
+            log.info(f"{replayed} events replayed from sqlite, {sqlite_db.backlog} pending")
+
+    @classmethod
+    async def send_to_nats(cls, events: List[BaseEvent], serialized_events: List[bytes]) -> None:
+        nats, jetstream = await NatsPublisher.get_connection()
+
+        # The events are kept in order, if there are events pending to be published
+        # the new ones go to the buffer after them
+        if not nats or not nats.is_connected or sqlite_db.backlog:
+            log.error("NATS is not connected, saving events to sqlite")
+            await sqlite_db.insert_events(cls.to_stored_events(events, serialized_events))
+
+            if nats and nats.is_connected and not Util.get_tasks_by_name("publish_to_storage"):
+                log.error("Creating task to publish to storage")
+                Util.create_task(
+                    cls.publish_from_storage(jetstream),
+                    name="publish_to_storage",
+                )
+            return
+
+        failed_positions = set(await cls.publish(jetstream, events, serialized_events))
+        if failed_positions:
+            log.error(f"{len(failed_positions)} events were not published, saving them to sqlite")
+            await sqlite_db.insert_events(
+                cls.to_stored_events(
+                    [events[position] for position in sorted(failed_positions)],
+                    [serialized_events[position] for position in sorted(failed_positions)],
+                )
+            )
+
+        published = [
+            position for position in range(len(events)) if position not in failed_positions
+        ]
+        cls.stats["published"] += len(published)
+        if cls.config["events.sqlite_action"] == "all":
+            await sqlite_db.insert_events(
+                cls.to_stored_events(
+                    [events[position] for position in published],
+                    [serialized_events[position] for position in published],
+                ),
+                True,
+            )
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from attr import dataclass, ib
+from mautrix.util.logging import TraceLogger
+
+from ..config import Config
+from .event_types import MenuflowEventTypes, MenuflowNodeEvents
+from .node_events import NodeAggregate
+
+log: TraceLogger = logging.getLogger("report.policy")
+
+
+class PolicyAction:
+    SEND = "send"
+    DROP = "drop"
+    SAMPLE = "sample"
+    AGGREGATE = "aggregate"
+
+
+@dataclass
+class PolicyRule:
+    action: str = ib(default=PolicyAction.SEND)
+    event: Optional[str] = ib(default=None)
+    node_type: Optional[str] = ib(default=None)
+    node_id: Optional[str] = ib(default=None)
+    room: Optional[Pattern] = ib(default=None)
+    rate: float = ib(default=1.0)
+
+    def match_node(self, event: str, node_type: Optional[str], node_id: Optional[str]) -> bool:
+        return (
+            (self.event is None or self.event == event)
+            and (self.node_type is None or self.node_type == node_type)
+            and (self.node_id is None or self.node_id == node_id)
+        )
+
+
+class EventPolicy:
+    """Decides what to do with the events of the nodes, using the rules of `events.policies`.
+
+    The first rule that matches the event is applied:
+    - send: the event is sent.
+    - drop: the event is not sent.
+    - sample: only a fraction (`rate`) of the events is sent.
+    - aggregate: the events are counted and a `NodeAggregate` event with the counters
+      is sent every `events.aggregate_interval` seconds.
+
+    The rules are checked before the event is built, the ones that can match a node
+    are cached by event and node, so only the room patterns are checked for every event.
+    """
+
+    config: Config = None
+    rules: List[PolicyRule] = []
+    _rules_by_node: Dict[Tuple[str, Optional[str], Optional[str]], List[PolicyRule]] = {}
+    # Counters of the aggregated events by event, node type, node id and output connection
+    counters: Dict[Tuple[str, Optional[str], Optional[str], Optional[str]], int] = {}
+    _interval_start: float = 0
+    _task: asyncio.Task = None
+
+    @classmethod
+    def init_cls(cls, config: Config) -> None:
+        cls.config = config
+        cls.rules = [cls.compile_rule(rule) for rule in config["events.policies"] or []]
+        cls._rules_by_node = {}
+
+    @classmethod
+    def compile_rule(cls, rule: Dict) -> PolicyRule:
+        action = rule.get("action", PolicyAction.SEND)
+        if action not in (
+            PolicyAction.SEND,
+            PolicyAction.DROP,
+            PolicyAction.SAMPLE,
+            PolicyAction.AGGREGATE,
+        ):
+            raise ValueError(f"Invalid event policy action: {action}")
+
+        return PolicyRule(
+            action=action,
+            event=rule.get("event"),
+            node_type=rule.get("node_type"),
+            node_id=rule.get("node_id"),
+            room=re.compile(rule["room"]) if rule.get("room") else None,
+            rate=float(rule.get("rate", 1.0)),
+        )
+
+    @classmethod
+    def rules_for_node(
+        cls, event: str, node_type: Optional[str], node_id: Optional[str]
+    ) -> List[PolicyRule]:
+        key = (event, node_type, node_id)
+        rules = cls._rules_by_node.get(key)
+        if rules is None:
+            rules = cls._rules_by_node[key] = [
+                rule for rule in cls.rules if rule.match_node(event, node_type, node_id)
+            ]
+
+        return rules
+
+    @classmethod
+    def evaluate(
+        cls,
+        event: MenuflowNodeEvents,
+        room_id: str,
+        node_type: Optional[str] = None,
+        node_id: Optional[str] = None,
+        o_connection: Optional[str] = None,
+    ) -> Tuple[bool, Optional[float]]:
+        """It applies the policies to an event of a node.
+
+        Parameters
+        ----------
+        event : MenuflowNodeEvents
+            The event.
+        room_id : str
+            The room of the event.
+        node_type : Optional[str]
+            The type of the node, the NodeInputData and NodeInputTimeout events do not have it.
+        node_id : Optional[str]
+            The id of the node.
+        o_connection : Optional[str]
+            The output connection of the node.
+
+        Returns
+        -------
+            A tuple with a boolean that indicates if the event must be sent
+            and the sample rate of the event, None if it was not sampled.
+
+        """
+        if not cls.rules:
+            return True, None
+
+        event = str(event)
+        node_type = str(node_type) if node_type else None
+        for rule in cls.rules_for_node(event, node_type, node_id):
+            if rule.room and not rule.room.search(room_id or ""):
+                continue
+
+            if rule.action == PolicyAction.DROP:
+                return False, None
+            elif rule.action == PolicyAction.SAMPLE:
+                return random.random() < rule.rate, rule.rate
+            elif rule.action == PolicyAction.AGGREGATE:
+                key = (event, node_type, node_id, o_connection)
+                cls.counters[key] = cls.counters.get(key, 0) + 1
+                return False, None
+
+            return True, None
+
+        return True, None
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._task or not any(rule.action == PolicyAction.AGGREGATE for rule in cls.rules):
+            return
+
+        cls._interval_start = datetime.utcnow().timestamp()
+        cls._task = asyncio.create_task(cls._run(), name="event_policy_aggregates")
+
+    @classmethod
+    async def stop(cls) -> None:
+        if not cls._task:
+            return
+
+        cls._task.cancel()
+        cls._task = None
+        await cls.send_aggregates()
+
+    @classmethod
+    async def _run(cls) -> None:
+        while True:
+            await asyncio.sleep(cls.config["events.aggregate_interval"])
+            try:
+                await cls.send_aggregates()
+            except Exception as e:
+                log.exception(f"Error sending the aggregated events: {e}")
+
+    @classmethod
+    async def send_aggregates(cls) -> None:
+        counters, cls.counters = cls.counters, {}
+        interval_start = cls._interval_start
+        interval_end = cls._interval_start = datetime.utcnow().timestamp()
+
+        for (event, node_type, node_id, o_connection), count in counters.items():
+            await NodeAggregate(
+                event_type=MenuflowEventTypes.NODE,
+                event=MenuflowNodeEvents.NodeAggregate,
+                timestamp=interval_end,
+                sender=None,
+                aggregated_event=event,
+                node_type=node_type,
+                node_id=node_id,
+                o_connection=o_connection,
+                count=count,
+                interval_start=interval_start,
+                interval_end=interval_end,
+            ).send(config=cls.config)
@@ -9,3 +9,4 @@ class MenuflowNodeEvents(SerializableEnum):
     NodeEntry = "NodeEntry"
     NodeInputData = "NodeInputData"
     NodeInputTimeout = "NodeInputTimeout"
+    NodeAggregate = "NodeAggregate"
@@ -1,9 +1,11 @@
+import asyncio
 import logging
+from contextlib import suppress
 
 from mautrix.util.logging import TraceLogger
-from nats import connect as nats_connect
 from nats.aio.client import Client as NATSClient
 from nats.js.client import JetStreamContext
+from nats.js.errors import NotFoundError
 
 from ..config import Config
 
@@ -11,8 +13,19 @@ log: TraceLogger = logging.getLogger("menuflow.nats")
 
 
 class NatsPublisher:
+    """Keeps a single NATS connection for the whole process.
+
+    The client reconnects by itself when the connection is lost, meanwhile
+    `is_connected` is false and the events are saved in the sqlite buffer.
+    The stream is created or updated only once, after the first connection.
+    """
+
     _nats_conn: NATSClient = None
     _jetstream_conn: JetStreamContext = None
+    _lock: asyncio.Lock = None
+    _stream_ready: bool = False
+    # Time of the event loop when a new connection can be attempted after a failure
+    _retry_at: float = 0
     config: Config = None
 
     @classmethod
@@ -21,30 +34,107 @@ class NatsPublisher:
 
     @classmethod
     async def get_connection(cls) -> tuple[NATSClient, JetStreamContext]:
-        if not cls._nats_conn or cls._nats_conn and cls._nats_conn.is_closed:
+        if cls._nats_conn and not cls._nats_conn.is_closed:
+            return cls._nats_conn, cls._jetstream_conn
+
+        if not cls._lock:
+            cls._lock = asyncio.Lock()
+
+        loop = asyncio.get_running_loop()
+        async with cls._lock:
+            if cls._nats_conn and not cls._nats_conn.is_closed:
+                return cls._nats_conn, cls._jetstream_conn
+
+            # Avoids a new connection attempt on every event while NATS is down
+            if loop.time() < cls._retry_at:
+                return None, None
+
             try:
                 cls._nats_conn, cls._jetstream_conn = await cls.nats_jetstream_connection()
             except Exception as e:
                 log.error(f"Error connecting to NATS: {e}")
+                cls._retry_at = loop.time() + cls.config["nats.reconnect_time_wait"]
                 return None, None
 
         return cls._nats_conn, cls._jetstream_conn
 
     @classmethod
-    async def nats_jetstream_connection(cls) -> JetStreamContext:
+    async def nats_jetstream_connection(cls) -> tuple[NATSClient, JetStreamContext]:
         log.info("Connecting to NATS JetStream")
-        nc: NATSClient = await nats_connect(
-            cls.config["nats.address"],
-            allow_reconnect=False,
-            max_reconnect_attempts=1,
-            user=cls.config["nats.user"],
-            password=cls.config["nats.password"],
-        )
+        nc = NATSClient()
+        try:
+            # The first connection is attempted only once, otherwise the client retries it
+            # forever while NATS is down and the publisher waits for it, `_retry_at` spaces
+            # the attempts instead. The reconnections are enabled once it is connected.
+            await nc.connect(
+                cls.config["nats.address"],
+                allow_reconnect=False,
+                max_reconnect_attempts=1,
+                reconnect_time_wait=0,
+                user=cls.config["nats.user"],
+                password=cls.config["nats.password"],
+                error_cb=cls._on_error,
+                disconnected_cb=cls._on_disconnected,
+                reconnected_cb=cls._on_reconnected,
+                closed_cb=cls._on_closed,
+            )
+        except Exception:
+            # The client may not have a transport to close
+            with suppress(Exception):
+                await nc.close()
+            raise
+
+        nc.options["allow_reconnect"] = True
+        nc.options["max_reconnect_attempts"] = cls.config["nats.max_reconnect_attempts"]
+        nc.options["reconnect_time_wait"] = cls.config["nats.reconnect_time_wait"]
         js = nc.jetstream()
-        subject = f"{cls.config['nats.subject']}.*"
-        await js.add_stream(name=cls.config["nats.stream"], subjects=[subject])
+        if not cls._stream_ready:
+            try:
+                await cls.setup_stream(js)
+            except Exception:
+                await nc.close()
+                raise
+
         return nc, js
 
+    @classmethod
+    async def setup_stream(cls, js: JetStreamContext) -> None:
+        """It creates the stream, or adds the subject of menuflow
+        to it if it already exists with other subjects.
+        """
+        name = cls.config["nats.stream"]
+        subject = f"{cls.config['nats.subject']}.*"
+
+        try:
+            stream_info = await js.stream_info(name)
+        except NotFoundError:
+            log.info(f"Creating NATS stream {name}")
+            await js.add_stream(name=name, subjects=[subject])
+        else:
+            subjects = stream_info.config.subjects or []
+            if subject not in subjects:
+                log.info(f"Adding subject {subject} to NATS stream {name}")
+                stream_info.config.subjects = [*subjects, subject]
+                await js.update_stream(stream_info.config)
+
+        cls._stream_ready = True
+
+    @classmethod
+    async def _on_error(cls, e: Exception) -> None:
+        log.error(f"NATS error: {e}")
+
+    @classmethod
+    async def _on_disconnected(cls) -> None:
+        log.warning("Disconnected from NATS, the events will be saved in sqlite")
+
+    @classmethod
+    async def _on_reconnected(cls) -> None:
+        log.info("Reconnected to NATS")
+
+    @classmethod
+    async def _on_closed(cls) -> None:
+        log.info("NATS connection closed")
+
     @classmethod
     async def close_connection(cls):
         if cls._nats_conn:
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List
 
 from attr import dataclass, ib
 
@@ -14,6 +14,12 @@ class NodeEntry(BaseEvent):
     node_id: str = ib(factory=str)
     o_connection: str = ib(default=None)
     variables: Dict = ib(factory=dict)
+    # Only used with `events.variables_format: delta`
+    removed_variables: List[List[str]] = ib(default=None)
+    snapshot: bool = ib(default=None)
+    sequence: int = ib(default=None)
+    # Only used when the event is sampled by a policy
+    sample_rate: float = ib(default=None)
 
 
 @dataclass
@@ -22,6 +28,12 @@ class NodeInputData(BaseEvent):
     node_id: str = ib(factory=str)
     o_connection: str = ib(factory=str)
     variables: Dict = ib(factory=dict)
+    # Only used with `events.variables_format: delta`
+    removed_variables: List[List[str]] = ib(default=None)
+    snapshot: bool = ib(default=None)
+    sequence: int = ib(default=None)
+    # Only used when the event is sampled by a policy
+    sample_rate: float = ib(default=None)
 
 
 @dataclass
@@ -30,3 +42,20 @@ class NodeInputTimeout(BaseEvent):
     node_id: str = ib(factory=str)
     o_connection: str = ib(factory=str)
     variables: Dict = ib(factory=dict)
+    # Only used with `events.variables_format: delta`
+    removed_variables: List[List[str]] = ib(default=None)
+    snapshot: bool = ib(default=None)
+    sequence: int = ib(default=None)
+    # Only used when the event is sampled by a policy
+    sample_rate: float = ib(default=None)
+
+
+@dataclass
+class NodeAggregate(BaseEvent):
+    aggregated_event: str = ib(factory=str)
+    node_type: str = ib(default=None)
+    node_id: str = ib(default=None)
+    o_connection: str = ib(default=None)
+    count: int = ib(factory=int)
+    interval_start: float = ib(factory=float)
+    interval_end: float = ib(factory=float)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Dict, List, Tuple
+
+from attr import dataclass, ib
+
+
+@dataclass
+class RoomVariablesState:
+    variables: Dict = ib(factory=dict)
+    sequence: int = ib(default=0)
+
+
+class VariablesDelta:
+    """Keeps the variables of the last event sent for each room, so the next events
+    only carry the variables that changed since then.
+
+    The variables of an event have two levels, the scope (room, route, flow...) and the
+    variables of the scope. A variable removed from a scope is sent in `removed_variables`
+    as a path, `["room", "name"]`, and a removed scope as `["route"]`.
+
+    Every `snapshot_interval` events of a room the full variables are sent again,
+    with `snapshot` set to true, so a consumer that lost an event can recover.
+    """
+
+    # Rooms that are not in the list get a snapshot in their next event
+    max_rooms: int = 10000
+    states: OrderedDict[str, RoomVariablesState] = OrderedDict()
+
+    @classmethod
+    def diff(cls, previous: Dict, current: Dict) -> Tuple[Dict, List[List[str]]]:
+        """It compares the variables of two events.
+
+        Parameters
+        ----------
+        previous : Dict
+            The variables of the previous event.
+        current : Dict
+            The variables of the new event.
+
+        Returns
+        -------
+            A tuple with the variables that changed or were added
+            and the paths of the variables that were removed.
+
+        """
+        changed = {}
+        removed = [[scope] for scope in previous if scope not in current]
+
+        for scope, value in current.items():
+            previous_value = previous.get(scope)
+            if scope not in previous or not (
+                isinstance(value, dict) and isinstance(previous_value, dict)
+            ):
+                if scope not in previous or value != previous_value:
+                    changed[scope] = value
+                continue
+
+            changed_scope = {
+                key: scope_value
+                for key, scope_value in value.items()
+                if key not in previous_value or previous_value[key] != scope_value
+            }
+            if changed_scope:
+                changed[scope] = changed_scope
+
+            removed.extend([scope, key] for key in previous_value if key not in value)
+
+        return changed, removed
+
+    @classmethod
+    def build(cls, room_id: str, variables: Dict, snapshot_interval: int) -> Dict:
+        """It builds the variables fields of the next event of a room.
+
+        Parameters
+        ----------
+        room_id : str
+            The room of the event.
+        variables : Dict
+            All the variables of the room.
+        snapshot_interval : int
+            Number of events between full snapshots.
+
+        Returns
+        -------
+            A dict with the fields `variables`, `removed_variables`, `snapshot` and `sequence`.
+
+        """
+        state = cls.states.pop(room_id, None)
+        if state is None:
+            if len(cls.states) >= cls.max_rooms:
+                cls.states.popitem(last=False)
+            state = RoomVariablesState()
+
+        # The room goes to the end of the list, the first room is the least recently used
+        cls.states[room_id] = state
+        state.sequence += 1
+
+        # The variables of the room are modified in place, a copy is needed to compare them
+        if state.sequence == 1 or (state.sequence - 1) % snapshot_interval == 0:
+            fields = {
+                "variables": variables,
+                "removed_variables": None,
+                "snapshot": True,
+            }
+            state.variables = deepcopy(variables)
+        else:
+            changed, removed = cls.diff(state.variables, variables)
+            fields = {
+                "variables": changed,
+                "removed_variables": removed or None,
+                "snapshot": False,
+            }
+            cls.update_copy(state.variables, variables, changed, removed)
+
+        return {**fields, "sequence": state.sequence}
+
+    @classmethod
+    def update_copy(
+        cls, previous: Dict, current: Dict, changed: Dict, removed: List[List[str]]
+    ) -> None:
+        """It updates the copy of the variables of the last event with a delta,
+        only the variables that changed are copied.
+
+        Parameters
+        ----------
+        previous : Dict
+            The copy of the variables of the last event, it is updated in place.
+        current : Dict
+            The variables of the new event.
+        changed : Dict
+            The variables that changed or were added, as returned by `diff`.
+        removed : List[List[str]]
+            The paths of the variables that were removed, as returned by `diff`.
+
+        """
+        for scope, value in changed.items():
+            if isinstance(current[scope], dict) and isinstance(previous.get(scope), dict):
+                previous[scope].update(deepcopy(value))
+            else:
+                previous[scope] = deepcopy(value)
+
+        for path in removed:
+            if len(path) == 1:
+                previous.pop(path[0], None)
+            else:
+                previous[path[0]].pop(path[1], None)
+
+    @classmethod
+    def forget(cls, room_id: str) -> None:
+        cls.states.pop(room_id, None)
+
+
+def apply_variables_delta(variables: Dict, event: Dict) -> Dict:
+    """It rebuilds the variables of a room from a serialized event, for the consumers
+    of the events sent with `events.variables_format: delta`.
+
+    Parameters
+    ----------
+    variables : Dict
+        The variables of the room after the previous event.
+    event : Dict
+        The new event.
+
+    Returns
+    -------
+        The variables of the room after the new event.
+
+    """
+    if event.get("snapshot") or "sequence" not in event:
+        return deepcopy(event.get("variables") or {})
+
+    variables = deepcopy(variables)
+    for path in event.get("removed_variables") or []:
+        if len(path) == 1:
+            variables.pop(path[0], None)
+        elif isinstance(variables.get(path[0]), dict):
+            variables[path[0]].pop(path[1], None)
+
+    for scope, value in (event.get("variables") or {}).items():
+        if isinstance(value, dict) and isinstance(variables.get(scope), dict):
+            variables[scope].update(value)
+        else:
+            variables[scope] = value
+
+    return variables
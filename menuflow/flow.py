@@ -22,13 +22,14 @@ from .nodes import (
     Location,
     Media,
     Message,
+    ParallelHTTPRequest,
     SetVars,
     Subroutine,
     Switch,
 )
 from .repository import Flow as FlowModel
 from .room import Room
-from .utils import Middlewares, Util
+from .utils import Middlewares, TimerService, Util
 
 Node = Union[
     CheckTime,
@@ -41,6 +42,7 @@ Node = Union[
     Location,
     Media,
     Message,
+    ParallelHTTPRequest,
     SetVars,
     Subroutine,
     Switch,
@@ -69,8 +71,13 @@ class Flow:
         self.nodes = self.data.nodes or []
         self.nodes_by_id: Dict[str, Dict] = {}
 
-        util = Util(config)
-        await util.cancel_tasks()
+        # Only the timers of the rooms of this client are stopped, they are bound
+        # to the nodes of the previous version of its flow
+        if flow_mxid:
+            TimerService.cancel_by_prefix(f"{flow_mxid}/")
+            Util.cancel_tasks_by_prefix(f"{flow_mxid}/")
+
+        Switch.clear_case_indexes()
 
     def _add_node_to_cache(self, node_data: Dict):
         self.nodes_by_id[node_data.get("id")] = node_data
@@ -195,6 +202,18 @@ class Flow:
             if node_data.get("middleware"):
                 middleware = self.middleware(node_data.get("middleware"), room)
                 node_initialized.middleware = middleware
+        elif node_data.get("type") == "parallel_http_request":
+            node_initialized = ParallelHTTPRequest(
+                parallel_http_request_node_data=node_data,
+                room=room,
+                default_variables=self.flow_variables,
+            )
+
+            for request in node_data.get("requests", []):
+                if request.get("middleware"):
+                    node_initialized.middlewares[request.get("id")] = self.middleware(
+                        request.get("middleware"), room
+                    )
         elif node_data.get("type") == "interactive_input":
             node_initialized = InteractiveInput(
                 interactive_input_data=node_data, room=room, default_variables=self.flow_variables
@@ -8,8 +8,6 @@ from typing import TYPE_CHECKING, Dict
 from aiohttp import ClientSession, TraceRequestEndParams, TraceRequestStartParams
 from mautrix.util.logging import TraceLogger
 
-from .room import Room
-
 if TYPE_CHECKING:
     from .middlewares import HTTPMiddleware
 
@@ -52,17 +50,8 @@ async def start_auth_middleware(
         params.headers.update(middleware.general.get("headers"))
 
     if middleware.type == "jwt":
-        room: Room = await Room.get_by_room_id(
-            room_id=context_params.get("customer_room_id"), bot_mxid=context_params.get("bot_mxid")
-        )
-        room_variables: Dict = middleware.auth.get("variables", {})
-        token_key: str = list(room_variables.keys())[0]
-
-        if not await room.get_variable(token_key):
-            await middleware.auth_request()
-
-        token = f"{middleware.token_type} {await room.get_variable(variable_id=token_key)}"
-        params.headers.update({"Authorization": token})
+        token = await middleware.get_token()
+        params.headers.update({"Authorization": f"{middleware.token_type} {token}"})
     elif middleware.type == "basic":
         log.info(f"middleware: {middleware.id} type: {middleware.type} executing ...")
         auth_str = f"{middleware.basic_auth['login']}:{middleware.basic_auth['password']}".encode(
@@ -109,4 +98,5 @@ async def end_auth_middleware(
 
         if middleware.type == "jwt":
             log.info("Token expired, refreshing token ...")
-            await middleware.auth_request()
+            authorization: str = params.headers.get("Authorization", "")
+            await middleware.refresh_token(stale_token=authorization.split(" ")[-1])
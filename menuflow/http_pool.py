@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import logging
+from types import SimpleNamespace
+from typing import Dict, List
+
+from aiohttp import ClientSession, TCPConnector, TraceConfig
+from mautrix.util.logging import TraceLogger
+from yarl import URL
+
+from .config import Config
+from .http_middlewares import end_auth_middleware, start_auth_middleware
+
+log: TraceLogger = logging.getLogger("menuflow.http_pool")
+
+
+class HTTPPool:
+    """Keeps the HTTP sessions used by menuflow, each one with its own connection pool.
+
+    - matrix: requests to the homeservers (syncs and sent messages).
+    - nodes: requests made by nodes and middlewares.
+    - upstreams: requests to a specific host configured in `menuflow.http_pools.upstreams`.
+
+    A slow upstream only uses the connections of its pool, so it can not take
+    the connections needed to deliver messages to the homeserver.
+    """
+
+    config: Config = None
+    matrix_session: ClientSession = None
+    nodes_session: ClientSession = None
+    upstream_sessions: Dict[str, ClientSession] = {}
+    stats_by_pool: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def init_cls(cls, config: Config) -> None:
+        cls.config = config
+
+    @classmethod
+    def pool_config(cls, pool: str) -> Dict:
+        if pool in ("matrix", "nodes"):
+            return cls.config[f"menuflow.http_pools.{pool}"] or {}
+
+        return (cls.config["menuflow.http_pools.upstreams"] or {}).get(pool) or {}
+
+    @classmethod
+    def _connector(cls, pool: str) -> TCPConnector:
+        pool_config: Dict = cls.pool_config(pool)
+        return TCPConnector(
+            limit=pool_config.get("limit", 100),
+            limit_per_host=pool_config.get("limit_per_host", 0),
+            keepalive_timeout=pool_config.get("keepalive_timeout", 15),
+            use_dns_cache=True,
+            ttl_dns_cache=pool_config.get("ttl_dns_cache", 10),
+        )
+
+    @classmethod
+    def _stats_trace_config(cls, pool: str) -> TraceConfig:
+        """It creates a trace config that keeps the usage counters of the pool.
+
+        `queued` is the number of requests waiting for a free connection right now,
+        a value greater than zero means that the pool is saturated.
+        The counters are kept by pool name, so they survive when the session is recreated.
+        """
+        stats = cls.stats_by_pool.setdefault(
+            pool,
+            {
+                "limit": 0,
+                "active_requests": 0,
+                "queued": 0,
+                "queued_total": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+            },
+        )
+        stats["limit"] = cls.pool_config(pool).get("limit", 100)
+
+        async def on_request_start(session: ClientSession, ctx: SimpleNamespace, params) -> None:
+            stats["active_requests"] += 1
+
+        async def on_request_done(session: ClientSession, ctx: SimpleNamespace, params) -> None:
+            stats["active_requests"] -= 1
+
+        async def on_queued_start(session: ClientSession, ctx: SimpleNamespace, params) -> None:
+            stats["queued"] += 1
+            stats["queued_total"] += 1
+            log.debug(f"HTTP pool [{pool}] is saturated, {stats['queued']} requests are waiting")
+
+        async def on_queued_end(session: ClientSession, ctx: SimpleNamespace, params) -> None:
+            stats["queued"] -= 1
+
+        async def on_connection_create(
+            session: ClientSession, ctx: SimpleNamespace, params
+        ) -> None:
+            stats["connections_created"] += 1
+
+        async def on_connection_reuse(
+            session: ClientSession, ctx: SimpleNamespace, params
+        ) -> None:
+            stats["connections_reused"] += 1
+
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_done)
+        trace_config.on_request_exception.append(on_request_done)
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_create)
+        trace_config.on_connection_reuseconn.append(on_connection_reuse)
+        return trace_config
+
+    @classmethod
+    def _create_session(cls, pool: str, trace_configs: List[TraceConfig]) -> ClientSession:
+        log.debug(f"Creating HTTP pool [{pool}]")
+        return ClientSession(
+            connector=cls._connector(pool),
+            trace_configs=[*trace_configs, cls._stats_trace_config(pool)],
+        )
+
+    @classmethod
+    def _auth_trace_config(cls) -> TraceConfig:
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(start_auth_middleware)
+        trace_config.on_request_end.append(end_auth_middleware)
+        return trace_config
+
+    @classmethod
+    def get_matrix_session(cls) -> ClientSession:
+        if not cls.matrix_session or cls.matrix_session.closed:
+            cls.matrix_session = cls._create_session("matrix", [])
+
+        return cls.matrix_session
+
+    @classmethod
+    def get_nodes_session(cls) -> ClientSession:
+        if not cls.nodes_session or cls.nodes_session.closed:
+            cls.nodes_session = cls._create_session("nodes", [cls._auth_trace_config()])
+
+        return cls.nodes_session
+
+    @classmethod
+    def get_session(cls, url: str) -> ClientSession:
+        """It returns the session that must be used to make a request to the url.
+
+        Parameters
+        ----------
+        url : str
+            The url of the request.
+
+        Returns
+        -------
+            The session of the upstream pool of the url host if it is configured,
+            otherwise the session of the nodes pool.
+
+        """
+        try:
+            host = URL(url).host
+        except (TypeError, ValueError):
+            host = None
+
+        if not host or host not in (cls.config["menuflow.http_pools.upstreams"] or {}):
+            return cls.get_nodes_session()
+
+        session = cls.upstream_sessions.get(host)
+        if not session or session.closed:
+            session = cls.upstream_sessions[host] = cls._create_session(
+                host, [cls._auth_trace_config()]
+            )
+
+        return session
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        return {pool: dict(stats) for pool, stats in cls.stats_by_pool.items()}
+
+    @classmethod
+    async def close(cls) -> None:
+        for session in [cls.matrix_session, cls.nodes_session, *cls.upstream_sessions.values()]:
+            if session and not session.closed:
+                await session.close()
+
+        cls.upstream_sessions = {}
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import re
+from json import dumps
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from attr import dataclass, ib
+from jinja2 import Template
+
+from .jinja_template import jinja_env, jinja_native_env
+
+JINJA_MARKERS = ("{{", "{%", "{#")
+# A reference to a variable without filters or expressions, e.g. {{ route.customer_name }}
+VARIABLE_REFERENCE = re.compile(r"^\{\{\s*([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+)\s*\}\}$")
+
+
+class FieldKind:
+    LITERAL = "literal"
+    VARIABLE = "variable"
+    TEMPLATE = "template"
+
+
+@dataclass
+class CompiledField:
+    kind: str
+    source: str
+    # The scope and keys of a variable reference
+    path: Optional[Tuple[str, ...]] = ib(default=None)
+    compiled_template: Optional[Template] = ib(default=None)
+    compiled_native_template: Optional[Template] = ib(default=None)
+    # The value of a literal, it is rendered only the first time
+    value: Any = ib(default=None)
+    rendered: bool = ib(default=False)
+
+    @property
+    def template(self) -> Template:
+        if self.compiled_template is None:
+            self.compiled_template = jinja_env.from_string(self.source)
+
+        return self.compiled_template
+
+    @property
+    def native_template(self) -> Template:
+        if self.compiled_native_template is None:
+            self.compiled_native_template = jinja_native_env.from_string(self.source)
+
+        return self.compiled_native_template
+
+
+class CompiledFields:
+    """Classifies the fields of the nodes by how they must be rendered.
+
+    - literal: the text has no Jinja, it is rendered once and its value is reused.
+    - variable: the text only references a variable, it is read from the variables
+      of the room without Jinja.
+    - template: any other text, it is rendered by Jinja with a template compiled only once.
+
+    The fields are cached by their text (the JSON text for lists and dicts), so the same field
+    of a node is classified once for all the rooms. The cache is bounded by `max_size`,
+    the oldest fields are removed first.
+    """
+
+    max_size: int = 10000
+    fields: Dict[str, CompiledField] = {}
+    # The fields can be rendered in worker threads, see `Base.prerender`
+    _lock: Lock = Lock()
+
+    @classmethod
+    def get(cls, data: Any) -> Optional[CompiledField]:
+        """It returns the compiled field of the data to be rendered.
+
+        Parameters
+        ----------
+        data : Any
+            The data to be rendered, a text or any value that can be serialized to JSON.
+
+        Returns
+        -------
+            The compiled field, None if the data can not be serialized.
+
+        """
+        if isinstance(data, str):
+            source = data
+        else:
+            try:
+                source = dumps(data)
+            except (TypeError, ValueError):
+                return None
+
+        field = cls.fields.get(source)
+        if field is None:
+            field = cls.compile(source)
+            with cls._lock:
+                if len(cls.fields) >= cls.max_size:
+                    del cls.fields[next(iter(cls.fields))]
+
+                cls.fields[source] = field
+
+        return field
+
+    @classmethod
+    def compile(cls, source: str) -> CompiledField:
+        if not any(marker in source for marker in JINJA_MARKERS):
+            return CompiledField(kind=FieldKind.LITERAL, source=source)
+
+        reference = VARIABLE_REFERENCE.match(source)
+        if reference:
+            return CompiledField(
+                kind=FieldKind.VARIABLE, source=source, path=tuple(reference.group(1).split("."))
+            )
+
+        return CompiledField(kind=FieldKind.TEMPLATE, source=source)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.fields = {}
@@ -3,6 +3,7 @@ from re import match
 
 from fuzzywuzzy import fuzz
 from jinja2 import BaseLoader, Environment
+from jinja2.nativetypes import NativeEnvironment
 from jinja2_ansible_filters import AnsibleCoreFiltersExtension
 from jinja2_matrix_filters import MatrixFiltersExtension
 
@@ -49,3 +50,15 @@ Validates if a text is similar to another text
 e.g
 {{ compare_ratio("Esteban Galvis", "Esteban Galvis Triana") }}
 """
+
+jinja_native_env = NativeEnvironment(
+    loader=BaseLoader,
+    extensions=[AnsibleCoreFiltersExtension, MatrixFiltersExtension],
+)
+"""
+Environment of the native render mode, the expressions are rendered to Python objects
+instead of texts, e.g. {{ route.age|int }} is rendered to an int.
+It has the same globals and filters of jinja_env.
+"""
+
+jinja_native_env.globals.update(jinja_env.globals)
@@ -19,6 +19,8 @@ from mautrix.types import (
 
 from .config import Config
 from .db.route import RouteState
+from .events import VariablesDelta
+from .http_pool import HTTPPool
 from .nodes import Base, FormInput, GPTAssistant, Input, InteractiveInput
 from .room import Room
 from .user import User
@@ -45,7 +47,7 @@ class MatrixHandler(MatrixClient):
         self.LAST_RECEIVED_MESSAGE: Dict[RoomID, datetime] = {}
         Base.init_cls(
             config=self.config,
-            session=self.api.session,
+            session=HTTPPool.get_nodes_session(),
         )
 
     def handle_sync(self, data: Dict) -> list[asyncio.Task]:
@@ -90,6 +92,7 @@ class MatrixHandler(MatrixClient):
         elif evt.content.membership == Membership.LEAVE:
             if evt.state_key == self.mxid:
                 self.unlock_room(room_id=evt.room_id)
+                VariablesDelta.forget(evt.room_id)
 
             if prev_membership == Membership.INVITE:
                 await self.handle_reject_invite(evt)
@@ -295,7 +298,7 @@ class MatrixHandler(MatrixClient):
                 return
         else:
             await node.run()
-            if room.route.state == RouteState.INVITE:
+            if room.route.state in (RouteState.INVITE, RouteState.DELAY):
                 return
 
         if room.route.state == RouteState.END:
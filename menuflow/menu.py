@@ -5,7 +5,7 @@ import logging
 from collections import defaultdict
 from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Optional, cast
 
-from aiohttp import ClientSession, TraceConfig
+from aiohttp import ClientSession
 from mautrix.client import Client, InternalEventType
 from mautrix.errors import MatrixInvalidToken
 from mautrix.types import (
@@ -25,7 +25,7 @@ from mautrix.util.logging import TraceLogger
 
 from .db import Client as DBClient
 from .flow import Flow
-from .http_middlewares import end_auth_middleware, start_auth_middleware
+from .http_pool import HTTPPool
 from .matrix import MatrixHandler
 
 if TYPE_CHECKING:
@@ -97,10 +97,7 @@ class MenuClient(DBClient):
         self._postinited = True
         self.cache[self.id] = self
         self.log = self.log.getChild(self.id)
-        trace_config = TraceConfig()
-        trace_config.on_request_start.append(start_auth_middleware)
-        trace_config.on_request_end.append(end_auth_middleware)
-        self.http_client = ClientSession(loop=self.menuflow.loop, trace_configs=[trace_config])
+        self.http_client = HTTPPool.get_matrix_session()
         self.started = False
         self.sync_ok = True
         self.flow_cls = Flow()
@@ -79,7 +79,7 @@ class ASRMiddleware(Base):
 
         try:
             timeout = ClientTimeout(total=self.config["menuflow.timeouts.middlewares"])
-            response = await self.session.request(
+            response = await self.get_session(self.url).request(
                 self.method,
                 self.url,
                 timeout=timeout,
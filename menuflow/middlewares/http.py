@@ -1,3 +1,10 @@
+from __future__ import annotations
+
+import base64
+import json
+from asyncio import Lock, Task, create_task
+from collections import defaultdict
+from time import time
 from typing import Dict, Tuple
 
 from aiohttp import ClientTimeout, ContentTypeError
@@ -10,6 +17,11 @@ from ..room import Room
 
 
 class HTTPMiddleware(Base):
+    # JWT tokens shared by all the rooms, by middleware id: (token, expiration timestamp)
+    tokens: Dict[str, Tuple[str, float]] = {}
+    _token_locks: Dict[str, Lock] = defaultdict(Lock)
+    _token_refresh_tasks: Dict[str, Task] = {}
+
     def __init__(
         self, http_middleware_data: HTTPMiddlewareModel, room: Room, default_variables: Dict
     ) -> None:
@@ -74,6 +86,88 @@ class HTTPMiddleware(Base):
     def basic_auth(self) -> Dict:
         return self.render_data(self.auth.get("basic_auth", {}))
 
+    @property
+    def token_key(self) -> str | None:
+        variables: Dict = self.auth.get("variables") or {}
+        return next(iter(variables), None)
+
+    def token_expiration(self, token: str) -> float:
+        """It returns the expiration timestamp of the token,
+        read from the `exp` claim if the token is a JWT.
+
+        Parameters
+        ----------
+        token : str
+            The token returned by the auth request.
+
+        Returns
+        -------
+            The expiration timestamp, if it can not be read from the token,
+            the token expires after `menuflow.jwt_tokens.default_ttl` seconds.
+
+        """
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            expiration = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+            if expiration:
+                return float(expiration)
+        except (AttributeError, IndexError, TypeError, ValueError):
+            pass
+
+        return time() + self.config["menuflow.jwt_tokens.default_ttl"]
+
+    async def get_token(self) -> str | None:
+        """It returns the token of the middleware shared by all the rooms.
+
+        If the token is expired it is requested again, only one auth request is made
+        at a time by middleware, the other requests wait for its result.
+        If the token is close to expire, it is refreshed in background.
+
+        Returns
+        -------
+            The token or None if it could not be obtained.
+
+        """
+        token, expiration = self.tokens.get(self.id, (None, 0))
+        now = time()
+
+        if token and expiration > now:
+            if (
+                expiration - now <= self.config["menuflow.jwt_tokens.refresh_margin"]
+                and self.id not in self._token_refresh_tasks
+            ):
+                self.log.debug(f"Token of middleware {self.id} is about to expire, refreshing")
+                task = create_task(self.refresh_token(stale_token=token))
+                self._token_refresh_tasks[self.id] = task
+                task.add_done_callback(lambda _: self._token_refresh_tasks.pop(self.id, None))
+
+            return token
+
+        await self.refresh_token(stale_token=token)
+        token, expiration = self.tokens.get(self.id, (None, 0))
+        return token if expiration > time() else None
+
+    async def refresh_token(self, stale_token: str | None = None) -> None:
+        """It requests a new token, if another request already replaced the stale token
+        while waiting for the lock, the auth request is not made again.
+
+        The stale token is kept until the new one is stored, so the requests made
+        meanwhile use it while it is valid, and it is not lost if the auth request fails.
+
+        Parameters
+        ----------
+        stale_token : str | None
+            The token that must be replaced.
+
+        """
+        async with self._token_locks[self.id]:
+            token, expiration = self.tokens.get(self.id, (None, 0))
+            if token and token != stale_token and expiration > time():
+                return
+
+            await self.auth_request()
+
     async def auth_request(self) -> Tuple[int, str]:
         """Make the auth request to refresh api token
 
@@ -102,10 +196,11 @@ class HTTPMiddleware(Base):
         if self.json:
             request_body["json"] = self.json
 
+        token_url = self.token_url
         try:
             timeout = ClientTimeout(total=self.config["menuflow.timeouts.middlewares"])
-            response = await self.session.request(
-                self.method, self.token_url, timeout=timeout, **request_body
+            response = await self.get_session(token_url).request(
+                self.method, token_url, timeout=timeout, **request_body
             )
         except Exception as e:
             self.log.exception(f"Error in middleware: {e}")
@@ -118,7 +213,7 @@ class HTTPMiddleware(Base):
                 variables[cookie] = response.cookies.output(cookie)
 
         self.log.debug(
-            f"middleware: {self.id}  type: {self.type} method: {self.method} url: {self.token_url} status: {response.status}"
+            f"middleware: {self.id}  type: {self.type} method: {self.method} url: {token_url} status: {response.status}"
         )
 
         try:
@@ -147,6 +242,10 @@ class HTTPMiddleware(Base):
 
                     break
 
+        if self.type == "jwt" and variables.get(self.token_key):
+            token = variables[self.token_key]
+            self.tokens[self.id] = (token, self.token_expiration(token))
+
         if variables:
             await self.room.set_variables(variables=variables)
 
@@ -74,7 +74,7 @@ class IRMMiddleware(Base):
 
         try:
             timeout = ClientTimeout(total=self.config["menuflow.timeouts.middlewares"])
-            response = await self.session.request(
+            response = await self.get_session(self.url).request(
                 self.method, self.url, timeout=timeout, **request_body
             )
         except Exception as e:
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 from abc import abstractmethod
-from asyncio import sleep
+from asyncio import TimeoutError, get_running_loop, sleep, wait_for
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from json import JSONDecodeError, dumps, loads
 from logging import getLogger
 from random import randrange
-from typing import Any, Dict, List
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple
 
 from aiohttp import ClientSession
+from jinja2 import Template, Undefined
+from markupsafe import escape
 from mautrix.types import MessageEventContent, RoomID
 from mautrix.util.logging import TraceLogger
 
 from ..config import Config
-from ..jinja.jinja_template import jinja_env
+from ..http_pool import HTTPPool
+from ..jinja.compiled_field import CompiledField, CompiledFields, FieldKind
 from ..room import Room
 from ..utils import Util
 
@@ -58,17 +64,34 @@ def safe_data_convertion(item: Any, _bool: bool = True, _int: bool = True) -> An
     return item
 
 
+# Results of `Base._get_variable` when the variable is not defined
+# and when it must be resolved by Jinja
+UNDEFINED = object()
+UNRESOLVED = object()
+
+
 class Base:
     log: TraceLogger = getLogger("menuflow.node")
 
     config: Config
     session: ClientSession
+    # text: the fields are rendered to texts and converted to JSON, booleans and numbers.
+    # native: the expressions are rendered to Python objects, see `render_native`.
+    render_mode: str = "text"
+    # Budgets of the templates, see menuflow.limits in the config (0 is unlimited)
+    render_time: float = 0
+    render_size: int = 0
+    render_thread_timeout: float = 0
+    _render_executor: ThreadPoolExecutor = None
 
     content: Dict
 
     def __init__(self, room: Room, default_variables: Dict) -> None:
         self.room = room
         self.default_variables = default_variables
+        # Rendered fields of the node by their text, see `_get_rendered`
+        self._rendered: Dict[str, Any] = {}
+        self._rendered_variables: Tuple[str | None, str | None] = (None, None)
 
     @property
     def id(self) -> str:
@@ -82,11 +105,42 @@ class Base:
     def init_cls(cls, config: Config, session: ClientSession):
         cls.config = config
         cls.session = session
+        cls.render_mode = config["menuflow.templates.render_mode"]
+        cls.render_time = config["menuflow.limits.render_time"]
+        cls.render_size = config["menuflow.limits.render_size"]
+        cls.render_thread_timeout = config["menuflow.limits.render_thread_timeout"]
+        cls._render_executor = ThreadPoolExecutor(
+            max_workers=config["menuflow.limits.render_threads"], thread_name_prefix="render"
+        )
+
+    @property
+    def native_rendering(self) -> bool:
+        """True if the fields of the node are rendered with native types,
+        the nodes can set their own `render_mode`
+        """
+        content = getattr(self, "content", None)
+        render_mode = content.get("render_mode") if isinstance(content, dict) else None
+        return (render_mode or self.render_mode) == "native"
 
     @abstractmethod
     async def run(self):
         pass
 
+    def get_session(self, url: str) -> ClientSession:
+        """It returns the session of the connection pool that must be used to request the url.
+
+        Parameters
+        ----------
+        url : str
+            The url of the request.
+
+        Returns
+        -------
+            A ClientSession.
+
+        """
+        return HTTPPool.get_session(url) if HTTPPool.config else self.session
+
     async def set_typing(self, room_id: RoomID):
         """It sets the typing notification for a random amount of time between 1 and 3 seconds
 
@@ -123,6 +177,11 @@ class Base:
         """It takes a dictionary or list, converts it to a string,
         and then uses Jinja to render the string
 
+        The literals are rendered only once, the references to a variable are read
+        from the variables without Jinja, see `CompiledFields`.
+        In the native render mode the data is rendered by `render_native`.
+        The node keeps the rendered fields until the variables of the room change.
+
         Parameters
         ----------
         data : Dict | List
@@ -134,33 +193,200 @@ class Base:
 
         """
 
+        field = CompiledFields.get(data)
+        if field is None:
+            if self.native_rendering:
+                return self.render_native(data)
+
+            self.log.error(f"The data {data} can not be serialized to be rendered")
+            return
+
+        if field.kind == FieldKind.LITERAL and not self.native_rendering:
+            if not field.rendered:
+                field.value = self._render_template(field.template, {})
+                field.rendered = True
+
+            return self._copy(field.value)
+
+        rendered, value = self._get_rendered(field.source)
+        if rendered:
+            return self._copy(value)
+
+        value = self._render_uncached(field, data)
+        self._rendered[field.source] = self._copy(value)
+        return value
+
+    def _render_uncached(self, field: CompiledField, data: Any) -> Any:
+        """It renders a field without keeping it in the rendered fields of the node,
+        so it can run in a worker thread, see `prerender`.
+        """
+        started = monotonic()
+        if self.native_rendering:
+            value = self.render_native(data)
+        else:
+            value = self._render_field(field, data)
+
+        elapsed = monotonic() - started
+        if self.render_time and elapsed > self.render_time:
+            self.warn_render("Slow template", field.source, elapsed=round(elapsed, 3))
+
+        return value
+
+    @property
+    def render_in_thread(self) -> bool:
+        content = getattr(self, "content", None)
+        return isinstance(content, dict) and bool(content.get("render_in_thread"))
+
+    async def prerender(self, *fields: str) -> None:
+        """It renders the templates of the fields of the node in a worker thread,
+        if the node has `render_in_thread` enabled, so heavy templates do not block
+        the event loop. The rendered fields are kept by the node (see `_get_rendered`),
+        so the properties of the node do not render them again.
+
+        A field whose render takes more than `menuflow.limits.render_thread_timeout`
+        is discarded, its value is None.
+
+        Parameters
+        ----------
+        fields : str
+            The names of the fields in the content of the node.
+
+        """
+        if not self.render_in_thread or not self._render_executor:
+            return
+
+        loop = get_running_loop()
+        for name in fields:
+            data = self.content.get(name)
+            field = CompiledFields.get(data)
+            if field is None or (field.kind == FieldKind.LITERAL and not self.native_rendering):
+                continue
+
+            rendered, _ = self._get_rendered(field.source)
+            if rendered:
+                continue
+
+            rendered_variables = self._rendered_variables
+            try:
+                value = await wait_for(
+                    loop.run_in_executor(
+                        self._render_executor, self._render_uncached, field, data
+                    ),
+                    self.render_thread_timeout or None,
+                )
+            except TimeoutError:
+                # The thread keeps running, but it does not write the rendered fields
+                self.warn_render(
+                    "Template discarded, it exceeded the render time",
+                    field.source,
+                    timeout=self.render_thread_timeout,
+                )
+                value = None
+
+            # The value is not kept if the variables changed while it was rendered
+            self._get_rendered(field.source)
+            if self._rendered_variables is rendered_variables:
+                self._rendered[field.source] = self._copy(value)
+
+    def warn_render(self, reason: str, source: str, **details) -> None:
+        """It logs a warning about a template, with the flow, the node and the field."""
+        content = getattr(self, "content", None)
+        node_id = content.get("id") if isinstance(content, dict) else getattr(content, "id", None)
+        render = {
+            "flow": self.room.bot_mxid,
+            "room_id": self.room.room_id,
+            "node_id": node_id,
+            "field": source[:100],
+            **details,
+        }
+        self.log.warning(
+            f"{reason}: {' '.join(f'{key}={value!r}' for key, value in render.items())}",
+            extra={"render": render},
+        )
+
+    def _exceeds_render_size(self, rendered: Any, source: str) -> bool:
+        if not self.render_size or not isinstance(rendered, str):
+            return False
+
+        if len(rendered) > self.render_size:
+            self.warn_render(
+                "Template discarded, its output exceeded the render size",
+                source,
+                size=len(rendered),
+                limit=self.render_size,
+            )
+            return True
+
+        return False
+
+    def _get_rendered(self, source: str) -> Tuple[bool, Any]:
+        """It gets a field already rendered by the node. The fields are rendered again
+        when the variables of the room change, the texts of the variables are replaced
+        on every change, so comparing their identity is enough.
+
+        Parameters
+        ----------
+        source : str
+            The text of the field.
+
+        Returns
+        -------
+            A tuple with a boolean that indicates if the field was rendered, and its value.
+
+        """
+        variables = (self.room.variables, self.room.route.variables if self.room.route else None)
+        if (
+            variables[0] is not self._rendered_variables[0]
+            or variables[1] is not self._rendered_variables[1]
+        ):
+            self._rendered = {}
+            self._rendered_variables = variables
+            return False, None
+
+        if source not in self._rendered:
+            return False, None
+
+        return True, self._rendered[source]
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        # The lists and dicts are copied, so the cached value is not changed by the caller
+        return deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def _render_field(self, field: CompiledField, data: Any) -> Any:
+        if field.kind == FieldKind.VARIABLE:
+            rendered = self._render_variable(field.path)
+            if rendered is not None:
+                if self._exceeds_render_size(rendered, field.source):
+                    return
+
+                return self._convert_rendered(rendered)
+
         if isinstance(data, str):
-            data_template = jinja_env.from_string(data)
+            data_template = field.template
         else:
             try:
-                data_template = jinja_env.from_string(dumps(data))
+                data_template = field.template
             except Exception as e:
                 self.log.exception(e)
                 return
 
-        copy_variables = self.default_variables | self.room.all_variables
-        clear_variables = dumps(copy_variables).replace("\\n", "ik-line-break")
+        return self._render_template(
+            data_template, self.default_variables | self.room.all_variables, field.source
+        )
+
+    def _render_template(self, data_template: Template, variables: Dict, source: str = "") -> Any:
+        clear_variables = dumps(variables).replace("\\n", "ik-line-break")
         try:
             # if save variables have a string with \n,
             # it will be replaced by ik-line-break to avoid errors when dict is dumped
             # and before return, it will be replaced by \n again to keep the original string
             temp_rendered = data_template.render(**loads(clear_variables))
             temp_rendered = temp_rendered.replace("ik-line-break", "\\n")
+            if self._exceeds_render_size(temp_rendered, source):
+                return
 
-            temp_sanitized = convert_to_bool(Util.convert_to_json(temp_rendered))
-            if isinstance(temp_sanitized, str):
-                temp_sanitized = loads(temp_rendered)
-
-            return temp_sanitized
-        except JSONDecodeError:
-            temp_rendered = data_template.render(**loads(clear_variables))
-            temp_rendered = temp_rendered.replace("ik-line-break", "\\n")
-            return convert_to_bool(temp_rendered)
+            return self._convert_rendered(temp_rendered)
         except KeyError:
             data = loads(data_template.render())
             data = convert_to_bool(data)
@@ -169,6 +395,128 @@ class Base:
             self.log.exception(e)
             return
 
+    def render_native(self, data: Any, variables: Optional[Dict] = None) -> Any:
+        """It renders the data with native types.
+
+        The texts without Jinja are returned as they are, the references to a variable
+        return the value of the variable, and the rest of the texts are rendered by the
+        native environment of Jinja, so an expression returns a Python object.
+        The lists and dicts are rendered item by item, their other values are kept.
+
+        Parameters
+        ----------
+        data : Any
+            The data to be rendered.
+        variables : Optional[Dict]
+            The variables of the room, they are taken from the room if they are not given.
+
+        Returns
+        -------
+            The rendered data.
+
+        """
+        if isinstance(data, dict):
+            variables = variables or self.default_variables | self.room.all_variables
+            return {
+                str(self.render_native(key, variables)): self.render_native(value, variables)
+                for key, value in data.items()
+            }
+        elif isinstance(data, list):
+            variables = variables or self.default_variables | self.room.all_variables
+            return [self.render_native(item, variables) for item in data]
+        elif not isinstance(data, str):
+            return data
+
+        field = CompiledFields.get(data)
+        if field.kind == FieldKind.LITERAL:
+            return data
+
+        if field.kind == FieldKind.VARIABLE:
+            value = self._get_variable(field.path)
+            if value is UNDEFINED:
+                return None
+            elif value is not UNRESOLVED:
+                return deepcopy(value) if isinstance(value, (dict, list)) else value
+
+        try:
+            rendered = field.native_template.render(
+                **(variables or self.default_variables | self.room.all_variables)
+            )
+        except Exception as e:
+            self.log.exception(e)
+            return
+
+        if isinstance(rendered, Undefined) or self._exceeds_render_size(rendered, data):
+            return
+
+        return rendered
+
+    def _get_variable(self, path: Tuple[str, ...]) -> Any:
+        """It gets the value of a variable without Jinja.
+
+        Parameters
+        ----------
+        path : Tuple[str, ...]
+            The scope and the keys of the variable.
+
+        Returns
+        -------
+            The value of the variable, UNDEFINED if it is not defined,
+            or UNRESOLVED if it must be resolved by Jinja.
+
+        """
+        scope, *keys = path
+        all_variables = self.room.all_variables
+        value = (
+            all_variables[scope] if scope in all_variables else self.default_variables.get(scope)
+        )
+        for position, key in enumerate(keys):
+            # The attributes of the dicts (e.g. items) are resolved by Jinja
+            if not isinstance(value, dict) or hasattr(value, key):
+                return UNRESOLVED
+
+            if key not in value:
+                return UNDEFINED if position == len(keys) - 1 else UNRESOLVED
+
+            value = value[key]
+
+        return value
+
+    def _render_variable(self, path: Tuple[str, ...]) -> str | None:
+        """It renders a reference to a variable as Jinja would do it, without Jinja.
+
+        Parameters
+        ----------
+        path : Tuple[str, ...]
+            The scope and the keys of the variable.
+
+        Returns
+        -------
+            The rendered text, None if the variable must be rendered by Jinja.
+
+        """
+        value = self._get_variable(path)
+        if value is UNDEFINED:
+            # An undefined variable is rendered empty
+            return ""
+
+        if value is None or isinstance(value, (bool, int, float)):
+            return str(value)
+
+        # The texts are escaped as Jinja does with autoescape
+        if isinstance(value, str) and "\\" not in value:
+            return str(escape(value)).replace("\n", "\\n").replace("ik-line-break", "\\n")
+
+    def _convert_rendered(self, rendered: str) -> Any:
+        temp_sanitized = convert_to_bool(Util.convert_to_json(rendered))
+        if isinstance(temp_sanitized, str):
+            try:
+                temp_sanitized = loads(rendered)
+            except JSONDecodeError:
+                return convert_to_bool(rendered)
+
+        return temp_sanitized
+
     async def get_o_connection(self) -> str:
         """It returns the ID of the next node to be executed.
 
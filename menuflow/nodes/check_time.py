@@ -1,23 +1,199 @@
+from __future__ import annotations
+
+import logging
 from datetime import datetime
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
 
 import pytz
+from attr import dataclass
+from mautrix.util.logging import TraceLogger
+from pytz.tzinfo import BaseTzInfo
 
 from ..events import MenuflowNodeEvents
 from ..events.event_generator import send_node_event
 from ..repository import CheckTime as CheckTimeModel
 from ..room import Room
-from ..utils import Nodes, Util
+from ..utils import Nodes
 from .switch import Switch
 
+log: TraceLogger = logging.getLogger("menuflow.check_time")
+
+MINUTES_BY_DAY = 24 * 60
+MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+WEEK_DAYS = {"mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6, "sun": 7}
+
+
+@dataclass(frozen=True)
+class CheckTimeSchedule:
+    """The schedule of a check_time node compiled to lookup tables.
+
+    - months and days_of_month are bit masks, the bit n is set if the month/day n matches.
+    - week_minutes has a byte for each minute of the week (monday 00:00 first),
+      it is 1 if the weekday and the time of the minute match.
+    - holidays has the (month, day) and (year, month, day) dates that never match.
+    """
+
+    timezone: BaseTzInfo
+    months: int
+    days_of_month: int
+    week_minutes: bytes
+    holidays: FrozenSet[Tuple[int, ...]]
+
+    def match(self, now: datetime) -> bool:
+        if self.holidays and (
+            (now.month, now.day) in self.holidays
+            or (now.year, now.month, now.day) in self.holidays
+        ):
+            return False
+
+        return bool(
+            self.months >> now.month & 1
+            and self.days_of_month >> now.day & 1
+            and self.week_minutes[
+                (now.isoweekday() - 1) * MINUTES_BY_DAY + now.hour * 60 + now.minute
+            ]
+        )
+
+    @staticmethod
+    def _ranges(values: Tuple[str, ...], names: Dict[str, int] = None) -> List[Tuple[int, int]]:
+        ranges = []
+        for value in values:
+            start, _, end = str(value).strip().lower().partition("-")
+            end = end or start
+            try:
+                if names:
+                    ranges.append((names[start.strip()], names[end.strip()]))
+                else:
+                    ranges.append((int(start), int(end)))
+            except (KeyError, ValueError):
+                log.warning(f"Invalid range {value} in check_time node, it is ignored")
+
+        return ranges
+
+    @classmethod
+    def _mask(cls, values: Tuple[str, ...], names: Dict[str, int] = None) -> int:
+        if values and values[0] == "*":
+            return -1
+
+        mask = 0
+        for start, end in cls._ranges(values, names):
+            for number in range(start, end + 1):
+                mask |= 1 << number
+
+        return mask
+
+    @classmethod
+    def _minutes(cls, time_ranges: Tuple[str, ...]) -> List[Tuple[int, int]]:
+        if time_ranges and time_ranges[0] == "*":
+            return [(0, MINUTES_BY_DAY)]
+
+        minutes = []
+        for time_range in time_ranges:
+            try:
+                time_start, time_end = time_range.split("-")
+                start = datetime.strptime(time_start.strip(), "%H:%M")
+                end = datetime.strptime(time_end.strip(), "%H:%M")
+            except ValueError:
+                log.warning(f"Invalid time range {time_range} in check_time node, it is ignored")
+                continue
+
+            # The end of the range is excluded, as it was when comparing the times
+            minutes.append((start.hour * 60 + start.minute, end.hour * 60 + end.minute))
+
+        return minutes
+
+    @classmethod
+    def _holidays(cls, holidays: Tuple[str, ...]) -> FrozenSet[Tuple[int, ...]]:
+        dates = set()
+        for holiday in holidays:
+            try:
+                dates.add(tuple(int(part) for part in str(holiday).split("-")))
+            except ValueError:
+                log.warning(f"Invalid holiday {holiday} in check_time node, it is ignored")
+
+        return frozenset(dates)
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def compile(
+        cls,
+        timezone: str,
+        time_ranges: Tuple[str, ...],
+        days_of_week: Tuple[str, ...],
+        days_of_month: Tuple[str, ...],
+        months: Tuple[str, ...],
+        holidays: Tuple[str, ...] = (),
+    ) -> CheckTimeSchedule:
+        """It compiles a schedule, the schedules are cached by their values,
+        so the same schedule is compiled only once.
+
+        Parameters
+        ----------
+        timezone : str
+            The name of the timezone.
+        time_ranges : Tuple[str, ...]
+            The time ranges, e.g. 08:00-12:00, or *.
+        days_of_week : Tuple[str, ...]
+            The ranges of weekdays, e.g. mon-fri, or *.
+        days_of_month : Tuple[str, ...]
+            The ranges of days of the month, e.g. 1-15, or *.
+        months : Tuple[str, ...]
+            The ranges of months, e.g. jan-jun, or *.
+        holidays : Tuple[str, ...]
+            The dates that never match, every year (MM-DD) or only once (YYYY-MM-DD).
+
+        Returns
+        -------
+            The compiled schedule.
+
+        """
+
+        week_minutes = bytearray(7 * MINUTES_BY_DAY)
+        day_minutes = cls._minutes(time_ranges)
+        if days_of_week and days_of_week[0] == "*":
+            week_days = [(1, 7)]
+        else:
+            week_days = cls._ranges(days_of_week, WEEK_DAYS)
+
+        for day_start, day_end in week_days:
+            for week_day in range(day_start, day_end + 1):
+                day_offset = (week_day - 1) * MINUTES_BY_DAY
+                for minute_start, minute_end in day_minutes:
+                    start = day_offset + minute_start
+                    length = max(minute_end - minute_start, 0)
+                    week_minutes[start : start + length] = b"\x01" * length
+
+        return cls(
+            timezone=pytz.timezone(timezone),
+            months=cls._mask(months, MONTHS),
+            days_of_month=cls._mask(days_of_month),
+            week_minutes=bytes(week_minutes),
+            holidays=cls._holidays(holidays),
+        )
+
 
 class CheckTime(Switch):
+    FIELDS = ("timezone", "time_ranges", "days_of_week", "days_of_month", "months", "holidays")
+
     def __init__(
         self, check_time_node_data: CheckTimeModel, room: Room, default_variables: Dict
     ) -> None:
         Switch.__init__(self, check_time_node_data, room=room, default_variables=default_variables)
         self.content = check_time_node_data
-        self.util = Util(self.config)
 
     @property
     def time_ranges(self) -> List[str]:
@@ -35,29 +211,45 @@ class CheckTime(Switch):
     def months(self) -> List[str]:
         return self.render_data(self.content.get("months", []))
 
+    @property
+    def holidays(self) -> List[str]:
+        return self.render_data(self.content.get("holidays", []))
+
     @property
     def timezone(self) -> str:
         return self.render_data(self.content.get("timezone", str))
 
+    @property
+    def is_static(self) -> bool:
+        """True if the schedule has no templates, so it is not rendered on every run"""
+        return not any(
+            "{{" in str(self.content.get(field)) or "{%" in str(self.content.get(field))
+            for field in self.FIELDS
+        )
+
+    @property
+    def schedule(self) -> CheckTimeSchedule:
+        if self.is_static:
+            values = [self.content.get(field) for field in self.FIELDS]
+        else:
+            values = [getattr(self, field) for field in self.FIELDS]
+
+        timezone, *ranges = values
+        return CheckTimeSchedule.compile(
+            timezone,
+            *(tuple(str(value) for value in field_ranges or ()) for field_ranges in ranges),
+        )
+
     async def run(self):
         """If the current month, day, weekday, and time are within the specified ranges,
-        then update the menu to the "True" case. Otherwise, update the menu to the "False" case
+        and the current date is not a holiday, then update the menu to the "True" case.
+        Otherwise, update the menu to the "False" case
 
         """
 
-        time_zone = pytz.timezone(self.timezone)
-        now = datetime.now(time_zone)
-        week_day: str = now.strftime("%a").lower()
-        day: int = now.day
-        month: int = now.month
-
-        o_connection = (
-            await self.get_case_by_id("True")
-            if self.check_month(month)
-            and self.check_month_days(day)
-            and self.check_week_day(week_day)
-            and self.check_hours(now.time())
-            else await self.get_case_by_id("False")
+        schedule = self.schedule
+        o_connection = await self.get_case_by_id(
+            "True" if schedule.match(datetime.now(schedule.timezone)) else "False"
         )
 
         await self.room.update_menu(node_id=o_connection, state=None)
@@ -73,115 +265,3 @@ class CheckTime(Switch):
             o_connection=o_connection,
             variables=self.room.all_variables | self.default_variables,
         )
-
-    def check_month(self, month: int) -> bool:
-        """If the month are set to "*" (all months), then return True.
-        Otherwise, check if the current month is within the range of months
-
-        Parameters
-        ----------
-        month
-            The month of the year, as a number from 1 to 12.
-
-        Returns
-        -------
-            A boolean value.
-
-        """
-
-        if self.months[0] == "*":
-            return True
-
-        for range_months in self.months:
-            month_start, month_end = range_months.split("-")
-            if self.util.is_within_range(
-                month, self.util.months.get(month_start), self.util.months.get(month_end)
-            ):
-                return True
-
-        return False
-
-    def check_week_day(self, week_day: str) -> bool:
-        """If the days of week are set to "*" (all days), then return True.
-        Otherwise, check if the current day is within the range of the days of week
-
-        Parameters
-        ----------
-        week_day
-            The day of the week to check.
-
-        Returns
-        -------
-            A boolean value.
-
-        """
-
-        if self.days_of_week[0] == "*":
-            return True
-
-        for week_days_range in self.days_of_week:
-            week_day_start, week_day_end = week_days_range.split("-")
-            if self.util.is_within_range(
-                self.util.week_days.get(week_day),
-                self.util.week_days.get(week_day_start),
-                self.util.week_days.get(week_day_end),
-            ):
-                return True
-
-        return False
-
-    def check_month_days(self, day: int) -> bool:
-        """If the days of the month are set to "*", then the day is valid.
-        Otherwise, check if the day is within any of the ranges specified
-
-        Parameters
-        ----------
-        day
-            The day of the month to check.
-
-        Returns
-        -------
-            A boolean value.
-
-        """
-
-        if self.days_of_month[0] == "*":
-            return True
-
-        for days_range in self.days_of_month:
-            day_start, day_end = map(int, days_range.split("-"))
-            if Util.is_within_range(day, day_start, day_end):
-                return True
-
-        return False
-
-    def check_hours(self, current_time: Any) -> bool:
-        """If the time range is "*", then return True.
-        Otherwise, for each time range, split the time range into a start and end time,
-        convert the start and end times to datetime objects,
-        and if the current time is between the start and end times, return True.
-        Otherwise, return False
-
-        Parameters
-        ----------
-        current_time : Any
-            The current time of the day.
-
-        Returns
-        -------
-            A boolean value.
-
-        """
-
-        if self.time_ranges[0] == "*":
-            return True
-
-        for time_range in self.time_ranges:
-            time_start, time_end = time_range.split("-")
-            start_hour = datetime.strptime(time_start, "%H:%M").time()
-            end_hour = datetime.strptime(time_end, "%H:%M").time()
-
-            if start_hour < current_time < end_hour:
-                return True
-
-        return False
@@ -1,8 +1,9 @@
-from asyncio import sleep
 from typing import Dict
 
+from ..db.route import RouteState
 from ..repository import Delay as DelayModel
 from ..room import Room
+from ..utils import Timer
 from .base import Base
 
 
@@ -14,7 +15,6 @@ class Delay(Base):
 
     @property
     def time(self) -> int:
-        self.log.debug(f"Waiting {self.content.get('time', 0)} seconds...")
         return self.render_data(data=self.content.get("time", 0))
 
     @property
@@ -23,7 +23,59 @@ class Delay(Base):
         return self.render_data(data=o_connection)
 
     async def run(self):
+        # The room is already waiting, the messages received meanwhile are ignored
+        if self.room.route.state == RouteState.DELAY:
+            self.log.debug(f"Room {self.room.room_id} is waiting in delay node {self.id}")
+            return
+
         self.log.debug(f"Room {self.room.room_id} enters delay node {self.id}")
-        await sleep(self.time)
-        o_connection = await self.o_connection
-        await self.room.update_menu(node_id=o_connection, state=None)
+        delay = float(self.time or 0)
+        if delay <= 0:
+            await self.room.update_menu(node_id=await self.o_connection, state=None)
+            return
+
+        # The flow is not blocked while the room waits, the timer resumes it
+        await self.room.update_menu(node_id=self.id, state=RouteState.DELAY)
+        self.log.debug(f"Waiting {delay} seconds...")
+        await self.room.schedule_timer(
+            kind="delay", node_id=self.id, delay=delay, callback=self.delay_completed
+        )
+
+    async def delay_completed(self, timer: Timer):
+        """It moves the room to the next node when the delay is over and resumes the flow.
+
+        Parameters
+        ----------
+        timer : Timer
+            The delay timer of the room.
+
+        """
+        await self.room.cancel_timer()
+        if self.room.route.state != RouteState.DELAY or self.room.route.node_id != self.id:
+            return
+
+        self.log.debug(f"Room {self.room.room_id} leaves delay node {self.id}")
+        await self.room.update_menu(node_id=await self.o_connection, state=None)
+        await self.room.matrix_client.algorithm(room=self.room)
+
+    async def resume_timer(self, data: Dict, delay: float) -> bool:
+        """It resumes the delay of the room after a restart or a reload of the flow
+
+        Parameters
+        ----------
+        data : Dict
+            The data saved with the timer.
+        delay : float
+            Seconds until the delay is over, zero or less if it is overdue.
+
+        Returns
+        -------
+            False if the room is not waiting in the node anymore.
+
+        """
+        if self.room.route.state != RouteState.DELAY:
+            return False
+
+        await self.room.resume_timer(delay, self.delay_completed)
+
+        return True
@@ -1,5 +1,5 @@
-import asyncio
 from datetime import datetime
+from functools import partial
 from typing import Any, Dict, List, Optional
 
 from markdown import markdown
@@ -10,7 +10,7 @@ from ..events import MenuflowNodeEvents
 from ..events.event_generator import send_node_event
 from ..repository import Form, FormMessage, FormMessageContent
 from ..room import Room
-from ..utils import Nodes, Util
+from ..utils import Nodes, Timer
 from .input import Input
 
 
@@ -106,7 +106,7 @@ class FormInput(Input):
                 return
 
             if self.inactivity_options:
-                await Util.cancel_task(task_name=self.room.room_id)
+                await self.room.cancel_timer()
 
             self.room.set_variable(self.variable, evt.content.get("form_data"))
             o_connection = await self.__update_menu("submitted")
@@ -148,56 +148,47 @@ class FormInput(Input):
                 variables=self.room.all_variables | self.default_variables,
             )
 
-    async def inactivity_task(self):
-        """It spawns a task to harass the client to enter information to input option
-
-        Parameters
-        ----------
-        client : MatrixClient
-            The MatrixClient object
-
-        """
-
-        self.log.debug(f"Inactivity loop starts in room: {self.room.room_id}")
-        asyncio.create_task(self.timeout_active_chats(), name=self.room.room_id)
-
-    async def timeout_active_chats(self):
+    async def timeout_active_chats(self, timer: Timer, count: int = 0):
         """It sends messages in time intervals to communicate customer
         that not entered information to input option.
 
         Parameters
         ----------
-        client : MatrixClient
-            The Matrix client object.
+        timer : Timer
+            The inactivity timer of the room.
+        count : int
+            The number of warning messages already sent.
 
         """
 
-        # wait the given time to start the task
-        await asyncio.sleep(self.chat_timeout)
-
-        count = 0
-        while True:
-            self.log.debug(f"Inactivity loop: {datetime.now()} -> {self.room.room_id}")
-            if self.attempts == count:
-                self.log.debug(f"INACTIVITY TRIES COMPLETED -> {self.room.room_id}")
-                o_connection = await self.__update_menu("timeout")
-
-                await send_node_event(
-                    config=self.room.config,
-                    send_event=self.content.get("send_event"),
-                    event_type=MenuflowNodeEvents.NodeInputTimeout,
-                    room_id=self.room.room_id,
-                    sender=self.room.matrix_client.mxid,
-                    node_id=self.id,
-                    o_connection=o_connection,
-                    variables=self.room.all_variables | self.default_variables,
-                )
-
-                await self.room.matrix_client.algorithm(room=self.room)
-                break
+        self.log.debug(f"Inactivity loop: {datetime.now()} -> {self.room.room_id}")
+        if self.attempts == count:
+            self.log.debug(f"INACTIVITY TRIES COMPLETED -> {self.room.room_id}")
+            await self.room.cancel_timer()
+            o_connection = await self.__update_menu("timeout")
 
-            await self.room.matrix_client.send_text(
-                room_id=self.room.room_id, text=self.warning_message
+            await send_node_event(
+                config=self.room.config,
+                send_event=self.content.get("send_event"),
+                event_type=MenuflowNodeEvents.NodeInputTimeout,
+                room_id=self.room.room_id,
+                sender=self.room.matrix_client.mxid,
+                node_id=self.id,
+                o_connection=o_connection,
+                variables=self.room.all_variables | self.default_variables,
             )
-            await asyncio.sleep(self.time_between_attempts)
-            count += 1
+
+            await self.room.matrix_client.algorithm(room=self.room)
+            return
+
+        await self.room.matrix_client.send_text(
+            room_id=self.room.room_id, text=self.warning_message
+        )
+        await self.room.reschedule_timer(
+            timer,
+            kind="inactivity",
+            node_id=self.id,
+            delay=self.time_between_attempts,
+            callback=partial(self.timeout_active_chats, count=count + 1),
+            data={"count": count + 1},
+        )
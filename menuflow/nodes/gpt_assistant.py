@@ -2,8 +2,9 @@ import html
 import json
 import mimetypes
 import re
-from asyncio import create_task, sleep
+from asyncio import sleep
 from datetime import datetime
+from functools import partial
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 import openai
@@ -13,14 +14,15 @@ from mautrix.util.magic import mimetype
 from ..db.route import RouteState
 from ..repository import GPTAssistant as GPTAssistantModel
 from ..room import Room
-from ..utils import Middlewares, Util
+from ..utils import Middlewares, Timer
+from .inactivity import InactivityTimer
 from .switch import Switch
 
 if TYPE_CHECKING:
     from ..middlewares import ASRMiddleware, TTMMiddleware
 
 
-class GPTAssistant(Switch):
+class GPTAssistant(InactivityTimer, Switch):
     assistant_cache: Dict[Tuple[RoomID, int], "GPTAssistant"] = {}
 
     def __init__(
@@ -184,7 +186,7 @@ class GPTAssistant(Switch):
             await self.room.set_variable(self.variable, value=response)
 
             if self.inactivity_options:
-                await Util.cancel_task(task_name=self.room.room_id)
+                await self.room.cancel_timer()
 
             output = await Switch.run(self, update_state=False, generate_event=False)
             o_connection = output if output else self.id
@@ -214,45 +216,50 @@ class GPTAssistant(Switch):
                 await self.inactivity_task()
 
     async def inactivity_task(self):
-        """It spawns a task to harass the client to enter information to input option
-
-        Parameters
-        ----------
-        client : MatrixClient
-            The MatrixClient object
-
+        """It schedules the inactivity timer of the room to harass the client
+        to enter information to input option
         """
 
         self.log.debug(f"Inactivity loop starts in room: {self.room.room_id}")
-        create_task(self.timeout_active_chats(), name=self.room.room_id)
+        await self.room.schedule_timer(
+            kind="inactivity",
+            node_id=self.id,
+            delay=self.chat_timeout,
+            callback=self.timeout_active_chats,
+            data={"count": 0},
+        )
 
-    async def timeout_active_chats(self):
+    async def timeout_active_chats(self, timer: Timer, count: int = 0):
         """It sends messages in time intervals to communicate customer
         that not entered information to input option.
 
         Parameters
         ----------
-        client : MatrixClient
-            The Matrix client object.
+        timer : Timer
+            The inactivity timer of the room.
+        count : int
+            The number of warning messages already sent.
 
         """
 
-        # wait the given time to start the task
-        await sleep(self.chat_timeout)
+        self.log.debug(f"Inactivity loop: {datetime.now()} -> {self.room.room_id}")
+        if self.attempts == count:
+            self.log.debug(f"INACTIVITY TRIES COMPLETED -> {self.room.room_id}")
+            await self.room.cancel_timer()
+            o_connection = await self.get_case_by_id("timeout")
+            await self.room.update_menu(node_id=o_connection, state=None)
 
-        count = 0
-        while True:
-            self.log.debug(f"Inactivity loop: {datetime.now()} -> {self.room.room_id}")
-            if self.attempts == count:
-                self.log.debug(f"INACTIVITY TRIES COMPLETED -> {self.room.room_id}")
-                o_connection = await self.get_case_by_id("timeout")
-                await self.room.update_menu(node_id=o_connection, state=None)
-
-                await self.room.matrix_client.algorithm(room=self.room)
-                break
+            await self.room.matrix_client.algorithm(room=self.room)
+            return
 
-            await self.room.matrix_client.send_text(
-                room_id=self.room.room_id, text=self.warning_message
-            )
-            await sleep(self.time_between_attempts)
-            count += 1
+        await self.room.matrix_client.send_text(
+            room_id=self.room.room_id, text=self.warning_message
+        )
+        await self.room.reschedule_timer(
+            timer,
+            kind="inactivity",
+            node_id=self.id,
+            delay=self.time_between_attempts,
+            callback=partial(self.timeout_active_chats, count=count + 1),
+            data={"count": count + 1},
+        )
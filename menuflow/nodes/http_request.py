@@ -1,14 +1,16 @@
-from typing import TYPE_CHECKING, Dict, List
+from __future__ import annotations
 
-from aiohttp import BasicAuth, ClientTimeout, ContentTypeError
-from jsonpath_ng import parse
+from json import JSONDecodeError, loads
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from aiohttp import BasicAuth, ClientResponse, ClientTimeout
 
 from ..db.route import RouteState
 from ..events import MenuflowNodeEvents
 from ..events.event_generator import send_node_event
 from ..repository import HTTPRequest as HTTPRequestModel
 from ..room import Room
-from ..utils import Nodes
+from ..utils import Nodes, Util
 from .switch import Switch
 
 if TYPE_CHECKING:
@@ -65,15 +67,6 @@ class HTTPRequest(Switch):
     def json(self) -> Dict:
         return self.render_data(self.content.get("json", {}))
 
-    @property
-    def context_params(self) -> Dict[str, str]:
-        return self.render_data(
-            {
-                "bot_mxid": "{{ route.bot_mxid }}",
-                "customer_room_id": "{{ route.customer_room_id }}",
-            }
-        )
-
     def prepare_request(self) -> Dict:
         request_body = {}
 
@@ -97,98 +90,182 @@ class HTTPRequest(Switch):
 
         return request_body
 
-    async def make_request(self):
-        """It makes a request to the URL specified in the node,
-        and then it does some stuff with the response
+    async def read_response(
+        self, response: ClientResponse
+    ) -> Tuple[str, Dict | List | str | None]:
+        """It reads the body of the response only once, without exceeding
+        the `menuflow.limits.http_response_size` limit.
+
+        Parameters
+        ----------
+        response : ClientResponse
+            The response of the request.
 
         Returns
         -------
-            The status code and the response text.
+            A tuple with the body as text and the body decoded as JSON,
+            or as text if the response is not a JSON.
+
         """
+        max_size: int = self.config["menuflow.limits.http_response_size"]
 
-        self.log.debug(f"Room {self.room.room_id} enters http_request node {self.id}")
+        if max_size and response.content_length and response.content_length > max_size:
+            response.close()
+            raise ValueError(
+                f"Response body of {response.content_length} bytes exceeds the limit "
+                f"of {max_size} bytes"
+            )
+
+        body = bytearray()
+        async for chunk in response.content.iter_any():
+            body.extend(chunk)
+            if max_size and len(body) > max_size:
+                response.close()
+                raise ValueError(f"Response body exceeds the limit of {max_size} bytes")
+
+        # The body was already read, so the encoding is not guessed from it
+        try:
+            response_text = body.decode(response.charset or "utf-8", errors="replace")
+        except LookupError:
+            response_text = body.decode("utf-8", errors="replace")
+
+        if "json" not in response.content_type:
+            return response_text, response_text
+
+        if not response_text.strip():
+            return response_text, None
+
+        try:
+            return response_text, loads(response_text)
+        except JSONDecodeError:
+            return response_text, response_text
+
+    def extract_variables(self, response_data: Dict | List | str) -> Dict:
+        """It extracts the variables defined in the node from the response data.
+
+        Parameters
+        ----------
+        response_data : Dict | List | str
+            The decoded body of the response.
+
+        Returns
+        -------
+            A dictionary with the variables found in the response.
+
+        """
+        variables = {}
+        http_variables: Dict = self.http_variables
+
+        if not http_variables:
+            return variables
+
+        if isinstance(response_data, dict) or isinstance(response_data, list):
+            for variable, expression in http_variables.items():
+                data_match: List = Util.jsonpath_find(expression, response_data)
+
+                if not data_match:
+                    continue
+
+                variables[variable] = data_match if len(data_match) > 1 else data_match[0]
+        elif isinstance(response_data, str):
+            for variable in http_variables:
+                try:
+                    variables[variable] = self.render_data(response_data)
+                except KeyError:
+                    pass
+
+                break
+
+        return variables
+
+    async def request(self) -> Tuple[int, str | Exception | None, Dict]:
+        """It makes the request to the URL specified in the node and extracts the variables
+        of the response, without updating the room.
 
+        Returns
+        -------
+            A tuple with the status code, the response text (or the exception raised
+            by the request) and the variables extracted from the response.
+        """
+
+        await self.prerender("url", "headers", "query_params", "cookies", "data", "json")
         request_body = self.prepare_request()
 
         if self.middleware:
             self.middleware.room = self.room
-            request_params_ctx = self.context_params
-            request_params_ctx.update({"middleware": self.middleware})
+            request_params_ctx = {"middleware": self.middleware}
         else:
             request_params_ctx = {}
 
+        url = self.url
         try:
             timeout = ClientTimeout(total=self.config["menuflow.timeouts.http_request"])
-            response = await self.session.request(
+            response = await self.get_session(url).request(
                 self.method,
-                self.url,
+                url,
                 **request_body,
                 trace_request_ctx=request_params_ctx,
                 timeout=timeout,
             )
+            response_text, response_data = await self.read_response(response)
         except Exception as e:
             self.log.exception(f"Error in http_request node: {e}")
-            o_connection = await self.get_case_by_id(id=500)
-            await self.room.update_menu(node_id=o_connection, state=None)
-            return 500, e, o_connection
+            return 500, e, {}
 
         self.log.debug(
-            f"node: {self.id} method: {self.method} url: {self.url} status: {response.status}"
+            f"node: {self.id} method: {self.method} url: {url} status: {response.status}"
         )
 
         if response.status >= 400:
-            self.log.debug(f"Response: {await response.text()}")
+            self.log.debug(f"Response: {response_text}")
 
         if response.status == 401:
-            o_connection = None
-            if not self.middleware:
-                if self.cases:
-                    o_connection = await self.get_case_by_id(id=response.status)
-
-                if o_connection:
-                    await self.room.update_menu(
-                        node_id=o_connection, state=RouteState.END if not self.cases else None
-                    )
-            return response.status, None, o_connection
+            return response.status, None, {}
 
         variables = {}
-        o_connection = None
 
         if self.cookies:
             for cookie in self.cookies:
                 variables[cookie] = response.cookies.output(cookie)
 
-        try:
-            response_data: Dict = await response.json()
-            if response_data and isinstance(response_data, dict):
-                response_data.update({"status": response.status})
-        except ContentTypeError:
-            response_data = await response.text()
+        if response_data and isinstance(response_data, dict):
+            response_data.update({"status": response.status})
 
-        if isinstance(response_data, dict) or isinstance(response_data, list):
-            if self.http_variables:
-                for variable in self.http_variables:
-                    expr = parse(self.http_variables[variable])
-                    data_match: List = [match.value for match in expr.find(response_data)]
-
-                    if not data_match:
-                        continue
-
-                    try:
-                        variables[variable] = data_match if len(data_match) > 1 else data_match[0]
-                    except KeyError:
-                        pass
-        elif isinstance(response_data, str):
-            if self.http_variables:
-                for variable in self.http_variables:
-                    try:
-                        variables[variable] = self.render_data(response_data)
-                    except KeyError:
-                        pass
+        variables.update(self.extract_variables(response_data))
+
+        return response.status, response_text, variables
+
+    async def make_request(self):
+        """It makes a request to the URL specified in the node,
+        and then it does some stuff with the response
+
+        Returns
+        -------
+            The status code and the response text.
+        """
+
+        self.log.debug(f"Room {self.room.room_id} enters http_request node {self.id}")
+
+        status, response, variables = await self.request()
+
+        if isinstance(response, Exception):
+            o_connection = await self.get_case_by_id(id=status)
+            await self.room.update_menu(node_id=o_connection, state=None)
+            return status, response, o_connection
+
+        if status == 401:
+            o_connection = None
+            if not self.middleware:
+                if self.cases:
+                    o_connection = await self.get_case_by_id(id=status)
 
-                    break
+                if o_connection:
+                    await self.room.update_menu(
+                        node_id=o_connection, state=RouteState.END if not self.cases else None
+                    )
+            return status, None, o_connection
 
-        o_connection = await self.get_case_by_id(id=response.status)
+        o_connection = await self.get_case_by_id(id=status)
         await self.room.update_menu(
             node_id=o_connection, state=RouteState.END if not self.cases else None
         )
@@ -196,7 +273,7 @@ class HTTPRequest(Switch):
         if variables:
             await self.room.set_variables(variables=variables)
 
-        return response.status, await response.text(), o_connection
+        return status, response, o_connection
 
     async def run_middleware(self, status: int):
         """This function check athentication attempts to avoid an infinite try_athentication cicle.
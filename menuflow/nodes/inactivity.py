@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import Dict
+
+from ..db.route import RouteState
+
+
+class InactivityTimer:
+    """The inactivity timer of the nodes that wait for a message of the user,
+    the nodes implement `inactivity_options` and `timeout_active_chats`.
+    """
+
+    async def resume_timer(self, data: Dict, delay: float) -> bool:
+        """It resumes the inactivity timer of the room after a restart or a reload of the flow
+
+        Parameters
+        ----------
+        data : Dict
+            The data saved with the timer.
+        delay : float
+            Seconds until the timer fires, zero or less if it is overdue.
+
+        Returns
+        -------
+            False if the room is not waiting for an input of the node anymore.
+
+        """
+        if self.room.route.state != RouteState.INPUT or not self.inactivity_options:
+            return False
+
+        await self.room.resume_timer(
+            delay, partial(self.timeout_active_chats, count=data.get("count", 0))
+        )
+        return True
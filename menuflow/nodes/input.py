@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime
+from functools import partial
 from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from mautrix.types import (
@@ -16,7 +16,8 @@ from ..events import MenuflowNodeEvents
 from ..events.event_generator import send_node_event
 from ..repository import Input as InputModel
 from ..room import Room
-from ..utils import Middlewares, Nodes, Util
+from ..utils import Middlewares, Nodes, Timer
+from .inactivity import InactivityTimer
 from .message import Message
 from .switch import Switch
 
@@ -24,7 +25,7 @@ if TYPE_CHECKING:
     from ..middlewares import ASRMiddleware, IRMMiddleware, LLMMiddleware, TTMMiddleware
 
 
-class Input(Switch, Message):
+class Input(InactivityTimer, Switch, Message):
     def __init__(self, input_node_data: InputModel, room: Room, default_variables: Dict) -> None:
         Switch.__init__(self, input_node_data, room=room, default_variables=default_variables)
         Message.__init__(self, input_node_data, room=room, default_variables=default_variables)
@@ -168,7 +169,7 @@ class Input(Switch, Message):
                 o_connection = await self.input_location(content=evt.content)
 
             if self.inactivity_options:
-                await Util.cancel_task(task_name=self.room.room_id)
+                await self.room.cancel_timer()
 
             await send_node_event(
                 config=self.room.config,
@@ -204,56 +205,61 @@ class Input(Switch, Message):
             )
 
     async def inactivity_task(self):
-        """It spawns a task to harass the client to enter information to input option
-
-        Parameters
-        ----------
-        client : MatrixClient
-            The MatrixClient object
-
+        """It schedules the inactivity timer of the room to harass the client
+        to enter information to input option
         """
 
         self.log.debug(f"Inactivity loop starts in room: {self.room.room_id}")
-        asyncio.create_task(self.timeout_active_chats(), name=self.room.room_id)
-
-    async def timeout_active_chats(self):
+        await self.room.schedule_timer(
+            kind="inactivity",
+            node_id=self.id,
+            delay=self.chat_timeout,
+            callback=self.timeout_active_chats,
+            data={"count": 0},
+        )
+
+    async def timeout_active_chats(self, timer: Timer, count: int = 0):
         """It sends messages in time intervals to communicate customer
         that not entered information to input option.
 
         Parameters
         ----------
-        client : MatrixClient
-            The Matrix client object.
+        timer : Timer
+            The inactivity timer of the room.
+        count : int
+            The number of warning messages already sent.
 
         """
 
-        # wait the given time to start the task
-        await asyncio.sleep(self.chat_timeout)
-
-        count = 0
-        while True:
-            self.log.debug(f"Inactivity loop: {datetime.now()} -> {self.room.room_id}")
-            if self.attempts == count:
-                self.log.debug(f"INACTIVITY TRIES COMPLETED -> {self.room.room_id}")
-                o_connection = await self.get_case_by_id("timeout")
-                await self.room.update_menu(node_id=o_connection, state=None)
-
-                await send_node_event(
-                    config=self.room.config,
-                    send_event=self.content.get("send_event"),
-                    event_type=MenuflowNodeEvents.NodeInputTimeout,
-                    room_id=self.room.room_id,
-                    sender=self.room.matrix_client.mxid,
-                    node_id=self.id,
-                    o_connection=o_connection,
-                    variables=self.room.all_variables | self.default_variables,
-                )
-
-                await self.room.matrix_client.algorithm(room=self.room)
-                break
+        self.log.debug(f"Inactivity loop: {datetime.now()} -> {self.room.room_id}")
+        if self.attempts == count:
+            self.log.debug(f"INACTIVITY TRIES COMPLETED -> {self.room.room_id}")
+            await self.room.cancel_timer()
+            o_connection = await self.get_case_by_id("timeout")
+            await self.room.update_menu(node_id=o_connection, state=None)
 
-            await self.room.matrix_client.send_text(
-                room_id=self.room.room_id, text=self.warning_message
+            await send_node_event(
+                config=self.room.config,
+                send_event=self.content.get("send_event"),
+                event_type=MenuflowNodeEvents.NodeInputTimeout,
+                room_id=self.room.room_id,
+                sender=self.room.matrix_client.mxid,
+                node_id=self.id,
+                o_connection=o_connection,
+                variables=self.room.all_variables | self.default_variables,
             )
-            await asyncio.sleep(self.time_between_attempts)
-            count += 1
+
+            await self.room.matrix_client.algorithm(room=self.room)
+            return
+
+        await self.room.matrix_client.send_text(
+            room_id=self.room.room_id, text=self.warning_message
+        )
+        await self.room.reschedule_timer(
+            timer,
+            kind="inactivity",
+            node_id=self.id,
+            delay=self.time_between_attempts,
+            callback=partial(self.timeout_active_chats, count=count + 1),
+            data={"count": count + 1},
+        )
@@ -8,7 +8,7 @@ from ..events.event_generator import send_node_event
 from ..repository import InteractiveInput as InteractiveInputModel
 from ..repository import InteractiveMessage
 from ..room import Room
-from ..utils import Nodes, Util
+from ..utils import Nodes
 from .input import Input
 
 
@@ -58,7 +58,7 @@ class InteractiveInput(Input):
             o_connection = await self.input_text(text=evt.content.body)
 
             if self.inactivity_options:
-                await Util.cancel_task(task_name=self.room.room_id)
+                await self.room.cancel_timer()
 
             await send_node_event(
                 config=self.room.config,
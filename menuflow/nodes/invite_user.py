@@ -1,5 +1,4 @@
-from asyncio import Future, create_task, get_running_loop, sleep
-from datetime import datetime
+from asyncio import Future, TimeoutError, create_task, get_running_loop, shield, wait_for
 from typing import Dict
 
 import mautrix.errors.request
@@ -12,6 +11,9 @@ from .switch import Switch
 
 
 class InviteUser(Switch):
+    # Result of the finished invitations, the pending ones are in Room.pending_invites
+    stats: Dict[str, int] = {"join": 0, "reject": 0, "timeout": 0}
+
     def __init__(
         self, invite_node_data: InviteUserModel, room: Room, default_variables: Dict
     ) -> None:
@@ -41,37 +43,83 @@ class InviteUser(Switch):
             return
 
         await self.room.update_menu(self.id, RouteState.INVITE)
+        # The timeout is saved, so the invitation is not waited forever after a restart
+        await self.room.save_timer(kind="invite", node_id=self.id, delay=float(self.timeout))
 
         loop = get_running_loop()
         pending_invite = loop.create_future()
         # Save the Future object in the pending_invites dict.
         self.room.pending_invites[self.room.room_id] = pending_invite
 
-        create_task(self.check_agent_join(pending_invite))
+        create_task(self.check_agent_join(pending_invite, float(self.timeout)))
 
-    async def check_agent_join(self, pending_invite: Future):
-        # Check if the agent has joined the room.
-        loop = get_running_loop()
-        end_time = loop.time() + float(self.timeout)
-
-        while True:
-            self.log.debug(datetime.now())
-            if pending_invite.done():
-                # when a join event is received, the Future object is resolved
-                self.log.debug("FUTURE IS DONE")
-                case_id = "join" if pending_invite.result() else "reject"
-                break
-            elif (loop.time() + 1.0) >= end_time:
-                self.log.debug("TIMEOUT COMPLETED.")
-                pending_invite.set_result(False)
-                # Remove user invitation from the room.
-                await self.room.matrix_client.kick_user(self.room.room_id, self.invitee)
-                case_id = "timeout"
-                break
+    async def resume_timer(self, data: Dict, delay: float) -> bool:
+        """It resumes the wait of the invitation after a restart or a reload of the flow
+
+        Parameters
+        ----------
+        data : Dict
+            The data saved with the timer.
+        delay : float
+            Seconds until the invitation times out, zero or less if it is overdue.
+
+        Returns
+        -------
+            False if the room is not waiting for the invitation anymore.
+
+        """
+        if self.room.route.state != RouteState.INVITE:
+            return False
+
+        # The flow was reloaded, the invitation is still being waited
+        pending_invite = self.room.pending_invites.get(self.room.room_id)
+        if pending_invite and not pending_invite.done():
+            return True
+
+        pending_invite = get_running_loop().create_future()
+        self.room.pending_invites[self.room.room_id] = pending_invite
 
-            await sleep(1)
+        if delay > 0:
+            create_task(self.check_agent_join(pending_invite, delay))
+        else:
+            await self.check_agent_join(pending_invite, 0)
 
-        if self.room.room_id in self.room.pending_invites:
+        return True
+
+    async def check_agent_join(self, pending_invite: Future, timeout: float):
+        """It waits until the agent joins or rejects the invitation, or the timeout expires.
+
+        The future is resolved by the member events of the room, so the wait ends
+        as soon as the agent answers, without polling.
+
+        Parameters
+        ----------
+        pending_invite : Future
+            The future of the invitation, True when the agent joins, False if rejects.
+        timeout : float
+            Seconds to wait for the agent.
+
+        """
+        try:
+            # The shield keeps the future alive when the wait times out
+            joined = await wait_for(shield(pending_invite), timeout=max(timeout, 0))
+            case_id = "join" if joined else "reject"
+        except TimeoutError:
+            self.log.debug(f"Invitation of {self.invitee} in {self.room.room_id} timed out")
+            if not pending_invite.done():
+                pending_invite.set_result(False)
+            # Remove user invitation from the room.
+            await self.room.matrix_client.kick_user(self.room.room_id, self.invitee)
+            case_id = "timeout"
+
+        self.stats[case_id] += 1
+        if self.room.pending_invites.get(self.room.room_id) is pending_invite:
             del self.room.pending_invites[self.room.room_id]
 
+        await self.room.delete_timer()
+
         await self._update_menu(case_id)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        return {"pending": len(Room.pending_invites), **cls.stats}
@@ -70,7 +70,7 @@ class Media(Message):
             MediaMessageEventContent
 
         """
-        resp = await self.session.get(self.url)
+        resp = await self.get_session(self.url).get(self.url)
         if resp.headers.get("Content-Type") in (
             "application/json",
             "application/text",
@@ -64,6 +64,7 @@ class Message(Base):
             If true, the event will be generated.
         """
         self.log.debug(f"Room {self.room.room_id} enters message node {self.id}")
+        await self.prerender("text")
 
         if not self.text:
             self.log.warning(f"The message {self.id} hasn't been send because the text is empty")
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from asyncio import create_task, gather, wait
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from ..db.route import RouteState
+from ..events import MenuflowNodeEvents
+from ..events.event_generator import send_node_event
+from ..repository import ParallelHTTPRequest as ParallelHTTPRequestModel
+from ..room import Room
+from ..utils import Nodes
+from .http_request import HTTPRequest
+from .switch import Switch
+
+if TYPE_CHECKING:
+    from ..middlewares import HTTPMiddleware
+
+
+class ParallelHTTPRequest(Switch):
+    def __init__(
+        self,
+        parallel_http_request_node_data: ParallelHTTPRequestModel,
+        room: Room,
+        default_variables: Dict,
+    ) -> None:
+        Switch.__init__(
+            self, parallel_http_request_node_data, room=room, default_variables=default_variables
+        )
+        self.log = self.log.getChild(parallel_http_request_node_data.get("id"))
+        self.content: Dict = parallel_http_request_node_data
+        # Middlewares of the requests by request id
+        self.middlewares: Dict[str, HTTPMiddleware] = {}
+
+    @property
+    def timeout(self) -> float:
+        return float(
+            self.render_data(
+                self.content.get("timeout", self.config["menuflow.timeouts.http_request"])
+            )
+        )
+
+    @property
+    def requests(self) -> List[HTTPRequest]:
+        requests = []
+        for request_data in self.content.get("requests", []):
+            request = HTTPRequest(
+                http_request_node_data={
+                    **request_data,
+                    "id": f"{self.id}.{request_data.get('id')}",
+                    "type": Nodes.http_request.value,
+                },
+                room=self.room,
+                default_variables=self.default_variables,
+            )
+            request.middleware = self.middlewares.get(request_data.get("id"))
+            requests.append(request)
+
+        return requests
+
+    async def request(self, request: HTTPRequest) -> Tuple[int, str | Exception | None, Dict]:
+        """It makes one of the requests of the node. If the request has a middleware and
+        the response is a 401, the middleware refreshes its token (see `end_auth_middleware`)
+        and the request is made again, up to the attempts of the middleware,
+        as `HTTPRequest.run_middleware` does.
+
+        Parameters
+        ----------
+        request : HTTPRequest
+            The request to make.
+
+        Returns
+        -------
+            The status code, the response text and the variables of the last attempt.
+
+        """
+        status, response, variables = await request.request()
+        attempts = 1
+        while status == 401 and request.middleware and attempts < request.middleware.attempts:
+            attempts += 1
+            self.log.debug(f"HTTP auth attempt {attempts} of request [{request.id}]")
+            status, response, variables = await request.request()
+
+        return status, response, variables
+
+    async def make_requests(self) -> tuple[str, Dict]:
+        """It makes all the requests of the node at the same time,
+        all of them share the same deadline.
+
+        Returns
+        -------
+            A tuple with the outcome of the requests ("ok" if all of them succeeded,
+            "partial" if some of them succeeded and "failed" if none succeeded)
+            and the variables extracted from the successful responses.
+
+        """
+        requests = self.requests
+        if not requests:
+            return "failed", {}
+
+        tasks = [create_task(self.request(request), name=request.id) for request in requests]
+        done, pending = await wait(tasks, timeout=self.timeout)
+
+        for task in pending:
+            self.log.warning(f"Request [{task.get_name()}] did not finish before the deadline")
+            task.cancel()
+
+        # The cancelled requests release their connections before the node goes on
+        await gather(*pending, return_exceptions=True)
+
+        variables = {}
+        succeeded = 0
+        # The variables are merged in the order of the requests,
+        # if two requests set the same variable, the last one is kept
+        for task in tasks:
+            if task not in done or task.exception():
+                continue
+
+            status, _, request_variables = task.result()
+            if 200 <= status < 300:
+                succeeded += 1
+                variables.update(request_variables)
+
+        if succeeded == len(requests):
+            outcome = "ok"
+        elif succeeded:
+            outcome = "partial"
+        else:
+            outcome = "failed"
+
+        self.log.debug(f"{succeeded} of {len(requests)} requests succeeded in [{self.id}]")
+        return outcome, variables
+
+    async def run(self):
+        """It makes the requests of the node concurrently,
+        saves the variables of the responses and goes to the case of the outcome.
+        """
+        self.log.debug(f"Room {self.room.room_id} enters parallel_http_request node {self.id}")
+
+        outcome, variables = await self.make_requests()
+
+        o_connection = await self.get_case_by_id(id=outcome)
+        await self.room.update_menu(
+            node_id=o_connection, state=RouteState.END if not self.cases else None
+        )
+
+        if variables:
+            await self.room.set_variables(variables=variables)
+
+        await send_node_event(
+            config=self.room.config,
+            send_event=self.content.get("send_event"),
+            event_type=MenuflowNodeEvents.NodeEntry,
+            room_id=self.room.room_id,
+            sender=self.room.matrix_client.mxid,
+            node_type=Nodes.parallel_http_request,
+            node_id=self.id,
+            o_connection=o_connection,
+            variables=self.room.all_variables | self.default_variables,
+        )
@@ -25,6 +25,7 @@ class SetVars(Base):
     async def run(self):
         """This function runs the set_var node."""
         self.log.debug(f"Room {self.room.room_id} enters set_var node {self.id}")
+        await self.prerender("variables")
         if not self.variables:
             self.log.warning(
                 f"The variables in {self.id} have not been set because they are empty"
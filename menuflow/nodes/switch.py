@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 
 from ..events import MenuflowNodeEvents
 from ..events.event_generator import send_node_event
@@ -13,6 +13,9 @@ from .base import Base, safe_data_convertion
 class Switch(Base):
     # Keeps track of the number of validation attempts made in a switch node by room.
     VALIDATION_ATTEMPTS_BY_ROOM: Dict[str, int] = {}
+    # Cases by id of the switch nodes of the loaded flows, the key is the identity
+    # of the node content, which is replaced when the flow is loaded again
+    CASE_INDEXES: Dict[int, Tuple[Dict, Dict[Any, Dict]]] = {}
 
     def __init__(self, switch_node_data: SwitchModel, room: Room, default_variables: Dict) -> None:
         Base.__init__(self, room=room, default_variables=default_variables)
@@ -45,28 +48,38 @@ class Switch(Base):
     def cases(self) -> List[Dict]:
         return self.content.get("cases")
 
+    @property
+    def case_index(self) -> Dict[Any, Dict]:
+        """The cases of the node by id, built only once for each version of the flow"""
+        cached = self.CASE_INDEXES.get(id(self.content))
+        if cached and cached[0] is self.content:
+            return cached[1]
+
+        case_index = {}
+        for case in self.cases or []:
+            case_index[safe_data_convertion(case.get("id"))] = {
+                "o_connection": case.get("o_connection"),
+                "variables": case.get("variables"),
+            }
+
+        # The content is kept with the index, so its id is not reused while it is cached
+        self.CASE_INDEXES[id(self.content)] = (self.content, case_index)
+        return case_index
+
+    @classmethod
+    def clear_case_indexes(cls) -> None:
+        cls.CASE_INDEXES = {}
+
     async def load_cases(self) -> Dict[str, str]:
         """It loads the cases into a dictionary.
 
-        Parameters
-        ----------
-        room : Room
-            Room = None
-
         Returns
         -------
             A dictionary of cases.
 
         """
 
-        cases_dict = {}
-
-        for case in self.cases:
-            cases_dict[safe_data_convertion(case.get("id"))] = {
-                "o_connection": case.get("o_connection"),
-                "variables": case.get("variables"),
-            }
-        return cases_dict
+        return self.case_index
 
     async def _run(self) -> str:
         """It takes a dictionary of variables, runs the rule,
@@ -126,8 +139,7 @@ class Switch(Base):
         id = safe_data_convertion(id)
 
         try:
-            cases = await self.load_cases()
-            case_result: Dict = cases[id]
+            case_result: Dict = self.case_index[id]
 
             # Load variables defined in the case into the room
             await self.load_variables(case_result.get("variables", {}))
@@ -191,6 +203,9 @@ class Switch(Base):
             if self.validation_attempts and self.room.room_id in self.VALIDATION_ATTEMPTS_BY_ROOM:
                 del self.VALIDATION_ATTEMPTS_BY_ROOM[self.room.room_id]
 
+            # The first valid case is used, the rest of the cases are not rendered
+            break
+
         if not case_o_connection:
             default_case, case_o_connection = await self.manage_case_exceptions()
             self.log.debug(
@@ -240,8 +255,6 @@ class Switch(Base):
             default case dictionary (or "start" if the key is not present).
 
         """
-        cases = await self.load_cases()
-
         room_validation_attempts = self.VALIDATION_ATTEMPTS_BY_ROOM.get(self.room.room_id, 1)
         if self.validation_attempts and room_validation_attempts >= self.validation_attempts:
             if self.room.room_id in self.VALIDATION_ATTEMPTS_BY_ROOM:
@@ -258,10 +271,10 @@ class Switch(Base):
             self.VALIDATION_ATTEMPTS_BY_ROOM[self.room.room_id] = room_validation_attempts + 1
 
         # Getting the default case
-        default_case = cases.get(case_to_be_used, {})
+        default_case = self.case_index.get(case_to_be_used, {})
 
         # Load variables defined in the case into the room
-        await self.load_variables(default_case)
+        await self.load_variables(default_case.get("variables", {}))
 
         # Getting the o_connection of the default case
         default_o_connection = self.render_data(default_case.get("o_connection"))
@@ -20,6 +20,7 @@ from .nodes import (
     Location,
     Media,
     Message,
+    ParallelHTTPRequest,
     SetVars,
     Subroutine,
     Switch,
@@ -11,4 +11,8 @@ class FlowObject(SerializableAttrs):
     id: str = ib()
     type: str = ib()
     send_event: bool = ib(default=None)
+    # text or native, it replaces menuflow.templates.render_mode for the node
+    render_mode: str = ib(default=None)
+    # The templates of the node are rendered in a worker thread
+    render_in_thread: bool = ib(default=None)
     flow_variables: Dict[str, Any] = {}
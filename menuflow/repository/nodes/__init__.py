@@ -11,6 +11,7 @@ from .leave import Leave
 from .location import Location
 from .media import Media
 from .message import Message
+from .parallel_http_request import ParallelHTTPRequest, Request
 from .set_vars import SetVars
 from .subroutine import Subroutine
 from .switch import Case, Switch
@@ -15,6 +15,8 @@ class CheckTime(Switch):
     If the current time matches the specified time, it branches to the case `True`.
     Each of the elements can be specified as '*' (forever) or as a range.
     If the current time does not match the specified time the output will be set using case `False`.
+    The dates in `holidays` never match, they can be set for every year (MM-DD)
+    or for a single year (YYYY-MM-DD).
 
     content:
 
@@ -32,6 +34,9 @@ class CheckTime(Switch):
           - "6-6"
       months:
           - "*"
+      holidays:
+          - "12-25"
+          - "2024-04-01"
       cases:
           - id: "True"
           o_connection: "message_1"
@@ -45,4 +50,5 @@ class CheckTime(Switch):
     days_of_month: List[str] = ib(factory=str)
     months: List[str] = ib(factory=str)
     timezone: str = ib(factory=str)
+    holidays: List[str] = ib(factory=list)
     cases: List[Case] = ib(factory=list)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from attr import dataclass, ib
+from mautrix.types import SerializableAttrs
+
+from .switch import Case, Switch
+
+
+@dataclass
+class Request(SerializableAttrs):
+    id: str = ib()
+    method: str = ib(default=None)
+    url: str = ib(default=None)
+    middleware: str = ib(default=None)
+    variables: Dict[str, Any] = ib(factory=dict)
+    cookies: Dict[str, Any] = ib(factory=dict)
+    query_params: Dict[str, Any] = ib(factory=dict)
+    headers: Dict[str, Any] = ib(factory=dict)
+    basic_auth: Dict[str, Any] = ib(factory=dict)
+    data: Dict[str, Any] = ib(factory=dict)
+    json: Dict[str, Any] = ib(factory=dict)
+
+
+@dataclass
+class ParallelHTTPRequest(Switch):
+    """
+    ## ParallelHTTPRequest
+
+    ParallelHTTPRequest is a subclass of Switch which sends several independent HTTP requests
+    at the same time, all of them sharing the same deadline (`timeout`, in seconds).
+    Each request accepts the same fields of an http_request node.
+
+    The variables of the successful responses (2xx) are merged and the node transits
+    according to the outcome:
+    - ok: all the requests succeeded
+    - partial: some of the requests succeeded
+    - failed: none of the requests succeeded
+
+    content:
+
+    ```
+    - id: 'p1'
+      type: 'parallel_http_request'
+      timeout: 10
+      requests:
+        - id: crm
+          method: GET
+          url: 'https://crm.example.com/customers/{{ route.customer_id }}'
+          variables:
+            route.customer_name: data.name
+        - id: billing
+          method: GET
+          url: 'https://billing.example.com/balance/{{ route.customer_id }}'
+          middleware: billing_jwt
+          variables:
+            route.balance: balance
+
+      cases:
+        - id: ok
+          o_connection: m1
+        - id: partial
+          o_connection: m2
+        - id: failed
+          o_connection: m3
+    ```
+    """
+
+    timeout: int = ib(default=None)
+    requests: List[Request] = ib(factory=list)
+    cases: List[Case] = ib(factory=list)
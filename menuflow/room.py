@@ -4,7 +4,8 @@ import json
 from asyncio import Future, Lock
 from collections import defaultdict
 from logging import getLogger
-from typing import Any, Dict, List, Optional, cast
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, cast
 
 from mautrix.client import Client as MatrixClient
 from mautrix.types import EventType, RoomID, StateEventContent, UserID
@@ -13,8 +14,10 @@ from mautrix.util.logging import TraceLogger
 
 from .config import Config
 from .db.room import Room as DBRoom
+from .db.room_timer import RoomTimer
 from .db.route import Route, RouteState
-from .utils import Util
+from .events.variables_delta import VariablesDelta
+from .utils import Timer, TimerService
 
 
 class Room(DBRoom):
@@ -56,6 +59,13 @@ class Room(DBRoom):
     def all_variables(self) -> Dict:
         return {"room": self._variables, "route": self.route._variables}
 
+    @property
+    def timer_key(self) -> str:
+        """The key of the timer of the room in the TimerService, the timers of a client
+        share the prefix `{bot_mxid}/`, so they can be cancelled when its flow is reloaded.
+        """
+        return f"{self.bot_mxid}/{self.room_id}"
+
     @classmethod
     @async_getter_lock
     async def get_by_room_id(
@@ -108,8 +118,83 @@ class Room(DBRoom):
             self.by_room_id[(bot_mxid, self.room_id)] = self
 
     async def clean_up(self):
-        await Util.cancel_task(task_name=self.room_id)
+        await self.cancel_timer()
         await self.route.clean_up()
+        # The next event of the room is sent with all its variables
+        VariablesDelta.forget(self.room_id)
+
+    async def save_timer(
+        self, kind: str, node_id: str, delay: float, data: Optional[Dict] = None
+    ) -> None:
+        """It saves the timer of the room in the database, so it can be resumed after a restart
+
+        Parameters
+        ----------
+        kind : str
+            The type of timer, e.g. inactivity.
+        node_id : str
+            The node that created the timer.
+        delay : float
+            Seconds until the timer fires.
+        data : Optional[Dict]
+            The data needed to resume the timer.
+
+        """
+        await RoomTimer(
+            room_id=self.room_id,
+            client=self.bot_mxid,
+            kind=kind,
+            node_id=node_id,
+            fire_at=time() + max(delay or 0, 0),
+            data=json.dumps(data or {}),
+        ).upsert()
+
+    async def delete_timer(self) -> None:
+        await RoomTimer.delete_by_room(room_id=self.room_id, client=self.bot_mxid)
+
+    async def schedule_timer(
+        self,
+        kind: str,
+        node_id: str,
+        delay: float,
+        callback: Callable[[Timer], Awaitable[None]],
+        data: Optional[Dict] = None,
+    ) -> Timer:
+        """It schedules the timer of the room and saves it in the database"""
+        timer = TimerService.schedule(self.timer_key, delay, callback)
+        await self.save_timer(kind=kind, node_id=node_id, delay=delay, data=data)
+        return timer
+
+    async def resume_timer(
+        self, delay: float, callback: Callable[[Timer], Awaitable[None]]
+    ) -> None:
+        """It resumes a saved timer of the room, it runs now if it is overdue"""
+        if delay > 0:
+            TimerService.schedule(self.timer_key, delay, callback)
+        else:
+            await TimerService.run_now(self.timer_key, callback)
+
+    async def reschedule_timer(
+        self,
+        timer: Timer,
+        kind: str,
+        node_id: str,
+        delay: float,
+        callback: Callable[[Timer], Awaitable[None]],
+        data: Optional[Dict] = None,
+    ) -> Optional[Timer]:
+        """It schedules the next step of the timer of the room from its callback,
+        unless it was cancelled meanwhile
+        """
+        new_timer = TimerService.reschedule(timer, delay, callback)
+        if new_timer:
+            await self.save_timer(kind=kind, node_id=node_id, delay=delay, data=data)
+
+        return new_timer
+
+    async def cancel_timer(self) -> None:
+        if TimerService.cancel(self.timer_key):
+            await self.delete_timer()
 
     async def get_variable(self, variable_id: str) -> Any | None:
         """This function returns the value of a variable with the given ID
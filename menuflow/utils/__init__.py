@@ -1,2 +1,4 @@
+from .timer_service import Timer, TimerService
 from .types import Middlewares, Nodes
+from .user_matcher import UserMatcher
 from .util import Util
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from heapq import heapify, heappop, heappush
+from itertools import count
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from attr import dataclass, ib
+from mautrix.util.logging import TraceLogger
+
+from .util import Util
+
+log: TraceLogger = logging.getLogger("menuflow.timers")
+
+
+@dataclass
+class Timer:
+    key: str
+    when: float
+    callback: Callable[[Timer], Awaitable[None]]
+    cancelled: bool = ib(default=False)
+
+
+class TimerService:
+    """Runs the timers of the rooms (e.g. the inactivity of the input nodes)
+    with a single background task, instead of a sleeping task by room.
+
+    There is at most one timer by key (the client and the room, see `Room.timer_key`),
+    scheduling a timer replaces the previous one of the key. The timers are kept in a heap
+    ordered by time, a cancelled timer is only marked and it is removed from the heap when
+    it reaches the top, so cancelling is O(1).
+
+    When a timer is due its callback runs in its own task, named with the key of the timer.
+    """
+
+    timers: Dict[str, Timer] = {}
+    _heap: List[Tuple[float, int, Timer]] = []
+    _counter = count()
+    _wakeup: asyncio.Event = None
+    _task: asyncio.Task = None
+    fired: int = 0
+
+    @classmethod
+    def schedule(
+        cls, key: str, delay: float, callback: Callable[[Timer], Awaitable[None]]
+    ) -> Timer:
+        """It schedules a timer, the previous timer of the key is cancelled.
+
+        Parameters
+        ----------
+        key : str
+            The key of the timer, usually `Room.timer_key`.
+        delay : float
+            Seconds until the callback runs.
+        callback : Callable[[Timer], Awaitable[None]]
+            The coroutine function that is called with the timer.
+
+        Returns
+        -------
+            The timer.
+
+        """
+        cls.cancel(key)
+
+        loop = asyncio.get_running_loop()
+        timer = Timer(key=key, when=loop.time() + max(delay or 0, 0), callback=callback)
+        cls.timers[key] = timer
+        heappush(cls._heap, (timer.when, next(cls._counter), timer))
+
+        if not cls._task:
+            cls._wakeup = asyncio.Event()
+            cls._task = asyncio.create_task(cls._run(), name="timer_service")
+        elif cls._heap[0][2] is timer:
+            cls._wakeup.set()
+
+        return timer
+
+    @classmethod
+    def reschedule(
+        cls, timer: Timer, delay: float, callback: Callable[[Timer], Awaitable[None]]
+    ) -> Optional[Timer]:
+        """It schedules the next step of a timer from its callback,
+        unless the timer was cancelled while the callback was running.
+        """
+        if timer.cancelled or cls.timers.get(timer.key) is not timer:
+            return None
+
+        return cls.schedule(timer.key, delay, callback)
+
+    @classmethod
+    async def run_now(cls, key: str, callback: Callable[[Timer], Awaitable[None]]) -> None:
+        """It runs the callback of a timer that is already due and waits for it,
+        e.g. the timers that expired while menuflow was stopped.
+        """
+        cls.cancel(key)
+
+        timer = Timer(key=key, when=asyncio.get_running_loop().time(), callback=callback)
+        cls.timers[key] = timer
+        cls.fired += 1
+        await cls._fire(timer)
+
+    @classmethod
+    def cancel(cls, key: str) -> bool:
+        timer = cls.timers.pop(key, None)
+        if not timer:
+            return False
+
+        timer.cancelled = True
+        # Removes the cancelled timers when they are most of the heap
+        if len(cls._heap) > 2 * len(cls.timers) + 64:
+            cls._heap = [entry for entry in cls._heap if not entry[2].cancelled]
+            heapify(cls._heap)
+
+        return True
+
+    @classmethod
+    def cancel_by_prefix(cls, prefix: str) -> int:
+        """It cancels the timers whose key starts with the prefix,
+        e.g. the timers of the rooms of a client.
+
+        Returns
+        -------
+            The number of cancelled timers.
+
+        """
+        keys = [key for key in cls.timers if key.startswith(prefix)]
+        for key in keys:
+            cls.timers.pop(key).cancelled = True
+
+        if keys:
+            cls._heap = [entry for entry in cls._heap if not entry[2].cancelled]
+            heapify(cls._heap)
+
+        return len(keys)
+
+    @classmethod
+    def cancel_all(cls) -> None:
+        for timer in cls.timers.values():
+            timer.cancelled = True
+
+        cls.timers = {}
+        cls._heap = []
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        return {"scheduled": len(cls.timers), "heap_size": len(cls._heap), "fired": cls.fired}
+
+    @classmethod
+    async def _run(cls) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            while cls._heap and cls._heap[0][2].cancelled:
+                heappop(cls._heap)
+
+            # The task ends when there are no timers, the next timer starts it again
+            if not cls._heap:
+                cls._task = None
+                return
+
+            delay = cls._heap[0][0] - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(cls._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                cls._wakeup.clear()
+                continue
+
+            _, _, timer = heappop(cls._heap)
+            cls.fired += 1
+            Util.create_task(cls._fire(timer), name=timer.key)
+
+    @classmethod
+    async def _fire(cls, timer: Timer) -> None:
+        try:
+            await timer.callback(timer)
+        except Exception as e:
+            log.exception(f"Error running the timer of {timer.key}: {e}")
+        finally:
+            # The timer is kept while its callback runs, so it can be cancelled
+            if cls.timers.get(timer.key) is timer:
+                del cls.timers[timer.key]
+
+    @classmethod
+    async def stop(cls) -> None:
+        cls.cancel_all()
+        if cls._task:
+            cls._task.cancel()
+            cls._task = None
@@ -12,6 +12,7 @@ class Nodes(SerializableEnum):
     location = "location"
     media = "media"
     message = "message"
+    parallel_http_request = "parallel_http_request"
     set_vars = "set_vars"
     subroutine = "subroutine"
     switch = "switch"
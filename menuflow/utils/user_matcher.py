@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Pattern
+
+from mautrix.types import UserID
+
+# The patterns made only of these characters match themselves, e.g. @admin:example.com
+SELF_MATCHING_PATTERN = re.compile(r"[\w@:.-]+")
+# Backreferences can not be combined in a single regex, their group numbers would change
+BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class UserMatcher:
+    """Checks if a user ID matches any of a list of patterns, as `re.match` does.
+
+    The patterns are compiled once in a single regex. The user IDs written as they are
+    (no regex) are also kept in a set, so they are found without the regex. The results
+    are memoized by user ID, up to `max_size` user IDs, the oldest are removed first.
+    """
+
+    max_size: int = 10000
+
+    def __init__(self, patterns: Optional[List[str]]) -> None:
+        self.patterns = patterns
+        self.exact = {
+            pattern for pattern in patterns or [] if SELF_MATCHING_PATTERN.fullmatch(pattern)
+        }
+        self.regexes: List[Pattern] = []
+        self.results: Dict[UserID, bool] = {}
+
+        if not patterns:
+            return
+
+        if any(BACKREFERENCE.search(pattern) for pattern in patterns):
+            self.regexes = [re.compile(pattern) for pattern in patterns]
+            return
+
+        try:
+            self.regexes = [re.compile("|".join(f"(?:{pattern})" for pattern in patterns))]
+        except re.error:
+            # e.g. global flags in the middle of the regex
+            self.regexes = [re.compile(pattern) for pattern in patterns]
+
+    def match(self, mxid: UserID) -> bool:
+        result = self.results.get(mxid)
+        if result is None:
+            result = mxid in self.exact or any(regex.match(mxid) for regex in self.regexes)
+            if len(self.results) >= self.max_size:
+                del self.results[next(iter(self.results))]
+
+            self.results[mxid] = result
+
+        return result
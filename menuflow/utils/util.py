@@ -1,19 +1,29 @@
 import json
-from asyncio import Task, all_tasks
+from asyncio import Task, create_task
+from functools import lru_cache
 from logging import getLogger
-from re import match, sub
-from typing import Dict
+from re import compile, sub
+from typing import Any, Coroutine, Dict, List, Tuple
 
+from jsonpath_ng import JSONPath, parse
 from mautrix.types import RoomID, UserID
 from mautrix.util.logging import TraceLogger
 
 from ..config import Config
+from .user_matcher import UserMatcher
 
 
 class Util:
     config: Config
     log: TraceLogger = getLogger("menuflow.util")
     _main_matrix_regex = "[\\w-]+:[\\w.-]"
+    _user_id_regex = compile(f"^@{_main_matrix_regex}+$")
+    _room_id_regex = compile(f"^!{_main_matrix_regex}+$")
+    _simple_jsonpath_regex = compile(r"^(\$\.)?[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+    # Tasks created with `create_task` by name
+    _tasks: Dict[str, Task] = {}
+    # Matchers of the ignore lists by config key, see `ignore_user`
+    _ignore_matchers: Dict[str, UserMatcher] = {}
 
     def __init__(self, config: Config):
         self.config = config
@@ -61,7 +71,7 @@ class Util:
             A boolean value.
 
         """
-        return False if not user_id else bool(match(f"^@{cls._main_matrix_regex}+$", user_id))
+        return False if not user_id else bool(cls._user_id_regex.match(user_id))
 
     @classmethod
     def is_room_id(cls, room_id: RoomID) -> bool:
@@ -77,11 +87,40 @@ class Util:
             A boolean value.
 
         """
-        return False if not room_id else bool(match(f"^!{cls._main_matrix_regex}+$", room_id))
+        return False if not room_id else bool(cls._room_id_regex.match(room_id))
+
+    @classmethod
+    def create_task(cls, coro: Coroutine, name: str) -> Task:
+        """It creates a task and registers it by name, so it can be found or cancelled
+        without going through all the tasks of the event loop.
+        The task is removed from the registry when it finishes, a new task
+        with the same name replaces the previous one in the registry.
+
+        Parameters
+        ----------
+        coro : Coroutine
+            The coroutine to run.
+        name : str
+            The name of the task, e.g. the room id.
+
+        Returns
+        -------
+            The task.
+
+        """
+        task = create_task(coro, name=name)
+        cls._tasks[name] = task
+
+        def unregister(done_task: Task) -> None:
+            if cls._tasks.get(name) is done_task:
+                del cls._tasks[name]
+
+        task.add_done_callback(unregister)
+        return task
 
     @classmethod
     def get_tasks_by_name(self, task_name: str) -> Task:
-        """It returns a task object from the current event loop, given the task's name
+        """It returns a registered task object, given the task's name
         Parameters
         ----------
         task_name
@@ -91,19 +130,22 @@ class Util:
             An specific task.
         """
 
-        tasks = all_tasks()
-        for task in tasks:
-            if task.get_name() == task_name:
-                return task
+        return self._tasks.get(task_name)
 
     @classmethod
-    async def cancel_task(self, task_name: str):
-        """It cancels the inactivity task that is running in the background"""
+    def cancel_tasks_by_prefix(cls, prefix: str) -> int:
+        """It cancels the registered tasks whose name starts with the prefix
+
+        Returns
+        -------
+            The number of cancelled tasks.
+
+        """
+        names = [name for name in cls._tasks if name.startswith(prefix)]
+        for name in names:
+            cls._tasks.pop(name).cancel()
 
-        task = self.get_tasks_by_name(task_name)
-        if task:
-            task.cancel()
-            self.log.debug(f"TASK CANCEL -> {task_name}")
+        return len(names)
 
     @classmethod
     def is_within_range(self, number: int, start: int, end: int) -> bool:
@@ -178,18 +220,66 @@ class Util:
             else "menuflow.ignore.invitations_from"
         )
 
-        if self.is_user_id(mxid):
-            for pattern in self.config[user_regex]:
-                if match(pattern, mxid):
-                    return True
+        if not self.is_user_id(mxid):
+            return False
+
+        # The matcher is built again when the list changes, e.g. the config is reloaded
+        patterns = self.config[user_regex]
+        matcher = self._ignore_matchers.get(user_regex)
+        if not matcher or matcher.patterns is not patterns:
+            matcher = self._ignore_matchers[user_regex] = UserMatcher(patterns)
+
+        return matcher.match(mxid)
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def compile_jsonpath(cls, expression: str) -> JSONPath | Tuple[str, ...]:
+        """It compiles a JSONPath expression, the result is cached by expression
+        so each expression of a flow is parsed only once.
+
+        Parameters
+        ----------
+        expression : str
+            The JSONPath expression, e.g. `data.name` or `data[*].id`
+
+        Returns
+        -------
+            A tuple with the keys of the path if the expression is a simple dotted path
+            (it does not need the JSONPath engine), otherwise the compiled JSONPath.
+
+        """
+        if cls._simple_jsonpath_regex.match(expression):
+            return tuple(expression.removeprefix("$.").split("."))
+
+        return parse(expression)
+
+    @classmethod
+    def jsonpath_find(cls, expression: str, data: Dict | List) -> List[Any]:
+        """It returns the values of the data that match with the JSONPath expression.
+
+        Parameters
+        ----------
+        expression : str
+            The JSONPath expression.
+        data : Dict | List
+            The data to search in.
+
+        Returns
+        -------
+            A list with the matched values.
+
+        """
+        path = cls.compile_jsonpath(expression)
+        if isinstance(path, JSONPath):
+            return [datum.value for datum in path.find(data)]
 
-        return False
+        value = data
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                return []
+            value = value[key]
 
-    async def cancel_tasks(self) -> None:
-        tasks = all_tasks()
-        for task in tasks:
-            if match(self.config["menuflow.regex.room_id"], task.get_name()):
-                task.cancel()
+        return [value]
 
     # Function to fix malformed lists
     @classmethod
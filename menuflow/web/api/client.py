@@ -12,6 +12,8 @@ from mautrix.types import UserID
 
 from ...config import Config
 from ...db.flow import Flow as DBFlow
+from ...durable_timers import DurableTimers
+from ...http_pool import HTTPPool
 from ...menu import MenuClient
 from ...room import Room
 from ..base import get_config, routes
@@ -30,7 +32,7 @@ async def _create_client(
         mxid="@not:a.mxid",
         base_url=homeserver,
         token=access_token,
-        client_session=MenuClient.http_client,
+        client_session=HTTPPool.get_matrix_session(),
     )
     try:
         whoami = await new_client.whoami()
@@ -232,6 +234,7 @@ async def update_client(request: web.Request) -> web.Response:
     client.flow = flow_id
     config: Config = get_config()
     await client.flow_cls.load_flow(flow_mxid=client.id, content=flow_db.flow, config=config)
+    DurableTimers.restore_in_background(client.id)
 
     await client.update()
     return resp.ok(client.to_dict())
@@ -269,6 +272,7 @@ async def reload_client_flow(request: web.Request) -> web.Response:
 
     config: Config = get_config()
     await client.flow_cls.load_flow(flow_mxid=client.id, config=config)
+    DurableTimers.restore_in_background(client.id)
 
     return resp.ok({"detail": {"message": "Flow reloaded successfully"}})
 
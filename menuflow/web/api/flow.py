@@ -8,6 +8,7 @@ from aiohttp import web
 from ...config import Config
 from ...db.client import Client as DBClient
 from ...db.flow import Flow as DBFlow
+from ...durable_timers import DurableTimers
 from ...menu import MenuClient
 from ..base import get_config, routes
 from ..responses import resp
@@ -80,6 +81,7 @@ async def create_or_update_flow(request: web.Request) -> web.Response:
                 await client.flow_cls.load_flow(
                     flow_mxid=client.id, content=incoming_flow, config=config
                 )
+                DurableTimers.restore_in_background(client.id)
         message = "Flow updated successfully"
     else:
         new_flow = DBFlow(flow=incoming_flow)
@@ -2,7 +2,11 @@ from __future__ import annotations
 
 from aiohttp import web
 
+from ...events import EventPipeline
 from ...flow_utils import FlowUtils
+from ...http_pool import HTTPPool
+from ...nodes import InviteUser
+from ...utils import TimerService
 from ..base import get_flow_utils, routes
 from ..responses import resp
 
@@ -43,3 +47,26 @@ async def get_id_middlewares(request: web.Request) -> web.Response:
         for middleware in flow_utils.data.middlewares
     ]
     return resp.ok({"middlewares": middlewares})
+
+
+@routes.get("/v1/mis/metrics", allow_head=False)
+async def get_metrics(request: web.Request) -> web.Response:
+    """
+    ---
+    summary: Get the usage metrics of menuflow.
+    tags:
+        - Mis
+
+    responses:
+        '200':
+            $ref: '#/components/responses/GetMetricsSuccess'
+    """
+
+    return resp.ok(
+        {
+            "http_pools": HTTPPool.stats(),
+            "events": EventPipeline.get_stats(),
+            "timers": TimerService.stats(),
+            "invites": InviteUser.get_stats(),
+        }
+    )
@@ -1,13 +1,15 @@
 from unittest.mock import MagicMock
 
+import pytest
 import pytest_asyncio
 from mautrix.client import Client
 from pytest_mock import MockerFixture
 
 from menuflow.config import Config
 from menuflow.db import Route
+from menuflow.db.event_storage import EventStorage
 from menuflow.flow import Flow
-from menuflow.nodes import Base, Input, Location, Message, Switch
+from menuflow.nodes import Base, HTTPRequest, Input, Location, Message, Switch
 from menuflow.room import Room
 from menuflow.utils import Util
 
@@ -26,7 +28,7 @@ async def config() -> Config:
 async def sample_flow_1(config: Config) -> Flow:
     flow = Flow()
     await flow.load_flow(content=Util.flow_example(flow_index=0), config=config)
-    for node in [Input, Location, Message, Switch]:
+    for node in [HTTPRequest, Input, Location, Message, Switch]:
         node.config = config
 
     return flow
@@ -36,7 +38,7 @@ async def sample_flow_1(config: Config) -> Flow:
 async def sample_flow_2(config: Config) -> Flow:
     flow = Flow()
     await flow.load_flow(content=Util.flow_example(flow_index=1), config=config)
-    for node in [Input, Location, Message, Switch]:
+    for node in [HTTPRequest, Input, Location, Message, Switch]:
         node.config = config
 
     return flow
@@ -118,3 +120,22 @@ async def location(sample_flow_1: Flow, base: Base) -> Location:
         location_node_data, room=base.room, default_variables=base.default_variables
     )
     return location_node
+
+
+@pytest_asyncio.fixture
+async def http_request(sample_flow_1: Flow, base: Base) -> HTTPRequest:
+    http_request_node_data = sample_flow_1.get_node_by_id("request-1")
+    http_request_node = HTTPRequest(
+        http_request_node_data, room=base.room, default_variables=base.default_variables
+    )
+    return http_request_node
+
+
+@pytest.fixture
+def event_storage(tmp_path, monkeypatch) -> EventStorage:
+    monkeypatch.setattr(EventStorage, "_conn", None)
+    monkeypatch.setattr(EventStorage, "_db", None)
+    monkeypatch.setattr(EventStorage, "backlog", 0)
+    EventStorage.init_sqlite_db(str(tmp_path / "events.db"))
+    yield EventStorage
+    EventStorage._conn.close()
@@ -0,0 +1,62 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from menuflow.config import Config
+from menuflow.db.room_timer import RoomTimer
+from menuflow.durable_timers import DurableTimers
+from menuflow.flow import Flow
+from menuflow.utils import Util
+
+
+@pytest.fixture
+def durable_timers(config: Config, monkeypatch) -> DurableTimers:
+    monkeypatch.setattr(Util, "_tasks", {})
+    monkeypatch.setattr(DurableTimers, "stats", {"restored": 0, "fired": 0, "discarded": 0})
+    DurableTimers.init_cls(config)
+    return DurableTimers
+
+
+class TestDurableTimers:
+    @pytest.mark.asyncio
+    async def test_restore_client(self, durable_timers: DurableTimers, mocker: MockerFixture):
+        room_timers = [
+            RoomTimer(room_id="!a:foo.com", client="@bot1:foo.com", kind="delay"),
+            RoomTimer(room_id="!b:foo.com", client="@bot1:foo.com", kind="inactivity"),
+        ]
+        get_by_client = mocker.patch.object(
+            RoomTimer, "get_by_client", AsyncMock(return_value=room_timers)
+        )
+        get_all = mocker.patch.object(RoomTimer, "get_all", AsyncMock())
+        restore_timer = mocker.patch.object(durable_timers, "_restore_timer", AsyncMock())
+
+        await durable_timers.restore(client="@bot1:foo.com")
+
+        get_by_client.assert_awaited_once_with("@bot1:foo.com")
+        get_all.assert_not_called()
+        assert [call.args[0] for call in restore_timer.await_args_list] == room_timers
+
+    @pytest.mark.asyncio
+    async def test_reload_cancels_the_restore(
+        self, durable_timers: DurableTimers, config: Config, mocker: MockerFixture
+    ):
+        async def get_by_client(client):
+            await asyncio.sleep(10)
+
+        mocker.patch.object(RoomTimer, "get_by_client", get_by_client)
+        restores = [
+            durable_timers.restore_in_background(client)
+            for client in ("@bot1:foo.com", "@bot2:foo.com")
+        ]
+        assert Util.get_tasks_by_name("@bot1:foo.com/restore_timers") is restores[0]
+
+        await Flow().load_flow(
+            flow_mxid="@bot1:foo.com", content=Util.flow_example(flow_index=0), config=config
+        )
+        await asyncio.sleep(0)
+
+        assert restores[0].cancelled()
+        assert not restores[1].cancelled()
+        restores[1].cancel()
@@ -0,0 +1,67 @@
+import pytest
+
+
+def stored_event(number: int):
+    return ("NODE", f'{{"number": {number}}}'.encode(), None, None)
+
+
+class TestEventStorage:
+    def test_wal(self, event_storage):
+        event_storage._db.execute("PRAGMA journal_mode")
+        assert event_storage._db.fetchone()[0] == "wal"
+
+    @pytest.mark.asyncio
+    async def test_insert_events(self, event_storage):
+        await event_storage.insert_events([stored_event(number) for number in range(3)])
+        await event_storage.insert_events([stored_event(3)], akn=True)
+
+        events = await event_storage.get_events()
+        assert [event["event"] for event in events] == [
+            b'{"number": 0}',
+            b'{"number": 1}',
+            b'{"number": 2}',
+        ]
+        assert all(event["event_type"] == "NODE" for event in events)
+        # The acknowledged events are not pending
+        assert event_storage.backlog == 3
+
+    @pytest.mark.asyncio
+    async def test_get_events_by_pages(self, event_storage):
+        await event_storage.insert_events([stored_event(number) for number in range(5)])
+
+        first_page = await event_storage.get_events(limit=2)
+        second_page = await event_storage.get_events(after_id=first_page[-1]["id"], limit=2)
+        last_page = await event_storage.get_events(after_id=second_page[-1]["id"], limit=2)
+
+        assert [len(page) for page in (first_page, second_page, last_page)] == [2, 2, 1]
+        assert [event["id"] for event in first_page + second_page + last_page] == sorted(
+            event["id"] for event in await event_storage.get_events()
+        )
+
+    @pytest.mark.asyncio
+    async def test_update_and_delete_events(self, event_storage):
+        await event_storage.insert_events([stored_event(number) for number in range(4)])
+        ids = [event["id"] for event in await event_storage.get_events()]
+
+        await event_storage.update_events(ids[:2], True)
+        assert event_storage.backlog == 2
+        assert [event["id"] for event in await event_storage.get_events()] == ids[2:]
+
+        await event_storage.delete_events(ids[2:])
+        assert event_storage.backlog == 0
+        assert await event_storage.get_events() == []
+
+        event_storage._db.execute("SELECT COUNT(*) FROM event")
+        assert event_storage._db.fetchone()[0] == 2
+
+    @pytest.mark.asyncio
+    async def test_backlog_is_counted_on_startup(self, event_storage, tmp_path):
+        await event_storage.insert_events([stored_event(number) for number in range(3)])
+        await event_storage.insert_events([stored_event(3)], akn=True)
+        event_storage._conn.close()
+        event_storage._conn = event_storage._db = None
+        event_storage.backlog = 0
+
+        event_storage.init_sqlite_db(str(tmp_path / "events.db"))
+
+        assert event_storage.backlog == 3
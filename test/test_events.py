@@ -0,0 +1,499 @@
+import asyncio
+from copy import deepcopy
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from menuflow.events import (
+    EventCodec,
+    EventFileSink,
+    EventPipeline,
+    EventPolicy,
+    MenuflowNodeEvents,
+    NatsPublisher,
+    VariablesDelta,
+    apply_variables_delta,
+)
+from menuflow.utils import Nodes
+
+
+class TestVariablesDelta:
+    @pytest.fixture(autouse=True)
+    def clean_states(self):
+        VariablesDelta.states.clear()
+
+    def test_diff(self):
+        previous = {"room": {"a": 1, "b": 2}, "route": {"c": 3}, "flow": {"d": 4}}
+        current = {"room": {"a": 1, "b": 5, "e": 6}, "route": {}}
+
+        changed, removed = VariablesDelta.diff(previous, current)
+
+        assert changed == {"room": {"b": 5, "e": 6}}
+        assert removed == [["flow"], ["route", "c"]]
+
+    def test_build_snapshots(self):
+        variables = {"room": {"a": 1}}
+        events = [VariablesDelta.build("!room:foo.com", variables, 3) for _ in range(4)]
+
+        assert [event["sequence"] for event in events] == [1, 2, 3, 4]
+        assert [event["snapshot"] for event in events] == [True, False, False, True]
+        assert events[1]["variables"] == {}
+
+    def test_max_rooms(self, monkeypatch):
+        monkeypatch.setattr(VariablesDelta, "max_rooms", 3)
+        for number in range(10):
+            VariablesDelta.build(f"!room{number}:foo.com", {"room": {"a": 1}}, 50)
+
+        assert list(VariablesDelta.states) == [
+            "!room7:foo.com",
+            "!room8:foo.com",
+            "!room9:foo.com",
+        ]
+
+        # A room used again is the last one to be removed
+        VariablesDelta.build("!room7:foo.com", {"room": {"a": 1}}, 50)
+        VariablesDelta.build("!room10:foo.com", {"room": {"a": 1}}, 50)
+        assert list(VariablesDelta.states) == [
+            "!room9:foo.com",
+            "!room7:foo.com",
+            "!room10:foo.com",
+        ]
+
+    def test_rebuild_variables(self):
+        steps = [
+            {"room": {"a": 1}, "route": {"b": 2}},
+            {"room": {"a": 1, "c": [1, 2]}, "route": {"b": 2}},
+            {"room": {"c": [1, 2, 3]}, "route": {"b": 2}},
+            {"room": {"c": [1, 2, 3]}},
+        ]
+
+        rebuilt = {}
+        variables = {}
+        for step in steps:
+            # The variables of the room are modified in place
+            variables.clear()
+            variables.update(deepcopy(step))
+            event = VariablesDelta.build("!room:foo.com", variables, 50)
+            rebuilt = apply_variables_delta(rebuilt, event)
+            assert rebuilt == step
+
+    def test_only_changed_scopes_are_copied(self):
+        variables = {"room": {"a": [1]}, "route": {"b": 2}, "flow": 1}
+        VariablesDelta.build("!room:foo.com", variables, 50)
+        route_copy = VariablesDelta.states["!room:foo.com"].variables["route"]
+
+        variables["room"]["a"].append(2)
+        variables["flow"] = {"c": 3}
+        del variables["route"]["b"]
+        event = VariablesDelta.build("!room:foo.com", variables, 50)
+
+        assert event["variables"] == {"room": {"a": [1, 2]}, "flow": {"c": 3}}
+        assert event["removed_variables"] == [["route", "b"]]
+        variables["room"]["a"].append(3)
+        state = VariablesDelta.states["!room:foo.com"]
+        assert state.variables == {"room": {"a": [1, 2]}, "route": {}, "flow": {"c": 3}}
+        assert state.variables["route"] is route_copy
+
+    @pytest.mark.asyncio
+    async def test_forget_on_clean_up(self, room):
+        room.cancel_timer = AsyncMock()
+        room.route.clean_up = AsyncMock()
+        VariablesDelta.build(room.room_id, {"room": {}}, 50)
+
+        await room.clean_up()
+
+        assert room.room_id not in VariablesDelta.states
+        assert VariablesDelta.build(room.room_id, {"room": {}}, 50)["snapshot"]
+
+
+class TestEventCodec:
+    event = {"event_type": "NODE", "room_id": "!room:foo.com", "variables": {"a": "b" * 1024}}
+
+    @pytest.fixture
+    def codec(self, monkeypatch):
+        monkeypatch.setattr(EventCodec, "serializer", "json")
+        monkeypatch.setattr(EventCodec, "compression", "none")
+        monkeypatch.setattr(EventCodec, "min_size", 512)
+        return EventCodec
+
+    def test_default_format_has_no_headers(self, codec):
+        payload, content_encoding = codec.compress(codec.dumps(self.event))
+
+        assert content_encoding is None
+        assert codec.headers(codec.content_type(), content_encoding) == {}
+        assert codec.decode(payload) == self.event
+
+    def test_gzip(self, codec, monkeypatch):
+        monkeypatch.setattr(EventCodec, "compression", "gzip")
+        serialized = codec.dumps(self.event)
+        payload, content_encoding = codec.compress(serialized)
+
+        assert content_encoding == "gzip"
+        assert len(payload) < len(serialized)
+        assert codec.headers(codec.content_type(), content_encoding) == {
+            "Content-Encoding": "gzip"
+        }
+        assert codec.decode(payload, content_encoding=content_encoding) == self.event
+
+    def test_small_payloads_are_not_compressed(self, codec, monkeypatch):
+        monkeypatch.setattr(EventCodec, "compression", "gzip")
+        payload, content_encoding = codec.compress(codec.dumps({"event_type": "NODE"}))
+
+        assert content_encoding is None
+        assert codec.decode(payload) == {"event_type": "NODE"}
+
+    def test_msgpack_zstd(self, codec, monkeypatch):
+        pytest.importorskip("msgpack")
+        zstandard = pytest.importorskip("zstandard")
+        monkeypatch.setattr(EventCodec, "serializer", "msgpack")
+        monkeypatch.setattr(EventCodec, "compression", "zstd")
+        monkeypatch.setattr(EventCodec, "_zstd_compressor", zstandard.ZstdCompressor())
+        payload, content_encoding = codec.compress(codec.dumps(self.event))
+        headers = codec.headers(codec.content_type(), content_encoding)
+
+        assert headers == {"Content-Type": "application/msgpack", "Content-Encoding": "zstd"}
+        assert codec.decode(payload, headers["Content-Type"], content_encoding) == self.event
+
+
+class TestEventFileSink:
+    @pytest.fixture
+    def sink(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            EventFileSink,
+            "config",
+            {
+                "events.file.path": str(tmp_path / "room_events.txt"),
+                "events.file.buffer_size": 1024,
+                "events.file.max_size": 100,
+                "events.file.max_age": 0,
+                "events.file.compress": True,
+                "events.file.backup_count": 2,
+                "events.file.fsync": "always",
+                "events.file.fsync_interval": 5,
+            },
+        )
+        yield EventFileSink
+        EventFileSink._close()
+
+    @pytest.mark.asyncio
+    async def test_write(self, sink, tmp_path):
+        await sink.write(['{"a": 1}', '{"a": 2}'])
+        await sink.close()
+
+        assert (tmp_path / "room_events.txt").read_text() == '{"a": 1}\n\n{"a": 2}\n\n'
+
+    @pytest.mark.asyncio
+    async def test_rotation(self, sink, tmp_path):
+        for i in range(5):
+            await sink.write([f'{{"a": "{"b" * 100}", "i": {i}}}'])
+        await sink.close()
+
+        rotated = sorted(path.name for path in tmp_path.glob("room_events.txt.*"))
+        assert len(rotated) == 2
+        assert all(name.endswith(".gz") for name in rotated)
+        assert '"i": 4' in (tmp_path / "room_events.txt").read_text()
+
+
+def node_event(number: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        event="NodeEntry",
+        event_type="NODE",
+        serialize=lambda: {"event_type": "NODE", "number": number},
+    )
+
+
+class TestEventPipeline:
+    @pytest.fixture
+    def pipeline(self, monkeypatch):
+        monkeypatch.setattr(
+            EventPipeline,
+            "config",
+            {
+                "events.queue.max_size": 100,
+                "events.queue.batch_size": 3,
+                "events.queue.flush_interval": 0.02,
+                "events.queue.full_policy": "spill",
+            },
+        )
+        monkeypatch.setattr(EventPipeline, "stats", {"dropped": 0, "spilled": 0})
+        monkeypatch.setattr(EventPipeline, "_batch", [])
+        monkeypatch.setattr(EventPipeline, "_flush_task", None)
+        monkeypatch.setattr(EventCodec, "serializer", "json")
+        monkeypatch.setattr(EventCodec, "compression", "none")
+        flushed = []
+
+        async def flush(batch):
+            await asyncio.sleep(0.01)
+            flushed.append([EventCodec.loads(event)["number"] for _, event in batch])
+
+        monkeypatch.setattr(EventPipeline, "flush", flush)
+        monkeypatch.setattr(EventPipeline, "flushed", flushed, raising=False)
+        monkeypatch.setattr(EventPipeline, "queue", None)
+        monkeypatch.setattr(EventPipeline, "_task", None)
+        return EventPipeline
+
+    @pytest.mark.asyncio
+    async def test_batches(self, pipeline):
+        pipeline.start()
+        for number in range(7):
+            await pipeline.put(node_event(number))
+        await asyncio.sleep(0.1)
+        await pipeline.stop()
+
+        assert pipeline.flushed == [[0, 1, 2], [3, 4, 5], [6]]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("policy", ["spill", "drop"])
+    async def test_queue_full(self, pipeline, monkeypatch, policy):
+        sqlite_db = MagicMock(insert_events=AsyncMock())
+        monkeypatch.setattr("menuflow.events.event_pipeline.sqlite_db", sqlite_db)
+        pipeline.config["events.queue.full_policy"] = policy
+        monkeypatch.setattr(EventPipeline, "queue", asyncio.Queue(maxsize=1))
+        monkeypatch.setattr(EventPipeline, "_task", MagicMock())
+
+        await pipeline.put(node_event(0))
+        await pipeline.put(node_event(1))
+
+        assert pipeline.queue.qsize() == 1
+        if policy == "spill":
+            assert pipeline.stats == {"dropped": 0, "spilled": 1}
+            (stored_events,), _ = sqlite_db.insert_events.await_args
+            assert [event_type for event_type, *_ in stored_events] == ["NODE"]
+        else:
+            assert pipeline.stats == {"dropped": 1, "spilled": 0}
+            sqlite_db.insert_events.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_the_queue(self, pipeline):
+        pipeline.config["events.queue.flush_interval"] = 1
+        pipeline.start()
+        for number in range(4):
+            await pipeline.put(node_event(number))
+        # A batch is being published and the next one is being collected
+        await asyncio.sleep(0.005)
+        await pipeline.put(node_event(4))
+
+        await pipeline.stop()
+
+        assert pipeline.flushed == [[0, 1, 2], [3, 4]]
+        assert pipeline.queue.empty()
+
+
+class TestReplayFromStorage:
+    @pytest.fixture
+    def storage(self, event_storage, monkeypatch):
+        monkeypatch.setattr("menuflow.events.event_pipeline.sqlite_db", event_storage)
+        return event_storage
+
+    @pytest.fixture
+    def pipeline(self, storage, monkeypatch):
+        monkeypatch.setattr(
+            EventPipeline,
+            "config",
+            {
+                "nats.subject": "menuflow",
+                "events.sqlite_action": "buffer",
+                "events.replay.page_size": 4,
+                "events.replay.concurrency": 2,
+                "events.replay.rate": 200,
+            },
+        )
+        monkeypatch.setattr(
+            EventPipeline,
+            "replay_stats",
+            {"running": False, "pages": 0, "replayed": 0, "failed": 0, "last_id": 0},
+        )
+        return EventPipeline
+
+    @staticmethod
+    def jetstream(fail_numbers=()):
+        jetstream = SimpleNamespace(published=[], in_flight=0, max_in_flight=0)
+
+        async def publish(subject, payload, headers):
+            jetstream.in_flight += 1
+            jetstream.max_in_flight = max(jetstream.max_in_flight, jetstream.in_flight)
+            await asyncio.sleep(0.001)
+            jetstream.in_flight -= 1
+            number = EventCodec.loads(payload)["number"]
+            if number in fail_numbers:
+                raise TimeoutError()
+            jetstream.published.append((subject, number))
+
+        jetstream.publish = publish
+        return jetstream
+
+    @staticmethod
+    async def store(storage, count: int):
+        await storage.insert_events(
+            [
+                ("NODE", EventCodec.dumps({"event_type": "NODE", "number": number}), None, None)
+                for number in range(count)
+            ]
+        )
+
+    @pytest.mark.asyncio
+    async def test_replay_by_pages(self, pipeline, storage):
+        await self.store(storage, 10)
+        jetstream = self.jetstream()
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+
+        await pipeline.publish_from_storage(jetstream)
+
+        # 10 events at 200 events per second
+        assert loop.time() - started_at >= 0.045
+        assert sorted(jetstream.published) == [("menuflow.NODE", number) for number in range(10)]
+        assert jetstream.max_in_flight == 2
+        assert storage.backlog == 0
+        assert await storage.get_events() == []
+        assert pipeline.replay_stats == {
+            "running": False,
+            "pages": 3,
+            "replayed": 10,
+            "failed": 0,
+            "last_id": 10,
+        }
+
+    @pytest.mark.asyncio
+    async def test_replay_stops_at_a_failed_page(self, pipeline, storage):
+        await self.store(storage, 10)
+        jetstream = self.jetstream(fail_numbers=(5,))
+
+        await pipeline.publish_from_storage(jetstream)
+
+        assert len(jetstream.published) == 7
+        assert [event["id"] for event in await storage.get_events()] == [6, 9, 10]
+        assert storage.backlog == 3
+        assert pipeline.replay_stats["pages"] == 2
+        assert pipeline.replay_stats["failed"] == 1
+        assert pipeline.replay_stats["last_id"] == 8
+
+    @pytest.mark.asyncio
+    async def test_replay_marks_events(self, pipeline, storage):
+        pipeline.config["events.sqlite_action"] = "all"
+        await self.store(storage, 5)
+
+        await pipeline.publish_from_storage(self.jetstream())
+
+        assert await storage.get_events() == []
+        storage._db.execute("SELECT COUNT(*) FROM event WHERE akn = ?", (True,))
+        assert storage._db.fetchone()[0] == 5
+
+
+class TestNatsPublisher:
+    @pytest.fixture
+    def publisher(self, monkeypatch):
+        monkeypatch.setattr(
+            NatsPublisher,
+            "config",
+            {
+                # Nothing listens on this port
+                "nats.address": "nats://127.0.0.1:1",
+                "nats.user": None,
+                "nats.password": None,
+                "nats.max_reconnect_attempts": -1,
+                "nats.reconnect_time_wait": 60,
+            },
+        )
+        monkeypatch.setattr(NatsPublisher, "_nats_conn", None)
+        monkeypatch.setattr(NatsPublisher, "_jetstream_conn", None)
+        monkeypatch.setattr(NatsPublisher, "_lock", None)
+        monkeypatch.setattr(NatsPublisher, "_retry_at", 0)
+        return NatsPublisher
+
+    @pytest.mark.asyncio
+    async def test_down_at_startup(self, publisher, mocker):
+        connection = mocker.spy(publisher, "nats_jetstream_connection")
+
+        assert await asyncio.wait_for(publisher.get_connection(), 5) == (None, None)
+        # The next attempt waits for reconnect_time_wait
+        assert await publisher.get_connection() == (None, None)
+        assert connection.call_count == 1
+        assert not publisher._lock.locked()
+
+    @pytest.mark.asyncio
+    async def test_reconnects_once_connected(self, publisher, mocker):
+        connect = mocker.patch("menuflow.events.nats_publisher.NATSClient.connect")
+        setup_stream = mocker.patch.object(publisher, "setup_stream")
+        mocker.patch.object(publisher, "_stream_ready", False)
+
+        nats, jetstream = await publisher.get_connection()
+
+        assert connect.await_args.kwargs["allow_reconnect"] is False
+        assert connect.await_args.kwargs["max_reconnect_attempts"] == 1
+        assert nats.options["allow_reconnect"] is True
+        assert nats.options["max_reconnect_attempts"] == -1
+        assert nats.options["reconnect_time_wait"] == 60
+        assert jetstream is not None
+        setup_stream.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_events_are_buffered_while_down(
+        self, publisher, event_storage, monkeypatch, mocker
+    ):
+        monkeypatch.setattr("menuflow.events.event_pipeline.sqlite_db", event_storage)
+        monkeypatch.setattr(
+            EventPipeline, "config", {"nats.enabled": True, "events.write_to_file": False}
+        )
+        monkeypatch.setattr(EventPipeline, "stats", {"batches": 0})
+        monkeypatch.setattr(EventCodec, "serializer", "json")
+        monkeypatch.setattr(EventCodec, "compression", "none")
+        events = [node_event(number) for number in range(3)]
+
+        await asyncio.wait_for(
+            EventPipeline.flush(
+                [(event, EventCodec.dumps(event.serialize())) for event in events]
+            ),
+            5,
+        )
+
+        assert event_storage.backlog == 3
+
+
+class TestEventPolicy:
+    @pytest.fixture
+    def policy(self, monkeypatch):
+        monkeypatch.setattr(EventPolicy, "counters", {})
+        monkeypatch.setattr(EventPolicy, "_rules_by_node", {})
+        monkeypatch.setattr(
+            EventPolicy,
+            "rules",
+            [
+                EventPolicy.compile_rule({"room": "^!test-", "action": "drop"}),
+                EventPolicy.compile_rule({"node_type": "message", "action": "aggregate"}),
+                EventPolicy.compile_rule({"node_id": "menu", "action": "sample", "rate": 0}),
+            ],
+        )
+        return EventPolicy
+
+    @pytest.mark.parametrize(
+        "room_id, node_type, node_id, expected",
+        [
+            ("!test-1:foo.com", "switch", "start", (False, None)),
+            ("!room:foo.com", "message", "start", (False, None)),
+            ("!room:foo.com", "switch", "menu", (False, 0.0)),
+            ("!room:foo.com", "switch", "start", (True, None)),
+        ],
+    )
+    def test_evaluate(self, policy, room_id, node_type, node_id, expected):
+        result = policy.evaluate(
+            MenuflowNodeEvents.NodeEntry, room_id, node_type=node_type, node_id=node_id
+        )
+        assert result == expected
+
+    def test_aggregate(self, policy):
+        for _ in range(3):
+            policy.evaluate(
+                MenuflowNodeEvents.NodeEntry,
+                "!room:foo.com",
+                node_type=Nodes.message,
+                node_id="start",
+                o_connection="next",
+            )
+
+        assert policy.counters == {("NodeEntry", "message", "start", "next"): 3}
+
+    def test_invalid_action(self):
+        with pytest.raises(ValueError):
+            EventPolicy.compile_rule({"action": "unknown"})
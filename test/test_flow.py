@@ -1,10 +1,14 @@
+import asyncio
+
 import nest_asyncio
 import pytest
 
 nest_asyncio.apply()
 
+from menuflow.config import Config
 from menuflow.flow import Flow
 from menuflow.room import Room
+from menuflow.utils import TimerService, Util
 
 
 # @pytest.mark.asyncio
@@ -32,3 +36,23 @@ class TestFlow:
         assert sample_flow_1.nodes != sample_flow_2.nodes
         assert sample_flow_1.data != sample_flow_2.data
         assert sample_flow_1.get_node_by_id("input-1") != sample_flow_2.get_node_by_id("input-1")
+
+    @pytest.mark.asyncio
+    async def test_reload_cancels_only_its_timers(self, config: Config, monkeypatch):
+        monkeypatch.setattr(TimerService, "_task", None)
+        monkeypatch.setattr(TimerService, "timers", {})
+        monkeypatch.setattr(TimerService, "_heap", [])
+        fired = []
+
+        async def callback(timer):
+            fired.append(timer.key)
+
+        TimerService.schedule("@bot1:foo.com/!a:foo.com", 0.01, callback)
+        TimerService.schedule("@bot2:foo.com/!a:foo.com", 0.01, callback)
+
+        await Flow().load_flow(
+            flow_mxid="@bot1:foo.com", content=Util.flow_example(flow_index=0), config=config
+        )
+        await asyncio.sleep(0.03)
+
+        assert fired == ["@bot2:foo.com/!a:foo.com"]
@@ -0,0 +1,58 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from menuflow.config import Config
+from menuflow.http_pool import HTTPPool
+
+
+@pytest.fixture
+def http_pool(config: Config, monkeypatch: pytest.MonkeyPatch):
+    config["menuflow.http_pools.upstreams"] = {"127.0.0.1": {"limit": 5}}
+    monkeypatch.setattr(HTTPPool, "matrix_session", None)
+    monkeypatch.setattr(HTTPPool, "nodes_session", None)
+    monkeypatch.setattr(HTTPPool, "upstream_sessions", {})
+    monkeypatch.setattr(HTTPPool, "stats_by_pool", {})
+    HTTPPool.init_cls(config)
+    return HTTPPool
+
+
+class TestHTTPPool:
+    @pytest.mark.asyncio
+    async def test_session_by_destination(self, http_pool: HTTPPool):
+        upstream = http_pool.get_session("http://127.0.0.1:8080/api")
+        nodes = http_pool.get_session("https://example.com/api")
+
+        assert upstream is http_pool.upstream_sessions["127.0.0.1"]
+        assert nodes is http_pool.nodes_session
+        assert http_pool.get_session("not a url") is nodes
+        assert http_pool.get_session("http://127.0.0.1/other") is upstream
+        assert http_pool.stats()["127.0.0.1"]["limit"] == 5
+        await http_pool.close()
+
+    @pytest.mark.asyncio
+    async def test_stats_survive_recreated_sessions(self, http_pool: HTTPPool):
+        async def handler(request: web.Request) -> web.Response:
+            return web.Response(text="ok")
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        async with TestServer(app, host="127.0.0.1") as server:
+            url = str(server.make_url("/"))
+            for _ in range(2):
+                async with http_pool.get_session(url).get(url) as response:
+                    assert await response.text() == "ok"
+
+            stats = http_pool.stats()["127.0.0.1"]
+            assert stats["active_requests"] == 0
+            assert stats["connections_created"] == 1
+            assert stats["connections_reused"] == 1
+
+            await http_pool.close()
+            async with http_pool.get_session(url).get(url) as response:
+                await response.read()
+
+        stats = http_pool.stats()["127.0.0.1"]
+        assert stats["connections_created"] == 2
+        assert stats["connections_reused"] == 1
+        await http_pool.close()
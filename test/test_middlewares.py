@@ -0,0 +1,90 @@
+import asyncio
+from collections import defaultdict
+from time import time
+
+import pytest
+from pytest_mock import MockerFixture
+
+from menuflow.config import Config
+from menuflow.middlewares import HTTPMiddleware
+from menuflow.repository.middlewares.http import HTTPMiddleware as HTTPMiddlewareModel
+from menuflow.room import Room
+
+
+@pytest.fixture
+def middleware(
+    config: Config, room: Room, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch
+) -> HTTPMiddleware:
+    monkeypatch.setattr(HTTPMiddleware, "config", config, raising=False)
+    monkeypatch.setattr(HTTPMiddleware, "tokens", {})
+    monkeypatch.setattr(HTTPMiddleware, "_token_locks", defaultdict(asyncio.Lock))
+    monkeypatch.setattr(HTTPMiddleware, "_token_refresh_tasks", {})
+    middleware = HTTPMiddleware(
+        HTTPMiddlewareModel(id="api_jwt", type="jwt", url="https://api.example.com"),
+        room=room,
+        default_variables={},
+    )
+    tokens = iter(f"token-{n}" for n in range(1, 100))
+
+    async def auth_request():
+        await asyncio.sleep(0.01)
+        middleware.tokens[middleware.id] = (next(tokens), time() + 3600)
+
+    mocker.patch.object(middleware, "auth_request", side_effect=auth_request)
+    return middleware
+
+
+class TestHTTPMiddlewareTokens:
+    @pytest.mark.asyncio
+    async def test_cached_token(self, middleware: HTTPMiddleware):
+        assert await middleware.get_token() == "token-1"
+        assert await middleware.get_token() == "token-1"
+        middleware.auth_request.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_expired_token(self, middleware: HTTPMiddleware):
+        middleware.tokens[middleware.id] = ("old", time() - 1)
+
+        assert await middleware.get_token() == "token-1"
+        middleware.auth_request.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_refresh_margin(self, middleware: HTTPMiddleware):
+        middleware.tokens[middleware.id] = ("old", time() + 30)
+
+        # The token is about to expire, it is returned while it is refreshed in background
+        assert await middleware.get_token() == "old"
+        await asyncio.sleep(0)
+        # The refresh is in progress, the requests do not wait for it
+        assert middleware.auth_request.await_count == 1
+        assert await middleware.get_token() == "old"
+        await asyncio.sleep(0.05)
+
+        assert await middleware.get_token() == "token-1"
+        middleware.auth_request.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_single_flight_refresh(self, middleware: HTTPMiddleware):
+        tokens = await asyncio.gather(*(middleware.get_token() for _ in range(10)))
+
+        assert tokens == ["token-1"] * 10
+        middleware.auth_request.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_token_already_replaced(self, middleware: HTTPMiddleware):
+        assert await middleware.get_token() == "token-1"
+        await asyncio.gather(*(middleware.refresh_token(stale_token="token-1") for _ in range(5)))
+
+        assert await middleware.get_token() == "token-2"
+        middleware.auth_request.assert_awaited()
+        assert middleware.auth_request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_valid_token(self, middleware: HTTPMiddleware):
+        middleware.tokens[middleware.id] = ("old", time() + 3600)
+        middleware.auth_request.side_effect = None
+
+        await middleware.refresh_token(stale_token="old")
+
+        assert middleware.tokens[middleware.id][0] == "old"
+        assert await middleware.get_token() == "old"
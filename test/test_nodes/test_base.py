@@ -1,7 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
 import nest_asyncio
+import pytest
+from pytest_mock import MockerFixture
 
 nest_asyncio.apply()
 
+from menuflow.jinja.compiled_field import CompiledFields, FieldKind
 from menuflow.nodes import Base, convert_to_bool
 
 
@@ -40,3 +46,145 @@ class TestBase:
                 "bar": "{{ foo }}",
             }
         )
+
+    @pytest.mark.parametrize(
+        "data, kind",
+        [
+            ("request-1", FieldKind.LITERAL),
+            ({"Content-Type": "application/json"}, FieldKind.LITERAL),
+            ("{{ route.customer_name }}", FieldKind.VARIABLE),
+            ("{{route.customer.name}}", FieldKind.VARIABLE),
+            ("{{ route.customer_name|upper }}", FieldKind.TEMPLATE),
+            ("Hello {{ route.customer_name }}", FieldKind.TEMPLATE),
+            ("{% if route.ok %}yes{% endif %}", FieldKind.TEMPLATE),
+            ({"name": "{{ route.customer_name }}"}, FieldKind.TEMPLATE),
+        ],
+    )
+    def test_field_kind(self, data, kind: str):
+        assert CompiledFields.get(data).kind == kind
+
+    def test_render_literal_once(self, base: Base, mocker: MockerFixture):
+        CompiledFields.clear()
+        render_template = mocker.spy(Base, "_render_template")
+        headers = base.render_data({"Content-Type": "application/json", "Retry": "true"})
+        headers["Authorization"] = "Bearer token"
+
+        assert base.render_data({"Content-Type": "application/json", "Retry": "true"}) == {
+            "Content-Type": "application/json",
+            "Retry": True,
+        }
+        assert render_template.call_count == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("Tom & <Jerry>", "Tom &amp; &lt;Jerry&gt;"),
+            ("5", 5),
+            ("true", True),
+            ("line 1\nline 2", "line 1\\nline 2"),
+            (None, "None"),
+        ],
+    )
+    async def test_render_variable(self, base: Base, value, expected):
+        """The references to a variable are rendered as Jinja does it"""
+        await base.room.set_variable("route.customer_name", value)
+
+        assert base.render_data("{{ route.customer_name }}") == expected
+        assert base.render_data("{{ route.missing }}") == ""
+
+    @pytest.mark.asyncio
+    async def test_render_native(self, base: Base, mocker: MockerFixture):
+        mocker.patch.object(Base, "render_mode", "native")
+        await base.room.set_variable("route.age", 5)
+        await base.room.set_variable("route.customer", {"name": "Tom & Jerry"})
+
+        assert base.render_data("{{ route.age }}") == 5
+        assert base.render_data("{{ route.age * 2 }}") == 10
+        assert base.render_data("{{ route.age > 3 }}") is True
+        assert base.render_data("{{ route.customer }}") == {"name": "Tom & Jerry"}
+        assert base.render_data("{{ route.missing }}") is None
+        assert base.render_data("Age: {{ route.age }}") == "Age: 5"
+        # The texts without templates are not converted
+        assert base.render_data("true") == "true"
+        assert base.render_data(
+            {"age": "{{ route.age }}", "names": ["{{ route.customer.name }}"], "retry": 3}
+        ) == {"age": 5, "names": ["Tom & Jerry"], "retry": 3}
+
+    def test_node_render_mode(self, base: Base):
+        assert not base.native_rendering
+        base.content = {"id": "node", "render_mode": "native"}
+        assert base.native_rendering
+
+    @pytest.mark.asyncio
+    async def test_rendered_fields_are_reused(self, base: Base, mocker: MockerFixture):
+        render_template = mocker.spy(Base, "_render_template")
+        await base.room.set_variable("route.customer", "Tom")
+
+        assert base.render_data("Hello {{ route.customer|upper }}") == "Hello TOM"
+        assert base.render_data("Hello {{ route.customer|upper }}") == "Hello TOM"
+        assert render_template.call_count == 1
+
+        # The fields are rendered again when the variables change
+        await base.room.set_variable("route.customer", "Jerry")
+        assert base.render_data("Hello {{ route.customer|upper }}") == "Hello JERRY"
+        assert render_template.call_count == 2
+
+    def test_rendered_values_are_copied(self, base: Base):
+        headers = base.render_data({"url": "{{ flow.cat_fatc_url }}"})
+        headers["Authorization"] = "Bearer token"
+        assert base.render_data({"url": "{{ flow.cat_fatc_url }}"}) == {
+            "url": "https://catfact.ninja/fact"
+        }
+
+    @pytest.mark.asyncio
+    async def test_render_size_limit(self, base: Base, mocker: MockerFixture):
+        mocker.patch.object(Base, "render_size", 10)
+        warn_render = mocker.spy(Base, "warn_render")
+        await base.room.set_variable("route.text", "x" * 20)
+
+        assert base.render_data("{{ route.text }}") is None
+        assert base.render_data("{{ route.text|lower }}") is None
+        assert base.render_data("{{ route.text[:5] }}") == "xxxxx"
+        assert warn_render.call_count == 2
+
+    def test_slow_template_warning(self, base: Base, mocker: MockerFixture):
+        mocker.patch.object(Base, "render_time", 0.000001)
+        warning = mocker.spy(base.log, "warning")
+
+        base.render_data("{% for i in range(1000) %}{{ i }}{% endfor %}")
+
+        render = warning.call_args.kwargs["extra"]["render"]
+        assert render["flow"] == "@foo:foo.com"
+        assert render["field"].startswith("{% for i in range(1000) %}")
+        assert render["elapsed"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_prerender_in_thread(self, base: Base, mocker: MockerFixture):
+        mocker.patch.object(Base, "_render_executor", ThreadPoolExecutor(max_workers=1))
+        render_field = mocker.spy(Base, "_render_field")
+        base.content = {"id": "node", "render_in_thread": True, "text": "{{ flow|length }}"}
+
+        await base.prerender("text")
+        assert render_field.call_count == 1
+        # The property reads the field rendered in the thread
+        assert base.render_data(base.content["text"]) == 1
+        assert render_field.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_prerender_timeout_is_not_overwritten(self, base: Base, mocker: MockerFixture):
+        executor = ThreadPoolExecutor(max_workers=1)
+        mocker.patch.object(Base, "_render_executor", executor)
+        mocker.patch.object(Base, "render_thread_timeout", 0.01)
+        mocker.patch.object(
+            Base, "_render_field", side_effect=lambda field, data: sleep(0.05) or 1
+        )
+        base.content = {"id": "node", "render_in_thread": True, "text": "{{ flow|length }}"}
+
+        await base.prerender("text")
+        assert base._rendered == {"{{ flow|length }}": None}
+
+        # The thread finishes after the timeout, the discarded value is kept
+        executor.shutdown(wait=True)
+        assert base._rendered == {"{{ flow|length }}": None}
+        assert base.render_data(base.content["text"]) is None
@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import nest_asyncio
+import pytest
+from pytest_mock import MockerFixture
+
+from menuflow.nodes import CheckTime
+from menuflow.nodes.check_time import CheckTimeSchedule
+from menuflow.room import Room
+
+nest_asyncio.apply()
+
+
+@pytest.fixture
+def schedule() -> CheckTimeSchedule:
+    return CheckTimeSchedule.compile(
+        "America/Bogota",
+        ("08:00-12:00", "13:00-18:00"),
+        ("mon-fri",),
+        ("*",),
+        ("jan-nov",),
+        ("12-25", "2024-04-01"),
+    )
+
+
+class TestCheckTimeSchedule:
+    @pytest.mark.parametrize(
+        "now, expected",
+        [
+            # Wednesday
+            (datetime(2024, 4, 3, 8, 0), True),
+            (datetime(2024, 4, 3, 11, 59), True),
+            (datetime(2024, 4, 3, 12, 0), False),
+            (datetime(2024, 4, 3, 12, 30), False),
+            (datetime(2024, 4, 3, 17, 59), True),
+            (datetime(2024, 4, 3, 7, 59), False),
+            # Saturday
+            (datetime(2024, 4, 6, 10, 0), False),
+            # Holiday of a single year
+            (datetime(2024, 4, 1, 10, 0), False),
+            (datetime(2025, 4, 1, 10, 0), True),
+            # December is not in the months
+            (datetime(2024, 12, 4, 10, 0), False),
+        ],
+    )
+    def test_match(self, schedule: CheckTimeSchedule, now: datetime, expected: bool):
+        assert schedule.match(now) is expected
+
+    def test_yearly_holiday(self):
+        schedule = CheckTimeSchedule.compile("UTC", ("*",), ("*",), ("*",), ("*",), ("12-25",))
+        assert not schedule.match(datetime(2023, 12, 25, 10, 0))
+        assert schedule.match(datetime(2023, 12, 26, 10, 0))
+
+    def test_days_of_month(self):
+        schedule = CheckTimeSchedule.compile("UTC", ("*",), ("*",), ("8-12", "20"), ("*",))
+        assert [day for day in range(1, 32) if schedule.days_of_month >> day & 1] == [
+            8,
+            9,
+            10,
+            11,
+            12,
+            20,
+        ]
+
+    def test_compiled_once(self, schedule: CheckTimeSchedule):
+        assert (
+            CheckTimeSchedule.compile(
+                "America/Bogota",
+                ("08:00-12:00", "13:00-18:00"),
+                ("mon-fri",),
+                ("*",),
+                ("jan-nov",),
+                ("12-25", "2024-04-01"),
+            )
+            is schedule
+        )
+
+
+class TestCheckTimeNode:
+    @pytest.fixture
+    def check_time(self, room: Room) -> CheckTime:
+        return CheckTime(
+            {
+                "id": "check-time-1",
+                "type": "check_time",
+                "timezone": "UTC",
+                "time_ranges": ["08:00-12:00"],
+                "days_of_week": ["mon-fri"],
+                "days_of_month": ["*"],
+                "months": ["*"],
+                "cases": [
+                    {"id": "True", "o_connection": "m1"},
+                    {"id": "False", "o_connection": "m2"},
+                ],
+            },
+            room=room,
+            default_variables={},
+        )
+
+    def test_static_schedule_is_not_rendered(self, check_time: CheckTime, mocker: MockerFixture):
+        render_data = mocker.patch.object(CheckTime, "render_data")
+        assert check_time.is_static
+        assert check_time.schedule.match(datetime(2024, 4, 3, 9, 0))
+        render_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_dynamic_schedule(self, check_time: CheckTime):
+        check_time.content["time_ranges"] = ["{{ route.opening }}-12:00"]
+        await check_time.room.set_variable("opening", "10:00")
+
+        assert not check_time.is_static
+        assert not check_time.schedule.match(datetime(2024, 4, 3, 9, 0))
+        assert check_time.schedule.match(datetime(2024, 4, 3, 10, 0))
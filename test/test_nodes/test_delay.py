@@ -0,0 +1,118 @@
+import asyncio
+from time import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import nest_asyncio
+import pytest
+from pytest_mock import MockerFixture
+
+from menuflow.config import Config
+from menuflow.db.room_timer import RoomTimer
+from menuflow.db.route import RouteState
+from menuflow.durable_timers import DurableTimers
+from menuflow.flow import Flow
+from menuflow.menu import MenuClient
+from menuflow.nodes import Delay
+from menuflow.room import Room
+from menuflow.utils import TimerService, Util
+
+nest_asyncio.apply()
+
+
+@pytest.fixture
+def delay(room: Room, mocker: MockerFixture) -> Delay:
+    mocker.patch.object(Room, "save_timer")
+    mocker.patch.object(Room, "delete_timer")
+    mocker.patch.object(TimerService, "_task", None)
+    room.matrix_client.algorithm = AsyncMock()
+    yield Delay(
+        {"id": "delay-1", "type": "delay", "time": 0.01, "o_connection": "message-1"},
+        room=room,
+        default_variables={},
+    )
+    TimerService.cancel_all()
+
+
+class TestDelayNode:
+    @pytest.mark.asyncio
+    async def test_run_does_not_block(self, delay: Delay):
+        await delay.run()
+
+        assert delay.room.route.node_id == "delay-1"
+        assert delay.room.route.state == RouteState.DELAY
+        assert delay.room.timer_key in TimerService.timers
+        delay.room.save_timer.assert_awaited_once()
+        delay.room.matrix_client.algorithm.assert_not_called()
+
+        await asyncio.sleep(0.05)
+
+        assert delay.room.route.node_id == "message-1"
+        assert delay.room.route.state is None
+        delay.room.delete_timer.assert_awaited_once()
+        delay.room.matrix_client.algorithm.assert_awaited_once_with(room=delay.room)
+
+    @pytest.mark.asyncio
+    async def test_run_while_waiting(self, delay: Delay, mocker: MockerFixture):
+        schedule = mocker.patch.object(TimerService, "schedule")
+        delay.room.route.node_id = "delay-1"
+        delay.room.route.state = RouteState.DELAY
+
+        await delay.run()
+
+        schedule.assert_not_called()
+        assert delay.room.route.state == RouteState.DELAY
+
+    @pytest.mark.asyncio
+    async def test_resume_overdue_timer(self, delay: Delay):
+        delay.room.route.node_id = "delay-1"
+        delay.room.route.state = RouteState.DELAY
+
+        assert await delay.resume_timer({}, delay=-10)
+
+        assert delay.room.route.node_id == "message-1"
+        delay.room.matrix_client.algorithm.assert_awaited_once_with(room=delay.room)
+
+    @pytest.mark.asyncio
+    async def test_resume_timer_out_of_delay(self, delay: Delay):
+        assert not await delay.resume_timer({}, delay=10)
+        assert delay.room.timer_key not in TimerService.timers
+
+    @pytest.mark.asyncio
+    async def test_reload_during_delay(self, delay: Delay, config: Config, mocker: MockerFixture):
+        other_client_timer = AsyncMock()
+        TimerService.schedule("@other:foo.com/!foo:foo.com", 0.03, other_client_timer)
+        await delay.run()
+        # The timer saved by the delay node
+        room_timer = RoomTimer(
+            room_id=delay.room.room_id,
+            client=delay.room.bot_mxid,
+            kind="delay",
+            node_id="delay-1",
+            fire_at=time() + 0.03,
+        )
+
+        await Flow().load_flow(
+            flow_mxid=delay.room.bot_mxid, content=Util.flow_example(flow_index=0), config=config
+        )
+        assert delay.room.timer_key not in TimerService.timers
+        assert "@other:foo.com/!foo:foo.com" in TimerService.timers
+
+        mocker.patch.object(RoomTimer, "get_by_client", AsyncMock(return_value=[room_timer]))
+        mocker.patch.object(Room, "get_by_room_id", AsyncMock(return_value=delay.room))
+        matrix_handler = delay.room.matrix_client
+        matrix_handler.flow = SimpleNamespace(node=lambda room: delay)
+        mocker.patch.dict(
+            MenuClient.cache, {delay.room.bot_mxid: SimpleNamespace(matrix_handler=matrix_handler)}
+        )
+        DurableTimers.init_cls(config)
+        await DurableTimers.restore(client=delay.room.bot_mxid)
+
+        assert delay.room.timer_key in TimerService.timers
+        assert delay.room.route.state == RouteState.DELAY
+        await asyncio.sleep(0.06)
+
+        assert delay.room.route.node_id == "message-1"
+        assert delay.room.route.state is None
+        delay.room.matrix_client.algorithm.assert_awaited_once_with(room=delay.room)
+        other_client_timer.assert_awaited_once()
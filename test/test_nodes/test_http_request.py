@@ -0,0 +1,78 @@
+import nest_asyncio
+import pytest
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from menuflow.nodes import HTTPRequest
+from menuflow.utils import Util
+
+nest_asyncio.apply()
+
+
+def test_jsonpath_find():
+    data = {"data": {"user": {"name": "foo"}, "items": [{"id": 1}, {"id": 2}]}}
+
+    assert Util.jsonpath_find("data.user.name", data) == ["foo"]
+    assert Util.jsonpath_find("$.data.user.name", data) == ["foo"]
+    assert Util.jsonpath_find("data.user.age", data) == []
+    assert Util.jsonpath_find("data.items.id", data) == []
+    assert Util.jsonpath_find("data.items[*].id", data) == [1, 2]
+    assert isinstance(Util.compile_jsonpath("data.user.name"), tuple)
+    assert Util.compile_jsonpath("data.items[*].id") is Util.compile_jsonpath("data.items[*].id")
+
+
+class TestHTTPRequestNode:
+    def test_extract_variables(self, http_request: HTTPRequest):
+        assert http_request.extract_variables({"fact": "Cats sleep a lot", "length": 16}) == {
+            "route.cat_fact": "Cats sleep a lot"
+        }
+        assert http_request.extract_variables({"length": 16}) == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "body, content_type, charset, expected",
+        [
+            (b"plain text", "text/plain", None, "plain text"),
+            ("caf\u00e9".encode("latin-1"), "text/plain", "latin-1", "caf\u00e9"),
+            (b'{"fact": "foo"}', "application/json", None, {"fact": "foo"}),
+            (b"", "application/json", None, None),
+            (b"not json", "application/json", None, "not json"),
+        ],
+    )
+    async def test_read_response(
+        self, http_request: HTTPRequest, body: bytes, content_type: str, charset, expected
+    ):
+        async def handler(request: web.Request) -> web.Response:
+            return web.Response(body=body, content_type=content_type, charset=charset)
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        async with TestServer(app, host="127.0.0.1") as server, ClientSession() as session:
+            async with session.get(server.make_url("/")) as response:
+                text, data = await http_request.read_response(response)
+
+        assert data == expected
+        assert text == body.decode(charset or "utf-8")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunked", [False, True])
+    async def test_read_response_too_large(self, http_request: HTTPRequest, chunked: bool):
+        http_request.config["menuflow.limits.http_response_size"] = 10
+
+        async def handler(request: web.Request) -> web.StreamResponse:
+            if not chunked:
+                return web.Response(text="x" * 20)
+
+            response = web.StreamResponse()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            for _ in range(4):
+                await response.write(b"x" * 5)
+            return response
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        async with TestServer(app, host="127.0.0.1") as server, ClientSession() as session:
+            async with session.get(server.make_url("/")) as response:
+                with pytest.raises(ValueError, match="exceeds the limit of 10 bytes"):
+                    await http_request.read_response(response)
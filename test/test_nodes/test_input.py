@@ -1,8 +1,11 @@
 import nest_asyncio
 import pytest
 from mautrix.types import ImageInfo, MediaMessageEventContent, MessageType, TextMessageEventContent
+from pytest_mock import MockerFixture
 
+from menuflow.db.route import RouteState
 from menuflow.nodes import Input
+from menuflow.utils import TimerService
 
 nest_asyncio.apply()
 
@@ -54,3 +57,28 @@ class TestInputNode:
         assert input_media.room.route.node_id == "last-message"
         await input_media.input_media(content=MediaMessageEventContent())
         assert input_media.room.route.node_id == "input-3"
+
+    @pytest.mark.asyncio
+    async def test_resume_timer(self, input_text: Input, mocker: MockerFixture):
+        schedule = mocker.patch.object(TimerService, "schedule")
+        input_text.room.route.state = RouteState.INPUT
+
+        assert await input_text.resume_timer({"count": 2}, delay=5)
+        key, delay, callback = schedule.call_args.args
+        assert (key, delay, callback.keywords) == ("@foo:foo.com/!foo:foo.com", 5, {"count": 2})
+
+    @pytest.mark.asyncio
+    async def test_resume_overdue_timer(self, input_text: Input, mocker: MockerFixture):
+        run_now = mocker.patch.object(TimerService, "run_now")
+        input_text.room.route.state = RouteState.INPUT
+
+        assert await input_text.resume_timer({"count": 0}, delay=-30)
+        run_now.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_resume_timer_out_of_input(self, input_text: Input, mocker: MockerFixture):
+        schedule = mocker.patch.object(TimerService, "schedule")
+        input_text.room.route.state = RouteState.END
+
+        assert not await input_text.resume_timer({"count": 0}, delay=5)
+        schedule.assert_not_called()
@@ -0,0 +1,84 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import nest_asyncio
+import pytest
+from pytest_mock import MockerFixture
+
+from menuflow.db.route import RouteState
+from menuflow.nodes import InviteUser
+from menuflow.room import Room
+
+nest_asyncio.apply()
+
+
+@pytest.fixture
+def invite_user(room: Room, mocker: MockerFixture) -> InviteUser:
+    mocker.patch.object(Room, "delete_timer")
+    mocker.patch.object(InviteUser, "_update_menu")
+    mocker.patch.dict(InviteUser.stats, {"join": 0, "reject": 0, "timeout": 0})
+    room.matrix_client.kick_user = AsyncMock()
+    return InviteUser(
+        {
+            "id": "invite-1",
+            "type": "invite_user",
+            "invitee": "@agent:foo.com",
+            "timeout": 5,
+            "cases": [
+                {"id": "join", "o_connection": "m1"},
+                {"id": "reject", "o_connection": "m2"},
+                {"id": "timeout", "o_connection": "m3"},
+            ],
+        },
+        room=room,
+        default_variables={},
+    )
+
+
+class TestInviteUserNode:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("joined, case_id", [(True, "join"), (False, "reject")])
+    async def test_agent_answers(self, invite_user: InviteUser, joined: bool, case_id: str):
+        pending_invite = asyncio.get_running_loop().create_future()
+        Room.pending_invites[invite_user.room.room_id] = pending_invite
+        task = asyncio.create_task(invite_user.check_agent_join(pending_invite, 30))
+        await asyncio.sleep(0)
+        assert InviteUser.get_stats()["pending"] == 1
+
+        pending_invite.set_result(joined)
+        # The wait ends right away, it does not wait for the timeout
+        await asyncio.wait_for(task, 1)
+
+        invite_user._update_menu.assert_awaited_once_with(case_id)
+        invite_user.room.matrix_client.kick_user.assert_not_called()
+        assert InviteUser.get_stats() == {"pending": 0, "join": 0, "reject": 0, "timeout": 0} | {
+            case_id: 1
+        }
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, invite_user: InviteUser):
+        pending_invite = asyncio.get_running_loop().create_future()
+        Room.pending_invites[invite_user.room.room_id] = pending_invite
+
+        await invite_user.check_agent_join(pending_invite, 0.01)
+
+        assert pending_invite.result() is False
+        invite_user.room.matrix_client.kick_user.assert_awaited_once_with(
+            invite_user.room.room_id, "@agent:foo.com"
+        )
+        invite_user._update_menu.assert_awaited_once_with("timeout")
+        invite_user.room.delete_timer.assert_awaited_once()
+        assert invite_user.room.room_id not in Room.pending_invites
+
+    @pytest.mark.asyncio
+    async def test_resume_while_waiting(self, invite_user: InviteUser, mocker: MockerFixture):
+        check_agent_join = mocker.patch.object(InviteUser, "check_agent_join")
+        pending_invite = asyncio.get_running_loop().create_future()
+        Room.pending_invites[invite_user.room.room_id] = pending_invite
+        invite_user.room.route.state = RouteState.INVITE
+
+        # The flow was reloaded while the invitation was waited
+        assert await invite_user.resume_timer({}, delay=3)
+
+        assert Room.pending_invites.pop(invite_user.room.room_id) is pending_invite
+        check_agent_join.assert_not_called()
@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import nest_asyncio
+import pytest
+from pytest_mock import MockerFixture
+
+from menuflow.config import Config
+from menuflow.nodes import Base, HTTPRequest, ParallelHTTPRequest
+
+nest_asyncio.apply()
+
+
+@pytest.fixture
+def parallel_http_request(config: Config, base: Base) -> ParallelHTTPRequest:
+    ParallelHTTPRequest.config = config
+    return ParallelHTTPRequest(
+        {
+            "id": "parallel-1",
+            "type": "parallel_http_request",
+            "timeout": 5,
+            "requests": [
+                {"id": "crm", "method": "GET", "url": "https://crm.example.com"},
+                {"id": "billing", "method": "GET", "url": "https://billing.example.com"},
+            ],
+            "cases": [
+                {"id": "ok", "o_connection": "m1"},
+                {"id": "partial", "o_connection": "m2"},
+                {"id": "failed", "o_connection": "m3"},
+            ],
+        },
+        room=base.room,
+        default_variables=base.default_variables,
+    )
+
+
+class TestParallelHTTPRequestNode:
+    def test_requests(self, parallel_http_request: ParallelHTTPRequest):
+        requests = parallel_http_request.requests
+        assert [request.id for request in requests] == ["parallel-1.crm", "parallel-1.billing"]
+        assert all(isinstance(request, HTTPRequest) for request in requests)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "statuses, outcome",
+        [((200, 201), "ok"), ((200, 500), "partial"), ((404, 500), "failed")],
+    )
+    async def test_make_requests(
+        self,
+        parallel_http_request: ParallelHTTPRequest,
+        mocker: MockerFixture,
+        statuses: tuple,
+        outcome: str,
+    ):
+        responses = {
+            "parallel-1.crm": (statuses[0], "", {"route.name": "foo"}),
+            "parallel-1.billing": (statuses[1], "", {"route.balance": 10}),
+        }
+
+        async def request(self: HTTPRequest):
+            return responses[self.id]
+
+        mocker.patch.object(HTTPRequest, "request", request)
+        result, variables = await parallel_http_request.make_requests()
+
+        assert result == outcome
+        assert variables == {
+            **({"route.name": "foo"} if statuses[0] < 300 else {}),
+            **({"route.balance": 10} if statuses[1] < 300 else {}),
+        }
+
+    @pytest.mark.asyncio
+    async def test_run(self, parallel_http_request: ParallelHTTPRequest, mocker: MockerFixture):
+        async def request(self: HTTPRequest):
+            return 200, "", {"route.name": "foo"}
+
+        mocker.patch.object(HTTPRequest, "request", request)
+        await parallel_http_request.run()
+
+        assert parallel_http_request.room.route.node_id == "m1"
+        assert await parallel_http_request.room.get_variable("route.name") == "foo"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("attempts, outcome", [(2, "ok"), (1, "partial")])
+    async def test_retry_after_refreshed_token(
+        self,
+        parallel_http_request: ParallelHTTPRequest,
+        mocker: MockerFixture,
+        attempts: int,
+        outcome: str,
+    ):
+        parallel_http_request.middlewares["crm"] = MagicMock(attempts=attempts)
+        statuses = {"parallel-1.crm": [401, 200], "parallel-1.billing": [200]}
+
+        async def request(self: HTTPRequest):
+            return statuses[self.id].pop(0), "", {}
+
+        mocker.patch.object(HTTPRequest, "request", request)
+        result, _ = await parallel_http_request.make_requests()
+
+        assert result == outcome
+        assert statuses["parallel-1.crm"] == ([] if attempts > 1 else [200])
+
+    @pytest.mark.asyncio
+    async def test_cancelled_requests_are_awaited(
+        self, parallel_http_request: ParallelHTTPRequest, mocker: MockerFixture
+    ):
+        parallel_http_request.content["timeout"] = 0.05
+        finished = []
+
+        async def request(self: HTTPRequest):
+            if self.id == "parallel-1.crm":
+                try:
+                    await asyncio.sleep(10)
+                finally:
+                    finished.append(self.id)
+
+            return 200, "", {}
+
+        mocker.patch.object(HTTPRequest, "request", request)
+        result, _ = await parallel_http_request.make_requests()
+
+        assert result == "partial"
+        assert finished == ["parallel-1.crm"]
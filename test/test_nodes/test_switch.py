@@ -65,3 +65,35 @@ class TestSwitchNode:
     async def test_get_case_by_id(self, switch: Switch):
         assert await switch.get_case_by_id("ok") == "request-1"
         assert await switch.get_case_by_id("ko") == "request-1"
+
+    def test_case_index_is_built_once(self, switch: Switch):
+        case_index = switch.case_index
+        other_switch = Switch(switch.content, room=switch.room, default_variables={})
+        assert other_switch.case_index is case_index
+
+        Switch.clear_case_indexes()
+        assert other_switch.case_index is not case_index
+        assert other_switch.case_index == case_index
+
+    @pytest.mark.asyncio
+    async def test_validate_cases_stops_at_first_match(self, switch: Switch):
+        switch = Switch(
+            {
+                "id": "switch-2",
+                "type": "switch",
+                "cases": [
+                    {"case": "{{ route.cat_age|int < 10 }}", "o_connection": "m1"},
+                    {"case": "{{ route.cat_age|int < 20 }}", "o_connection": "m2"},
+                    {"id": "default", "o_connection": "m3"},
+                ],
+            },
+            room=switch.room,
+            default_variables={},
+        )
+
+        await switch.room.set_variable("cat_age", "5")
+        assert await switch.validate_cases() == "m1"
+        await switch.room.set_variable("cat_age", "15")
+        assert await switch.validate_cases() == "m2"
+        await switch.room.set_variable("cat_age", "30")
+        assert await switch.validate_cases() == "m3"
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from menuflow.utils import Timer, TimerService
+
+
+class TestTimerService:
+    @pytest.fixture(autouse=True)
+    def timer_service(self, monkeypatch):
+        # Each test runs in its own event loop
+        monkeypatch.setattr(TimerService, "_task", None)
+        TimerService.cancel_all()
+        yield TimerService
+        TimerService.cancel_all()
+
+    @pytest.mark.asyncio
+    async def test_fire_in_order(self):
+        fired = []
+
+        async def callback(timer: Timer):
+            fired.append(timer.key)
+
+        TimerService.schedule("!b:foo.com", 0.02, callback)
+        TimerService.schedule("!a:foo.com", 0.01, callback)
+        await asyncio.sleep(0.05)
+
+        assert fired == ["!a:foo.com", "!b:foo.com"]
+        assert TimerService.timers == {}
+
+    @pytest.mark.asyncio
+    async def test_cancel(self):
+        fired = []
+
+        async def callback(timer: Timer):
+            fired.append(timer.key)
+
+        TimerService.schedule("!a:foo.com", 0.01, callback)
+        assert TimerService.cancel("!a:foo.com")
+        assert not TimerService.cancel("!a:foo.com")
+        await asyncio.sleep(0.03)
+
+        assert fired == []
+
+    @pytest.mark.asyncio
+    async def test_reschedule(self):
+        fired = []
+
+        async def callback(timer: Timer):
+            fired.append(timer.key)
+            if len(fired) < 3:
+                TimerService.reschedule(timer, 0.01, callback)
+
+        TimerService.schedule("!a:foo.com", 0.01, callback)
+        await asyncio.sleep(0.1)
+
+        assert len(fired) == 3
+
+    @pytest.mark.asyncio
+    async def test_reschedule_cancelled_timer(self):
+        async def callback(timer: Timer):
+            TimerService.cancel(timer.key)
+            assert TimerService.reschedule(timer, 0.01, callback) is None
+
+        TimerService.schedule("!a:foo.com", 0.01, callback)
+        await asyncio.sleep(0.03)
+
+        assert TimerService.timers == {}
+
+    @pytest.mark.asyncio
+    async def test_cancel_by_prefix(self):
+        fired = []
+
+        async def callback(timer: Timer):
+            fired.append(timer.key)
+
+        TimerService.schedule("@bot1:foo.com/!a:foo.com", 0.01, callback)
+        TimerService.schedule("@bot1:foo.com/!b:foo.com", 0.01, callback)
+        TimerService.schedule("@bot2:foo.com/!a:foo.com", 0.01, callback)
+
+        assert TimerService.cancel_by_prefix("@bot1:foo.com/") == 2
+        await asyncio.sleep(0.03)
+
+        assert fired == ["@bot2:foo.com/!a:foo.com"]
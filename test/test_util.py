@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from menuflow.utils import UserMatcher, Util
+
+
+class TestTaskRegistry:
+    @pytest.fixture(autouse=True)
+    def tasks(self, monkeypatch):
+        monkeypatch.setattr(Util, "_tasks", {})
+
+    @pytest.mark.asyncio
+    async def test_task_is_removed_when_it_finishes(self):
+        task = Util.create_task(asyncio.sleep(0), name="!room:foo.com")
+        assert Util.get_tasks_by_name("!room:foo.com") is task
+
+        await task
+        assert Util.get_tasks_by_name("!room:foo.com") is None
+
+    @pytest.mark.asyncio
+    async def test_cancel_tasks_by_prefix(self):
+        tasks = [
+            Util.create_task(asyncio.sleep(10), name=name)
+            for name in ("replay.1", "replay.2", "other")
+        ]
+
+        assert Util.cancel_tasks_by_prefix("replay.") == 2
+        await asyncio.sleep(0)
+        assert [task.cancelled() for task in tasks] == [True, True, False]
+        tasks[2].cancel()
+
+
+class TestIgnoreUser:
+    @pytest.fixture
+    def util(self, monkeypatch) -> Util:
+        monkeypatch.setattr(Util, "_ignore_matchers", {})
+        return Util(
+            {
+                "menuflow.ignore.messages_from": [
+                    "@whatsappbot:example.com",
+                    "@admin:example.com",
+                    "@telegram_.+:example.com",
+                ],
+                "menuflow.ignore.invitations_from": ["@admin:example.com"],
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "mxid, origin, ignored",
+        [
+            ("@admin:example.com", "message", True),
+            ("@telegram_1234:example.com", "message", True),
+            # The patterns match the beginning of the user ID, as re.match
+            ("@admin:example.com.co", "message", True),
+            ("@user:example.com", "message", False),
+            ("@whatsappbot:example.com", "invite", False),
+            ("@admin:example.com", "invite", True),
+            ("not a user id", "message", False),
+        ],
+    )
+    def test_ignore_user(self, util: Util, mxid: str, origin: str, ignored: bool):
+        assert util.ignore_user(mxid=mxid, origin=origin) is ignored
+
+    def test_matcher_is_rebuilt_when_config_changes(self, util: Util):
+        assert not util.ignore_user(mxid="@user:example.com", origin="message")
+        matcher = Util._ignore_matchers["menuflow.ignore.messages_from"]
+        assert util.ignore_user(mxid="@admin:example.com", origin="message")
+        assert Util._ignore_matchers["menuflow.ignore.messages_from"] is matcher
+
+        util.config["menuflow.ignore.messages_from"] = ["@user:.+"]
+        assert util.ignore_user(mxid="@user:example.com", origin="message")
+        assert not util.ignore_user(mxid="@admin:example.com", origin="message")
+
+
+class TestUserMatcher:
+    def test_exact_user_ids(self):
+        matcher = UserMatcher(["@admin:example.com", "@bot_.+:example.com"])
+        assert matcher.exact == {"@admin:example.com"}
+
+    def test_backreferences(self):
+        matcher = UserMatcher(["@(a)b:example.com", r"@(\w)\1:example.com"])
+        assert matcher.match("@aa:example.com")
+        assert not matcher.match("@ab:foo.com")
+
+    def test_results_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(UserMatcher, "max_size", 2)
+        matcher = UserMatcher(["@admin:example.com"])
+        for mxid in ("@a:foo.com", "@b:foo.com", "@c:foo.com"):
+            matcher.match(mxid)
+
+        assert list(matcher.results) == ["@b:foo.com", "@c:foo.com"]